@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Generate synthetic reference documents for benchmarking citation parsing, must be ran from the academic_tracker directory as python benchmarks/generate_corpus.py.
+
+The documents are built from the seeds in tests/testing_files, so they look like
+the references the parsers are tested against, just much bigger. Titles and author
+names are drawn from the MEDLINE test file, and a small fraction of citations are
+repeated so duplicate detection has something to find.
+
+Usage:
+    generate_corpus.py <output_dir> [--sizes=<sizes>] [--seed=<int>]
+
+Options:
+    --sizes=<sizes>    Comma separated numbers of citations to generate for each document. [default: 100,1000,10000,100000]
+    --seed=<int>       Seed for the random number generator, so documents are reproducible. [default: 0]
+"""
+
+import os
+import re
+import json
+import random
+
+import docopt
+
+
+TESTING_FILES_DIR = os.path.join("tests", "testing_files")
+
+## The seed file has one citation for each style, in this order, separated by blank lines.
+TEXT_STYLES = ["MLA", "APA", "Chicago", "Harvard", "Vancouver"]
+SEED_TITLE = "A computational framework for high-throughput isotopic natural abundance correction of omics-level ultra-high resolution FT-MS datasets"
+SEED_LAST_NAMES = ["Carreer", "Flight", "Moseley"]
+SEED_YEAR = "2013"
+SEED_DOI = "10.3390/metabo3040853"
+SEED_PMID = "24404440"
+
+DUPLICATE_FRACTION = 0.02
+
+MYNCBI_CITATION_START = '<div class="citation-wrap">'
+MYNCBI_TITLE_REGEX = re.compile(r'(<span class="title">\s*)(.*?)(\s*</span>)', re.S)
+MEDLINE_PMID_REGEX = re.compile(r"^PMID- \d+", re.M)
+
+
+
+def load_seeds():
+    """Read in the seed documents from tests/testing_files.
+
+    Returns:
+        seeds (dict): {"text_citations":{style:citation_line}, "MEDLINE_records":[record, ...],
+                       "myncbi_page":html, "titles":[title, ...], "last_names":[last_name, ...]}
+    """
+
+    with open(os.path.join(TESTING_FILES_DIR, "parse_citations_test.txt"), encoding = "utf-8") as f:
+        citation_lines = [line for line in f.read().split("\n") if line.strip()]
+
+    with open(os.path.join(TESTING_FILES_DIR, "medline.txt"), encoding = "utf-8") as f:
+        MEDLINE_records = [record.strip("\n") for record in f.read().split("\n\n") if record.strip()]
+
+    with open(os.path.join(TESTING_FILES_DIR, "myncbi_webpages.json"), encoding = "utf-8") as f:
+        myncbi_page = json.loads(f.read())[0]
+
+    ## Titles and authors are taken from the MEDLINE records. Periods and quotes
+    ## are removed from titles so every citation is parsed by the same style regex.
+    titles = []
+    last_names = set()
+    for record in MEDLINE_records:
+        title_match = re.search(r"^TI  - (.*(?:\n      .*)*)", record, re.M)
+        if title_match:
+            title = " ".join(line.strip() for line in title_match.group(1).split("\n"))
+            titles.append(title.replace(".", "").replace('"', "'"))
+        for author_match in re.finditer(r"^AU  - (\S+)", record, re.M):
+            if author_match.group(1).isalpha():
+                last_names.add(author_match.group(1))
+
+    return {"text_citations":dict(zip(TEXT_STYLES, citation_lines)),
+            "MEDLINE_records":MEDLINE_records,
+            "myncbi_page":myncbi_page,
+            "titles":titles,
+            "last_names":sorted(last_names)}
+
+
+
+def _iter_citation_variants(number_of_citations, seeds, rng):
+    """Yield the values to fill a synthetic citation with, repeating an earlier one every so often.
+
+    Args:
+        number_of_citations (int): number of citations to generate values for.
+        seeds (dict): the seeds returned by load_seeds.
+        rng (random.Random): random number generator to draw values from.
+
+    Yields:
+        (dict): {"title":str, "last_names":[str, str, str], "year":str, "DOI":str, "PMID":str}
+    """
+
+    variants = []
+    for i in range(number_of_citations):
+        if variants and rng.random() < DUPLICATE_FRACTION:
+            variant = rng.choice(variants)
+        else:
+            variant = {"title":rng.choice(seeds["titles"]),
+                       "last_names":rng.sample(seeds["last_names"], len(SEED_LAST_NAMES)),
+                       "year":str(rng.randint(1990, 2023)),
+                       "DOI":"10.5555/benchmark." + str(i),
+                       "PMID":str(30000000 + i)}
+            variants.append(variant)
+        yield variant
+
+
+
+def generate_text_document(style, number_of_citations, seeds, rng):
+    """Generate a document of citations in the given style, 1 per line with blank lines between them.
+
+    Args:
+        style (str): one of TEXT_STYLES, or "mixed" to cycle through all of them.
+        number_of_citations (int): number of citations to put in the document.
+        seeds (dict): the seeds returned by load_seeds.
+        rng (random.Random): random number generator to draw values from.
+
+    Returns:
+        (str): the document.
+    """
+
+    lines = []
+    for count, variant in enumerate(_iter_citation_variants(number_of_citations, seeds, rng)):
+        line = seeds["text_citations"][TEXT_STYLES[count % len(TEXT_STYLES)] if style == "mixed" else style]
+        line = line.replace(SEED_TITLE, variant["title"])
+        for seed_last_name, last_name in zip(SEED_LAST_NAMES, variant["last_names"]):
+            line = line.replace(seed_last_name, last_name)
+        line = line.replace(SEED_YEAR, variant["year"]).replace(SEED_DOI, variant["DOI"]).replace(SEED_PMID, variant["PMID"])
+        lines.append(line)
+
+    return "\n\n".join(lines) + "\n"
+
+
+
+def generate_MEDLINE_document(number_of_citations, seeds, rng):
+    """Generate a MEDLINE formatted document by cycling through the seed records with new PMIDs.
+
+    Args:
+        number_of_citations (int): number of records to put in the document.
+        seeds (dict): the seeds returned by load_seeds.
+        rng (random.Random): random number generator to draw values from.
+
+    Returns:
+        (str): the document.
+    """
+
+    records = []
+    for count, variant in enumerate(_iter_citation_variants(number_of_citations, seeds, rng)):
+        record = seeds["MEDLINE_records"][count % len(seeds["MEDLINE_records"])]
+        records.append(MEDLINE_PMID_REGEX.sub("PMID- " + variant["PMID"], record, count=1))
+
+    return "\n\n".join(records) + "\n\n"
+
+
+
+def generate_myncbi_page(number_of_citations, seeds, rng):
+    """Generate a MyNCBI page with number_of_citations citations on it.
+
+    The page around the citations is the seed page, and the citations are the
+    seed page's citations with new titles.
+
+    Args:
+        number_of_citations (int): number of citations to put on the page.
+        seeds (dict): the seeds returned by load_seeds.
+        rng (random.Random): random number generator to draw values from.
+
+    Returns:
+        (str): the page's HTML.
+    """
+
+    page = seeds["myncbi_page"]
+    first_citation = page.index(MYNCBI_CITATION_START)
+    last_citation = page.rindex(MYNCBI_CITATION_START)
+    ## The last citation runs into the rest of the page, so it is left out of the templates and the page ends with it.
+    citation_templates = [MYNCBI_CITATION_START + citation for citation in page[first_citation:last_citation].split(MYNCBI_CITATION_START) if citation]
+
+    citations = []
+    for count, variant in enumerate(_iter_citation_variants(number_of_citations - 1, seeds, rng)):
+        template = citation_templates[count % len(citation_templates)]
+        citations.append(MYNCBI_TITLE_REGEX.sub(lambda match: match.group(1) + variant["title"] + "." + match.group(3), template, count=1))
+
+    return page[:first_citation] + "".join(citations) + page[last_citation:]
+
+
+
+def generate_corpus(number_of_citations, seed=0):
+    """Generate every benchmark document with number_of_citations citations.
+
+    Args:
+        number_of_citations (int): number of citations to put in each document.
+        seed (int): seed for the random number generator.
+
+    Returns:
+        corpus (dict): keys are the document names, the styles in TEXT_STYLES, "mixed", "MEDLINE", and "MyNCBI", and values are the documents.
+    """
+
+    seeds = load_seeds()
+    rng = random.Random(seed)
+
+    corpus = {style:generate_text_document(style, number_of_citations, seeds, rng) for style in TEXT_STYLES + ["mixed"]}
+    corpus["MEDLINE"] = generate_MEDLINE_document(number_of_citations, seeds, rng)
+    corpus["MyNCBI"] = generate_myncbi_page(number_of_citations, seeds, rng)
+
+    return corpus
+
+
+
+def main():
+    args = docopt.docopt(__doc__)
+
+    output_dir = args["<output_dir>"]
+    os.makedirs(output_dir, exist_ok=True)
+    for number_of_citations in [int(size) for size in args["--sizes"].split(",")]:
+        corpus = generate_corpus(number_of_citations, int(args["--seed"]))
+        for name, document in corpus.items():
+            extension = ".html" if name == "MyNCBI" else ".txt"
+            with open(os.path.join(output_dir, name + "_" + str(number_of_citations) + extension), "w", encoding = "utf-8") as f:
+                f.write(document)
+        print("Generated documents with " + str(number_of_citations) + " citations in " + output_dir)
+
+
+
+if __name__ == "__main__":
+    main()
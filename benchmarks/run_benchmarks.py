@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark the citation parsers and duplicate detection on synthetic documents, must be ran from the academic_tracker directory as python benchmarks/run_benchmarks.py.
+
+Documents are generated in memory by generate_corpus.py for each size. Each parser
+is timed on each document, and the best time over the repeats is reported along
+with lines per second and the peak memory Python allocated during a separate run.
+find_duplicate_citations compares titles pairwise, so it is only ran on sizes up
+to --dedupe-max. The MyNCBI page is also converted to text with webio.convert_html_to_text
+and with the BeautifulSoup .text it replaced, so the two can be compared.
+
+Usage:
+    run_benchmarks.py [--sizes=<sizes>] [--dedupe-max=<int>] [--repeat=<int>] [--seed=<int>] [--output=<file-path>] [--baseline=<file-path>]
+
+Options:
+    --sizes=<sizes>              Comma separated numbers of citations to benchmark. [default: 100,1000,10000,100000]
+    --dedupe-max=<int>           Largest number of citations to run find_duplicate_citations on. [default: 100]
+    --repeat=<int>               Number of times to time each step, the best time is reported. [default: 3]
+    --seed=<int>                 Seed for the corpus generator. [default: 0]
+    --output=<file-path>         Save the results as JSON to this file.
+    --baseline=<file-path>       JSON file of results from an earlier run to compare against.
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import tracemalloc
+import warnings
+
+import bs4
+import docopt
+
+## fuzzywuzzy warns about python-Levenshtein on import.
+warnings.filterwarnings("ignore", module = "fuzzywuzzy")
+
+from academic_tracker import citation_parsing
+from academic_tracker import helper_functions
+from academic_tracker import webio
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import generate_corpus
+
+
+TEXT_DOCUMENTS = generate_corpus.TEXT_STYLES + ["mixed"]
+
+
+
+def convert_html_to_text_in_chunks(html):
+    """Convert html to text with webio.convert_html_to_text, fed in the chunk size it reads webpages with.
+
+    Args:
+        html (str): the HTML document.
+
+    Returns:
+        (str): the text of the document.
+    """
+
+    chunk_size = webio.URL_READ_CHUNK_SIZE
+    return webio.convert_html_to_text(html[i:i+chunk_size] for i in range(0, len(html), chunk_size))
+
+
+
+def convert_html_to_text_with_BeautifulSoup(html):
+    """Convert html to text the way clean_tags_from_url did before convert_html_to_text.
+
+    Args:
+        html (str): the HTML document.
+
+    Returns:
+        (str): the text of the document.
+    """
+
+    clean_html = html.replace("\n", "")
+    for tag, replacement in webio.HTML_LINE_BREAK_REPLACEMENTS:
+        clean_html = clean_html.replace(tag, replacement)
+    return bs4.BeautifulSoup(clean_html, "lxml").text
+
+
+
+def measure(function, argument, repeat):
+    """Time function(argument) and measure the peak memory it allocates.
+
+    The timing runs are done without tracemalloc because it slows allocation down considerably.
+
+    Args:
+        function (callable): the function to benchmark.
+        argument (any): the single argument to call function with.
+        repeat (int): number of times to time the call.
+
+    Returns:
+        result (any): what function returned.
+        seconds (float): the fastest time over the repeats.
+        peak_MiB (float): the peak memory traced while calling function once more.
+    """
+
+    times = []
+    for i in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = function(argument)
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    function(argument)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return result, min(times), peak / 2**20
+
+
+
+def run_benchmarks(sizes, dedupe_max, repeat, seed):
+    """Run every benchmark step on every size of corpus.
+
+    Args:
+        sizes (list): numbers of citations to generate documents with.
+        dedupe_max (int): largest number of citations to run find_duplicate_citations on.
+        repeat (int): number of times to time each step.
+        seed (int): seed for the corpus generator.
+
+    Returns:
+        results (list): list of dicts, {"step":str, "citations":int, "lines":int, "seconds":float, "lines_per_second":float, "peak_MiB":float, "parsed":int}
+                       For the HTML to text steps parsed is the number of characters of text.
+    """
+
+    steps = []
+    for size in sizes:
+        corpus = generate_corpus.generate_corpus(size, seed)
+
+        for name in TEXT_DOCUMENTS:
+            steps.append(("parse_text_for_citations[" + name + "]", size, corpus[name], citation_parsing.parse_text_for_citations))
+        steps.append(("parse_MEDLINE_format", size, corpus["MEDLINE"], citation_parsing.parse_MEDLINE_format))
+        steps.append(("tokenize_myncbi_citations", size, corpus["MyNCBI"], citation_parsing.tokenize_myncbi_citations))
+        steps.append(("convert_html_to_text", size, corpus["MyNCBI"], convert_html_to_text_in_chunks))
+        steps.append(("BeautifulSoup.text", size, corpus["MyNCBI"], convert_html_to_text_with_BeautifulSoup))
+
+    results = []
+    for step, size, document, function in steps:
+        parsed, seconds, peak_MiB = measure(function, document, repeat)
+        lines = document.count("\n") + 1
+        results.append({"step":step, "citations":size, "lines":lines, "seconds":seconds,
+                        "lines_per_second":lines / seconds if seconds else float("inf"),
+                        "peak_MiB":peak_MiB, "parsed":len(parsed)})
+        print_result(results[-1])
+
+        ## Duplicate detection is benchmarked on the mixed style document since it has every style in it.
+        if step == "parse_text_for_citations[mixed]" and size <= dedupe_max:
+            duplicates, seconds, peak_MiB = measure(helper_functions.find_duplicate_citations, parsed, repeat)
+            results.append({"step":"find_duplicate_citations", "citations":size, "lines":lines, "seconds":seconds,
+                            "lines_per_second":lines / seconds if seconds else float("inf"),
+                            "peak_MiB":peak_MiB, "parsed":len(duplicates)})
+            print_result(results[-1])
+
+    return results
+
+
+
+RESULT_FORMAT = "{step:<42} {citations:>9} {lines:>9} {seconds:>10.4f} {lines_per_second:>12.0f} {peak_MiB:>9.2f} {parsed:>8}"
+HEADER_FORMAT = "{:<42} {:>9} {:>9} {:>10} {:>12} {:>9} {:>8}"
+
+def print_result(result, baseline_result=None):
+    """Print a row of the results table, with the speedup over baseline_result if given.
+
+    Args:
+        result (dict): a single result from run_benchmarks.
+        baseline_result (dict|None): the result for the same step and size from an earlier run.
+    """
+
+    row = RESULT_FORMAT.format(**result)
+    if baseline_result:
+        row += "  {:.2f}x".format(baseline_result["seconds"] / result["seconds"]) if result["seconds"] else "  -"
+    print(row)
+
+
+
+def main():
+    args = docopt.docopt(__doc__)
+
+    sizes = [int(size) for size in args["--sizes"].split(",")]
+
+    print(HEADER_FORMAT.format("step", "citations", "lines", "seconds", "lines/s", "peak MiB", "parsed"))
+    results = run_benchmarks(sizes, int(args["--dedupe-max"]), int(args["--repeat"]), int(args["--seed"]))
+
+    if args["--baseline"]:
+        with open(args["--baseline"], encoding = "utf-8") as f:
+            baseline = {(result["step"], result["citations"]):result for result in json.loads(f.read())}
+        print()
+        print("Compared to " + args["--baseline"] + " (speedup):")
+        for result in results:
+            print_result(result, baseline.get((result["step"], result["citations"])))
+
+    if args["--output"]:
+        with open(args["--output"], "w", encoding = "utf-8") as f:
+            f.write(json.dumps(results, indent = 2))
+
+
+
+if __name__ == "__main__":
+    main()
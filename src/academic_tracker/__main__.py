@@ -7,6 +7,8 @@ Usage:
                                                       [--no-ORCID --no_ORCID] 
                                                       [--no-Crossref --no_Crossref] 
                                                       [--no-PubMed --no_PubMed]
+                                                      [--report-workers=<num>]
+                                                      [--incremental-reports]
                                                       [--verbose --silent]
     academic_tracker reference_search <config_json_file> <references_file_or_URL> [--test] 
                                                                                   [--prev-pub=<file-path> --prev_pub=<file-path>]
@@ -14,6 +16,7 @@ Usage:
                                                                                   [--PMID-reference --PMID_reference]
                                                                                   [--MEDLINE-reference --MEDLINE_reference]
                                                                                   [--keep-duplicates]
+                                                                                  [--cache-dir=<dir-path>]
                                                                                   [--no-Crossref --no_Crossref]
                                                                                   [--no-PubMed --no_PubMed]
                                                                                   [--verbose --silent]
@@ -22,12 +25,18 @@ Usage:
     academic_tracker add_authors <config_json_file> <authors_file> [--verbose --silent]
     academic_tracker tokenize_reference <references_file_or_URL> [--MEDLINE-reference --MEDLINE_reference]
                                                                  [--keep-duplicates]
+                                                                 [--workers=<num>]
+                                                                 [--cache-dir=<dir-path>]
                                                                  [--verbose --silent]
-    academic_tracker gen_reports_and_emails_auth <config_json_file> <publication_json_file> [--test --verbose --silent]
+    academic_tracker gen_reports_and_emails_auth <config_json_file> <publication_json_file> [--test] 
+                                                                                           [--report-workers=<num>]
+                                                                                           [--incremental-reports]
+                                                                                           [--verbose --silent]
     academic_tracker gen_reports_and_emails_ref <config_json_file> <references_file_or_URL> <publication_json_file> [--test]
                                                                                                                     [--prev-pub=<file-path> --prev_pub=<file-path>]
                                                                                                                     [--MEDLINE-reference --MEDLINE_reference]
                                                                                                                     [--keep-duplicates]
+                                                                                                                    [--cache-dir=<dir-path>]
                                                                                                                     [--verbose --silent]
     
 Options:
@@ -41,6 +50,12 @@ Options:
     --prev_pub=<file-path>            Deprecated. Use --prev-pub instead.
     --save-all-queries                Save all queried results from each source in "all_results.json".
     --keep-duplicates                 After references are tokenized duplicate entries are removed, use this option not to remove duplicate entries.
+    --workers=<num>                   Number of processes to tokenize the reference with. Only helps for very large reference files. Default is 1.
+    --report-workers=<num>            Number of processes to create project and collaborator reports with. Only helps when there are many reports. Default is 1.
+    --incremental-reports             Only build and email the reports whose template, report config, publications, or Academic Tracker version changed since the last run. 
+                                      Unchanged reports are copied from the last tracker directory.
+    --cache-dir=<dir-path>            Directory to cache tokenized references in. Later runs on the same reference file or URL with the same 
+                                      options read the tokenized citations from the cache instead of tokenizing again.
     
 Reference Type Options:    
     --PMID-reference                  Indicates that the reference_file is a PMID file and only PubMed info will be returned.
@@ -60,7 +75,6 @@ Search Options:
 """
 
 
-import re
 import os
 import datetime
 import sys
@@ -118,7 +132,9 @@ def main():
                       args["--no_PubMed"] or args["--no-PubMed"],
                       args["--test"], 
                       args["--prev-pub"] if args["--prev-pub"] else args["--prev_pub"],
-                      args["--save-all-queries"])
+                      args["--save-all-queries"],
+                      int(args["--report-workers"]) if args["--report-workers"] else 1,
+                      args["--incremental-reports"])
     elif len(sys.argv) > 1 and sys.argv[1] == "reference_search":
         if args["--PMID_reference"] or args["--PMID-reference"]:
             PMID_reference(args["<config_json_file>"], args["<references_file_or_URL>"], args["--test"])
@@ -131,7 +147,8 @@ def main():
                              args["--test"], 
                              args["--prev-pub"] if args["--prev-pub"] else args["--prev_pub"],
                              args["--save-all-queries"],
-                             not args["--keep-duplicates"])
+                             not args["--keep-duplicates"],
+                             args["--cache-dir"])
     elif len(sys.argv) > 1 and sys.argv[1] == "find_ORCID":
         find_ORCID(args["<config_json_file>"])
     elif len(sys.argv) > 1 and sys.argv[1] == "find_Google_Scholar":
@@ -141,9 +158,15 @@ def main():
     elif len(sys.argv) > 1 and sys.argv[1] == "tokenize_reference":
         tokenize_reference(args["<references_file_or_URL>"], 
                            args["--MEDLINE_reference"] or args["--MEDLINE-reference"],
-                           not args["--keep-duplicates"])
+                           not args["--keep-duplicates"],
+                           int(args["--workers"]) if args["--workers"] else 1,
+                           args["--cache-dir"])
     elif len(sys.argv) > 1 and sys.argv[1] == "gen_reports_and_emails_auth":
-        gen_reports_and_emails_auth(args["<config_json_file>"], args["<publication_json_file>"], args["--test"])
+        gen_reports_and_emails_auth(args["<config_json_file>"], 
+                                    args["<publication_json_file>"], 
+                                    args["--test"], 
+                                    int(args["--report-workers"]) if args["--report-workers"] else 1,
+                                    args["--incremental-reports"])
     elif len(sys.argv) > 1 and sys.argv[1] == "gen_reports_and_emails_ref":
         gen_reports_and_emails_ref(args["<config_json_file>"], 
                                    args["<references_file_or_URL>"], 
@@ -151,14 +174,15 @@ def main():
                                    args["--MEDLINE_reference"] or args["--MEDLINE-reference"], 
                                    args["--test"], 
                                    args["--prev-pub"] if args["--prev-pub"] else args["--prev_pub"],
-                                   not args["--keep-duplicates"])
+                                   not args["--keep-duplicates"],
+                                   args["--cache-dir"])
     else:
         print("Unrecognized command")  
         
 
 
 def author_search(config_json_filepath, no_ORCID, no_GoogleScholar, no_Crossref, no_PubMed, 
-                  test, prev_pub_filepath, save_all_results):
+                  test, prev_pub_filepath, save_all_results, report_workers=1, incremental_reports=False):
     """Query sources for publications by author.
     
     Reads in the JSON config file, previous publications JSON file, and checks for errors.
@@ -176,6 +200,8 @@ def author_search(config_json_filepath, no_ORCID, no_GoogleScholar, no_Crossref,
         test (bool): If True save_dir_name is tracker-test instead of tracker- and emails are not sent.
         prev_pub_filepath (str or None): filepath to the publication JSON to read in.
         save_all_results (bool): if True, save all of the queried publications from each source as "all_results.json"
+        report_workers (int): the number of processes to create project and collaborator reports with.
+        incremental_reports (bool): If True only build and email reports whose inputs changed since the previous run.
     """
     
     config_dict = athr_srch_modularized.input_reading_and_checking(config_json_filepath, no_ORCID, no_GoogleScholar, 
@@ -192,10 +218,12 @@ def author_search(config_json_filepath, no_ORCID, no_GoogleScholar, no_Crossref,
     ## Query sources and build publication_dict.
     publication_dict, all_queries = athr_srch_modularized.build_publication_dict(config_dict, prev_pubs, no_ORCID, no_GoogleScholar, no_Crossref, no_PubMed)            
     
-    save_dir_name = athr_srch_modularized.save_and_send_reports_and_emails(authors_by_project_dict, publication_dict, config_dict, test)
+    save_dir_name = athr_srch_modularized.save_and_send_reports_and_emails(authors_by_project_dict, publication_dict, config_dict, test, report_workers, incremental_reports)
     
     ## combine previous and new publications lists and save
     fileio.save_publications_to_file(save_dir_name, publication_dict, prev_pubs)
+    ## prev_pubs was updated with publication_dict when saving, so it is what is in publications.json.
+    fileio.save_publication_index_to_file(save_dir_name, prev_pubs)
     
     if save_all_results:
         fileio.save_json_to_file(save_dir_name, "all_results.json", all_queries)
@@ -205,7 +233,7 @@ def author_search(config_json_filepath, no_ORCID, no_GoogleScholar, no_Crossref,
 
 
 def reference_search(config_json_filepath, ref_path_or_URL, MEDLINE_reference, no_Crossref, no_PubMed, 
-                     test, prev_pub_filepath, save_all_results, remove_duplicates):
+                     test, prev_pub_filepath, save_all_results, remove_duplicates, cache_dir=None):
     """Query PubMed and Crossref for publications matching a reference.
     
     Read in user inputs and check for error, query sources based on inputs, build 
@@ -221,19 +249,23 @@ def reference_search(config_json_filepath, ref_path_or_URL, MEDLINE_reference, n
         prev_pub_filepath (str or None): filepath to the publication JSON to read in.
         save_all_results (bool): if True, save all of the queried publications from each source as "all_results.json".
         remove_duplicates (bool): if True, remove duplicate entries in tokenized citations.
+        cache_dir (str|None): path to the directory to cache tokenized citations in, if None no cache is used.
     """
     
     config_dict, tokenized_citations, has_previous_pubs, prev_pubs = \
         ref_srch_modularized.input_reading_and_checking(config_json_filepath, ref_path_or_URL, 
                                                         MEDLINE_reference, no_Crossref, no_PubMed, 
                                                         prev_pub_filepath,
-                                                        remove_duplicates)       
+                                                        remove_duplicates,
+                                                        cache_dir)       
+    prev_pubs_index = fileio.load_publication_index(prev_pub_filepath) if has_previous_pubs else None
 
     publication_dict, tokenized_citations, all_queries = ref_srch_modularized.build_publication_dict(config_dict, tokenized_citations, no_Crossref, no_PubMed)
             
-    save_dir_name = ref_srch_modularized.save_and_send_reports_and_emails(config_dict, tokenized_citations, publication_dict, prev_pubs, has_previous_pubs, test)
+    save_dir_name = ref_srch_modularized.save_and_send_reports_and_emails(config_dict, tokenized_citations, publication_dict, prev_pubs, has_previous_pubs, test, prev_pubs_index)
             
     fileio.save_publications_to_file(save_dir_name, publication_dict, {})
+    fileio.save_publication_index_to_file(save_dir_name, publication_dict)
     fileio.save_json_to_file(save_dir_name, "tokenized_reference.json", tokenized_citations)
     
     if save_all_results:
@@ -284,13 +316,14 @@ def PMID_reference(config_json_filepath, ref_path_or_URL, test):
     
     ## Build the save directory name.
     if test:
-        save_dir_name = "tracker-test-" + re.sub(r"\-| |\:", "", str(datetime.datetime.now())[2:16])
+        save_dir_name = "tracker-test-" + helper_functions.REGEXES["timestamp_separators"].sub("", str(datetime.datetime.now())[2:16])
     else:
-        save_dir_name = "tracker-" + re.sub(r"\-| |\:", "", str(datetime.datetime.now())[2:16])
+        save_dir_name = "tracker-" + helper_functions.REGEXES["timestamp_separators"].sub("", str(datetime.datetime.now())[2:16])
     os.mkdir(save_dir_name)
     
     ## combine previous and new publications lists and save
     fileio.save_publications_to_file(save_dir_name, publication_dict, {})
+    fileio.save_publication_index_to_file(save_dir_name, publication_dict)
     helper_functions.vprint("Success. Publications saved in " + save_dir_name)
     
 
@@ -315,7 +348,7 @@ def find_ORCID(config_json_filepath):
     
     if old_authors_json != config_dict["Authors"]:
         ## Build the save directory name.
-        save_dir_name = "tracker-" + re.sub(r"\-| |\:", "", str(datetime.datetime.now())[2:16])
+        save_dir_name = "tracker-" + helper_functions.REGEXES["timestamp_separators"].sub("", str(datetime.datetime.now())[2:16])
         os.mkdir(save_dir_name)
     
         fileio.save_json_to_file(save_dir_name, "configuration.json", config_dict)
@@ -345,7 +378,7 @@ def find_Google_Scholar(config_json_filepath):
     
     if old_authors_json != config_dict["Authors"]:
         ## Build the save directory name.
-        save_dir_name = "tracker-" + re.sub(r"\-| |\:", "", str(datetime.datetime.now())[2:16])
+        save_dir_name = "tracker-" + helper_functions.REGEXES["timestamp_separators"].sub("", str(datetime.datetime.now())[2:16])
         os.mkdir(save_dir_name)
     
         fileio.save_json_to_file(save_dir_name, "configuration.json", config_dict)
@@ -445,7 +478,7 @@ def add_authors(config_json_filepath, authors_filepath):
     authors_dict = df.to_dict("index")
     config_dict["Authors"].update(authors_dict)
     
-    save_dir_name = "tracker-" + re.sub(r"\-| |\:", "", str(datetime.datetime.now())[2:16])
+    save_dir_name = "tracker-" + helper_functions.REGEXES["timestamp_separators"].sub("", str(datetime.datetime.now())[2:16])
     os.mkdir(save_dir_name)
 
     fileio.save_json_to_file(save_dir_name, "configuration.json", config_dict, False)
@@ -453,20 +486,22 @@ def add_authors(config_json_filepath, authors_filepath):
     
   
     
-def tokenize_reference(ref_path_or_URL, MEDLINE_reference, remove_duplicates):
+def tokenize_reference(ref_path_or_URL, MEDLINE_reference, remove_duplicates, workers=1, cache_dir=None):
     """Tokenize input reference file.
     
     Args:
         ref_path_or_URL (str): either a filepath to file to tokenize or a URL to tokenize.
         MEDLINE_reference (bool): True indicates that ref_path_or_URL is in MEDLINE format.
         remove_duplicates (bool): if True, remove duplicate entries in tokenized citations.
+        workers (int): the number of processes to tokenize with.
+        cache_dir (str|None): path to the directory to cache tokenized citations in, if None no cache is used.
     """
     
-    tokenized_citations = ref_srch_webio.tokenize_reference_input(ref_path_or_URL, MEDLINE_reference, remove_duplicates)
+    tokenized_citations = ref_srch_webio.tokenize_reference_input(ref_path_or_URL, MEDLINE_reference, remove_duplicates, workers, cache_dir)
     
     report_string = ref_srch_emails_and_reports.create_tokenization_report(tokenized_citations)
     
-    save_dir_name = "tracker-" + re.sub(r"\-| |\:", "", str(datetime.datetime.now())[2:16])
+    save_dir_name = "tracker-" + helper_functions.REGEXES["timestamp_separators"].sub("", str(datetime.datetime.now())[2:16])
     os.mkdir(save_dir_name)
         
     fileio.save_string_to_file(save_dir_name, "tokenization_report.txt", report_string)
@@ -477,13 +512,15 @@ def tokenize_reference(ref_path_or_URL, MEDLINE_reference, remove_duplicates):
     
 
 
-def gen_reports_and_emails_auth(config_json_filepath, publication_json_filepath, test):
+def gen_reports_and_emails_auth(config_json_filepath, publication_json_filepath, test, report_workers=1, incremental_reports=False):
     """Generate reports and emails for input publications as if author_search was ran.
     
     Args:
         config_json_filepath (str): filepath to the configuration JSON.
         publication_json_filepath (str): filepath to the publication JSON to read in.
         test (bool): If True save_dir_name is tracker-test instead of tracker- and emails are not sent.
+        report_workers (int): the number of processes to create project and collaborator reports with.
+        incremental_reports (bool): If True only build and email reports whose inputs changed since the previous run.
     """
     
     config_dict = fileio.load_json(config_json_filepath)
@@ -500,7 +537,7 @@ def gen_reports_and_emails_auth(config_json_filepath, publication_json_filepath,
     user_input_checking.prev_pubs_file_check(publication_dict)
                 
     
-    save_dir_name = athr_srch_modularized.save_and_send_reports_and_emails(authors_by_project_dict, publication_dict, config_dict, test)
+    save_dir_name = athr_srch_modularized.save_and_send_reports_and_emails(authors_by_project_dict, publication_dict, config_dict, test, report_workers, incremental_reports)
     
     helper_functions.vprint("Success! Reports and emails saved in " + save_dir_name)
     
@@ -513,7 +550,8 @@ def gen_reports_and_emails_ref(config_json_filepath,
                                MEDLINE_reference, 
                                test, 
                                prev_pub_filepath,
-                               remove_duplicates):
+                               remove_duplicates,
+                               cache_dir=None):
     """Generate reports and emails for input publications and reference as if reference_search was ran.
     
     Args:
@@ -524,6 +562,7 @@ def gen_reports_and_emails_ref(config_json_filepath,
         test (bool): If True save_dir_name is tracker-test instead of tracker- and emails are not sent.
         prev_pub_filepath (str or None): filepath to the publication JSON to read in.
         remove_duplicates (bool): if True, remove duplicate entries in tokenized citations.
+        cache_dir (str|None): path to the directory to cache tokenized citations in, if None no cache is used.
     """
     
     ## read in config file
@@ -535,15 +574,15 @@ def gen_reports_and_emails_ref(config_json_filepath,
     
     if not prev_pub_filepath or prev_pub_filepath.lower() == "ignore":
         prev_pubs = {}
+        prev_pubs_index = None
         has_previous_pubs = False
     else:
-        prev_pubs = fileio.load_json(prev_pub_filepath)
-        has_previous_pubs = True
+        has_previous_pubs, prev_pubs, prev_pubs_index = fileio.read_previous_publications(prev_pub_filepath, include_index=True)
     
     if has_previous_pubs:
         user_input_checking.prev_pubs_file_check(prev_pubs)
         
-    tokenized_citations = ref_srch_webio.tokenize_reference_input(ref_path_or_URL, MEDLINE_reference, remove_duplicates) 
+    tokenized_citations = ref_srch_webio.tokenize_reference_input(ref_path_or_URL, MEDLINE_reference, remove_duplicates, cache_dir=cache_dir) 
     ## Read in publications.json
     publication_dict = fileio.load_json(publication_json_filepath)
     user_input_checking.prev_pubs_file_check(publication_dict)
@@ -568,8 +607,9 @@ def gen_reports_and_emails_ref(config_json_filepath,
         else:
             matching_key_for_citation.append(citation["pub_dict_key"])
             
+    matching_keys = set(matching_key_for_citation)
     for key in list(publication_dict.keys()):
-        if not key in matching_key_for_citation:
+        if not key in matching_keys:
             del publication_dict[key]
             
     if not publication_dict:
@@ -577,7 +617,7 @@ def gen_reports_and_emails_ref(config_json_filepath,
         sys.exit()
             
     
-    save_dir_name = ref_srch_modularized.save_and_send_reports_and_emails(config_dict, tokenized_citations, publication_dict, prev_pubs, has_previous_pubs, test)
+    save_dir_name = ref_srch_modularized.save_and_send_reports_and_emails(config_dict, tokenized_citations, publication_dict, prev_pubs, has_previous_pubs, test, prev_pubs_index)
     
     fileio.save_json_to_file(save_dir_name, "tokenized_reference.json", tokenized_citations)
     
@@ -7,12 +7,18 @@ Functions to create emails and reports for author_search.
 """
 
 import datetime
-import re
 import os
+import sys
 import copy
+import json
+import shutil
+import hashlib
+import itertools
+import collections
+import multiprocessing
+import concurrent.futures
 
-import pandas
-
+from . import __version__
 from . import helper_functions
 from . import fileio
 from . import emails_and_reports_helpers
@@ -61,17 +67,231 @@ def create_pubs_by_author_dict(publication_dict):
 
 
 
-def create_project_reports_and_emails(authors_by_project_dict, publication_dict, config_dict, save_dir_name):
+def create_collaborators_by_author_dict(publication_dict, pubs_by_author_dict):
+    """Create a dictionary with authors as the keys and their unique collaborators as the values.
+    
+    Collaborators are the pub authors on each of the author's publications other than 
+    the author, in the order they are first seen. Pub authors are compared by a hashable 
+    key, so duplicates are found with a set instead of by comparing to every collaborator 
+    already found, and the keys for a publication are only made once no matter how 
+    many authors are on it.
+    
+    Args:
+        publication_dict (dict): keys and values match the publications JSON file.
+        pubs_by_author_dict (dict): dictionary where the keys are authors and the values are a dictionary of pub_ids with thier associated grants.
+        
+    Returns:
+        collaborators_by_author_dict (dict): keys are authors and values are lists of pub author dicts from publication_dict.
+    """
+    
+    pub_author_keys = {}
+    collaborators_by_author_dict = {}
+    for author, pubs in pubs_by_author_dict.items():
+        collaborators = []
+        collaborator_keys = set()
+        for pub in pubs:
+            if pub not in pub_author_keys:
+                pub_author_keys[pub] = [_pub_author_key(pub_author) for pub_author in publication_dict[pub]["authors"]]
+            
+            for pub_author, pub_author_key in zip(publication_dict[pub]["authors"], pub_author_keys[pub]):
+                if ("author_id" in pub_author and pub_author["author_id"] == author) or pub_author_key in collaborator_keys:
+                    continue
+                
+                collaborators.append(pub_author)
+                collaborator_keys.add(pub_author_key)
+        
+        collaborators_by_author_dict[author] = collaborators
+    
+    return collaborators_by_author_dict
+
+
+
+def _pub_author_key(pub_author):
+    """Return a hashable key that is equal for pub authors that are equal.
+    
+    Args:
+        pub_author (dict): an author from the authors of a publication in the publications JSON file.
+        
+    Returns:
+        (frozenset): the pub author's keys and values, with any lists or dicts in the values made hashable.
+    """
+    
+    return frozenset((key, _hashable_value(value)) for key, value in pub_author.items())
+
+
+
+def _hashable_value(value):
+    """Convert lists and dicts in value to tuples and frozensets so it can be hashed.
+    
+    Args:
+        value (any): a value from a JSON object.
+        
+    Returns:
+        (any): value, or a hashable equivalent of it.
+    """
+    
+    if isinstance(value, list):
+        return tuple(_hashable_value(item) for item in value)
+    if isinstance(value, dict):
+        return frozenset((key, _hashable_value(item)) for key, item in value.items())
+    return value
+
+
+
+def create_report_context(publication_dict, authors_by_project_dict):
+    """Gather what every report in a run needs so it is only built once.
+    
+    pubs_by_author_dict is built up front. The loop templates of each report template, 
+    the replacements for publication keywords, the rendered pub_loop of each 
+    publication for each template, and the fingerprint of each publication are 
+    added as reports ask for them and reused by every report after that, so the 
+    publication_dict must not change while the context is in use.
+    
+    Args:
+        publication_dict (dict): keys and values match the publications JSON file.
+        authors_by_project_dict (dict): keys are project names from the config file and values are pulled from config_dict["Authors"].
+        
+    Returns:
+        report_context (dict): {"pubs_by_author_dict":pubs_by_author_dict, "authors_by_project_dict":authors_by_project_dict, 
+                                "loop_templates":{template_string:loop_templates}, "pub_keyword_replacements":{pub_id:{keyword:replacement}}, 
+                                "pub_fragments":{(template_string, pub_id):rendered_pub_loop}, "pub_fingerprints":{pub_id:fingerprint}}
+    """
+    
+    return {"pubs_by_author_dict":create_pubs_by_author_dict(publication_dict),
+            "authors_by_project_dict":authors_by_project_dict,
+            "loop_templates":{},
+            "pub_keyword_replacements":{},
+            "pub_fragments":{},
+            "pub_fingerprints":{}}
+
+
+
+def _get_loop_templates(report_context, template_string):
+    """Return the loop templates in template_string, extracting them only the first time template_string is seen.
+    
+    Args:
+        report_context (dict): the context created by create_report_context.
+        template_string (str): the report template.
+        
+    Returns:
+        (dict): keys are the tags in helper_functions.REPORT_LOOP_TAGS and values are what is between them.
+    """
+    
+    if template_string not in report_context["loop_templates"]:
+        report_context["loop_templates"][template_string] = emails_and_reports_helpers._extract_loop_templates(template_string)
+    return report_context["loop_templates"][template_string]
+
+
+
+def create_report_hash(publication_dict, pub_ids, report_inputs, report_context=None):
+    """Compute a hash of everything a report is built from.
+    
+    The package version is part of the hash so reports are rebuilt after an 
+    upgrade that could change how they are rendered.
+    
+    Args:
+        publication_dict (dict): keys and values match the publications JSON file.
+        pub_ids (iterable): the pub_ids of the publications that feed the report.
+        report_inputs (list): the template, report attributes, and config the report is built from, must be JSON serializable.
+        report_context (dict|None): the context created by create_report_context, publication fingerprints are kept in it if given.
+        
+    Returns:
+        (str): hex digest identifying the report's inputs.
+    """
+    
+    pub_fingerprints = report_context["pub_fingerprints"] if report_context else {}
+    
+    hasher = hashlib.sha256(json.dumps([__version__, report_inputs], sort_keys=True, default=str).encode("utf-8"))
+    for pub_id in sorted(pub_ids):
+        if pub_id not in pub_fingerprints:
+            pub_fingerprints[pub_id] = helper_functions.publication_fingerprint(pub_id, publication_dict[pub_id])
+        hasher.update(pub_fingerprints[pub_id].encode("utf-8"))
+    return hasher.hexdigest()
+
+
+
+def reuse_previous_report(filename, report_hash, save_dir_name, report_manifest, previous_report_manifest):
+    """Add the report to report_manifest and copy it from the previous run if its inputs haven't changed.
+    
+    A report is reused when previous_report_manifest has the same hash for filename 
+    and the file it saved is still in the previous run's directory. If 2 reports 
+    in a run are saved with the same filename neither can be reused by the next run.
+    
+    Args:
+        filename (str): filename the report is configured to be saved as.
+        report_hash (str): the hash of the report's inputs from create_report_hash.
+        save_dir_name (str): directory the current run is saving reports in.
+        report_manifest (dict|None): {"reports":{filename:{"hash":str|None, "filename":str|None}}} for the current run, nothing is done if None.
+        previous_report_manifest (dict|None): the manifest from fileio.read_previous_report_manifest, reports are never reused if None.
+        
+    Returns:
+        (bool): True if the report was copied from the previous run and doesn't need to be created or emailed.
+    """
+    
+    if report_manifest is None:
+        return False
+    
+    if filename in report_manifest["reports"]:
+        report_manifest["reports"][filename]["hash"] = None
+        return False
+    
+    report_manifest["reports"][filename] = {"hash":report_hash, "filename":None}
+    
+    if not previous_report_manifest:
+        return False
+    
+    previous_report = previous_report_manifest["reports"].get(filename)
+    if not isinstance(previous_report, dict) or previous_report.get("hash") != report_hash:
+        return False
+    
+    ## Reports with nothing in them, like collaborator reports without collaborators, aren't saved so there is nothing to copy.
+    if previous_filename := previous_report.get("filename"):
+        previous_filepath = os.path.join(previous_report_manifest["save_dir_name"], previous_filename)
+        if not os.path.isfile(previous_filepath):
+            return False
+        shutil.copy2(previous_filepath, os.path.join(save_dir_name, previous_filename))
+    
+    report_manifest["reports"][filename]["filename"] = previous_filename
+    return True
+
+
+
+def record_saved_report(filename, saved_filename, save_dir_name, report_manifest):
+    """Add the filename a report was actually saved as to its entry in report_manifest.
+    
+    Args:
+        filename (str): filename the report is configured to be saved as.
+        saved_filename (str): filename the report was saved as, tabular reports may have had an .xlsx added to the end.
+        save_dir_name (str): directory the current run is saving reports in.
+        report_manifest (dict|None): {"reports":{filename:{"hash":str|None, "filename":str|None}}} for the current run, nothing is done if None.
+    """
+    
+    if report_manifest is not None and os.path.isfile(os.path.join(save_dir_name, saved_filename)):
+        report_manifest["reports"][filename]["filename"] = saved_filename
+
+
+
+def create_project_reports_and_emails(authors_by_project_dict, publication_dict, config_dict, save_dir_name, report_context=None, report_workers=1, 
+                                      report_manifest=None, previous_report_manifest=None):
     """Create project reports and emails for each project.
     
     For each project in config_dict create a report and optional email.
-    Reports are saved in save_dir_name as they are created.
+    Reports are saved in save_dir_name as they are created. If report_workers is 
+    more than 1, the reports are created on a process pool, but the emails are 
+    still in the same order as creating them one at a time. If report_manifest 
+    is given, each report is added to it, and reports with the same inputs as 
+    in previous_report_manifest are copied from the previous run instead of 
+    being created again, and aren't emailed.
     
     Args:
         authors_by_project_dict (dict): keys are project names from the config file and values are pulled from config_dict["Authors"].
         publication_dict (dict): keys and values match the publications JSON file.
         config_dict (dict): keys and values match the project tracking configuration JSON file.
         save_dir_name (str): directory to save the reports in.
+        report_context (dict|None): the context created by create_report_context, one is created if None.
+        report_workers (int): the number of processes to create reports with.
+        report_manifest (dict|None): {"reports":{}} to add the reports to, see reuse_previous_report.
+        previous_report_manifest (dict|None): the manifest from fileio.read_previous_report_manifest.
         
     Returns:
         email_messages (dict): keys and values match the email JSON file.
@@ -81,8 +301,20 @@ def create_project_reports_and_emails(authors_by_project_dict, publication_dict,
     email_messages = {"creation_date" : str(datetime.datetime.now())[0:16]}
     email_messages["emails"] = []
     
-    pubs_by_author_dict = create_pubs_by_author_dict(publication_dict)
+    if report_context is None:
+        report_context = create_report_context(publication_dict, authors_by_project_dict)
+    pubs_by_author_dict = report_context["pubs_by_author_dict"]
     
+    report_job_data = {"publication_dict":publication_dict, 
+                       "config_dict":config_dict, 
+                       "authors_by_project_dict":authors_by_project_dict, 
+                       "pubs_by_author_dict":pubs_by_author_dict, 
+                       "report_context":report_context}
+    
+    ## Each job creates and saves 1 report, and its email is None or the email with the attachment filled in after the job is ran.
+    jobs = []
+    filenames = []
+    emails = []
     for project, project_attributes in config_dict["project_descriptions"].items():
         
         if "project_report" in project_attributes:
@@ -105,25 +337,32 @@ def create_project_reports_and_emails(authors_by_project_dict, publication_dict,
                     else:
                         filename = project + "_project_report.xlsx"
                 
-                report, filename = create_tabular_project_report(publication_dict, config_dict, authors_by_project_dict, pubs_by_author_dict, project, report_attributes, save_dir_name, filename)
+                template = None
             
             else:
                 
                 template = report_attributes["template"] if "template" in report_attributes else DEFAULT_PROJECT_TEMPLATE
                 
                 filename = report_attributes["filename"] if "filename" in report_attributes else project + "_project_report.txt"
-                
-                report = create_project_report(publication_dict, config_dict, authors_by_project_dict, project, template)
-                fileio.save_string_to_file(save_dir_name, filename, report)
+            
+            job_args = (project, None, report_attributes, filename, template, "", "", save_dir_name)
+            if report_manifest is not None and \
+               reuse_previous_report(filename, _create_project_report_hash(report_job_data, *job_args[:-1]), save_dir_name, report_manifest, previous_report_manifest):
+                continue
+            
+            jobs.append((_create_project_report_job, job_args))
+            filenames.append(filename)
             
             if "from_email" in report_attributes:
-                email_messages["emails"].append({"body":report_attributes["email_body"],
-                                                 "subject":report_attributes["email_subject"],
-                                                 "from":report_attributes["from_email"],
-                                                 "to":",".join([email for email in report_attributes["to_email"]]),
-                                                 "cc":",".join([email for email in report_attributes["cc_email"]]) if "cc_email" in report_attributes else "",
-                                                 "attachment":report,
-                                                 "attachment_filename": filename})
+                emails.append({"body":report_attributes["email_body"],
+                               "subject":report_attributes["email_subject"],
+                               "from":report_attributes["from_email"],
+                               "to":",".join([email for email in report_attributes["to_email"]]),
+                               "cc":",".join([email for email in report_attributes["cc_email"]]) if "cc_email" in report_attributes else "",
+                               "attachment":None,
+                               "attachment_filename":None})
+            else:
+                emails.append(None)
             
         else:
             ## If authors is in project send an email to each author in the project.
@@ -148,31 +387,212 @@ def create_project_reports_and_emails(authors_by_project_dict, publication_dict,
                         else:
                             filename = project + "_" + author + "_project_report.xlsx"
                     
-                    report, filename = create_tabular_project_report(publication_dict, config_dict, {project:{author:authors_by_project_dict[project][author]}}, pubs_by_author_dict, project, report_attributes, save_dir_name, filename)
+                    template = None
+                    author_first, author_last = "", ""
                 
                 else:
                     template = report_attributes["template"] if "template" in report_attributes else DEFAULT_AUTHOR_TEMPLATE
                     
                     filename = report_attributes["filename"] if "filename" in report_attributes else project + "_" + author + "_project_report.txt"
                     
-                    report = create_project_report(publication_dict, config_dict, {project:{author:authors_by_project_dict[project][author]}}, project, template, config_dict["Authors"][author]["first_name"], config_dict["Authors"][author]["last_name"])
-                    fileio.save_string_to_file(save_dir_name, filename, report)
+                    author_first, author_last = config_dict["Authors"][author]["first_name"], config_dict["Authors"][author]["last_name"]
+                
+                job_args = (project, author, report_attributes, filename, template, author_first, author_last, save_dir_name)
+                if report_manifest is not None and \
+                   reuse_previous_report(filename, _create_project_report_hash(report_job_data, *job_args[:-1]), save_dir_name, report_manifest, previous_report_manifest):
+                    continue
+                
+                jobs.append((_create_project_report_job, job_args))
+                filenames.append(filename)
                 
                 if "from_email" in report_attributes and "email" in authors_by_project_dict[project][author]:
-                    email_messages["emails"].append({"body":authors_by_project_dict[project][author]["project_report"]["email_body"],
-                                                     "subject":authors_by_project_dict[project][author]["project_report"]["email_subject"],
-                                                     "from":authors_by_project_dict[project][author]["project_report"]["from_email"],
-                                                     "to":authors_by_project_dict[project][author]["email"],
-                                                     "cc":",".join([email for email in authors_by_project_dict[project][author]["project_report"]["cc_email"]]) if "cc_email" in authors_by_project_dict[project][author]["project_report"] else "",
-                                                     "attachment": report,
-                                                     "attachment_filename": filename,
-                                                     "author":author})            
+                    emails.append({"body":authors_by_project_dict[project][author]["project_report"]["email_body"],
+                                   "subject":authors_by_project_dict[project][author]["project_report"]["email_subject"],
+                                   "from":authors_by_project_dict[project][author]["project_report"]["from_email"],
+                                   "to":authors_by_project_dict[project][author]["email"],
+                                   "cc":",".join([email for email in authors_by_project_dict[project][author]["project_report"]["cc_email"]]) if "cc_email" in authors_by_project_dict[project][author]["project_report"] else "",
+                                   "attachment":None,
+                                   "attachment_filename":None,
+                                   "author":author})
+                else:
+                    emails.append(None)
+    
+    for email, configured_filename, (report, filename) in zip(emails, filenames, _run_report_jobs(jobs, report_job_data, report_workers, filenames)):
+        record_saved_report(configured_filename, filename, save_dir_name, report_manifest)
+        if email is not None:
+            email["attachment"] = report
+            email["attachment_filename"] = filename
+            email_messages["emails"].append(email)
     
     return email_messages
 
 
 
-def create_project_report(publication_dict, config_dict, authors_by_project_dict, project_name, template_string=DEFAULT_PROJECT_TEMPLATE, author_first = "", author_last = ""):
+def _create_project_report_job(report_job_data, project, author, report_attributes, filename, template, author_first, author_last, save_dir_name):
+    """Create and save 1 project report for create_project_reports_and_emails.
+    
+    Args:
+        report_job_data (dict): the data shared by every report job, see _run_report_jobs.
+        project (str): name of the project.
+        author (str|None): the author the report is for, or None if the report is for the whole project.
+        report_attributes (dict): the project_report attributes from the project or author.
+        filename (str): filename to save the report as.
+        template (str|None): the template to build the report from, None if the report is tabular.
+        author_first (str): first name of the author to replace in the template.
+        author_last (str): last name of the author to replace in the template.
+        save_dir_name (str): directory to save the report in.
+        
+    Returns:
+        report (str): Either the text of the report or a relative filepath to where the Excel file is saved.
+        filename (str): Filename of the report. Made have had an .xlsx added to the end.
+    """
+    
+    authors_by_project_dict = report_job_data["authors_by_project_dict"]
+    if author is not None:
+        authors_by_project_dict = {project:{author:authors_by_project_dict[project][author]}}
+    
+    if template is None:
+        return create_tabular_project_report(report_job_data["publication_dict"], 
+                                             report_job_data["config_dict"], 
+                                             authors_by_project_dict, 
+                                             report_job_data["pubs_by_author_dict"], 
+                                             project, 
+                                             report_attributes, 
+                                             save_dir_name, 
+                                             filename, 
+                                             report_job_data["report_context"])
+    
+    report = create_project_report(report_job_data["publication_dict"], 
+                                   report_job_data["config_dict"], 
+                                   authors_by_project_dict, 
+                                   project, 
+                                   template, 
+                                   author_first, 
+                                   author_last, 
+                                   report_job_data["report_context"])
+    fileio.save_string_to_file(save_dir_name, filename, report)
+    
+    return report, filename
+
+
+
+def _create_project_report_hash(report_job_data, project, author, report_attributes, filename, template, author_first, author_last):
+    """Compute the hash of the inputs to 1 project report job, see _create_project_report_job.
+    
+    The report is fed by the project's config, the config for each author in the report, 
+    and the publications of those authors.
+    
+    Args:
+        report_job_data (dict): the data shared by every report job, see _run_report_jobs.
+        project (str): name of the project.
+        author (str|None): the author the report is for, or None if the report is for the whole project.
+        report_attributes (dict): the project_report attributes from the project or author.
+        filename (str): filename to save the report as.
+        template (str|None): the template to build the report from, None if the report is tabular.
+        author_first (str): first name of the author to replace in the template.
+        author_last (str): last name of the author to replace in the template.
+        
+    Returns:
+        (str): hex digest identifying the report's inputs.
+    """
+    
+    config_dict = report_job_data["config_dict"]
+    pubs_by_author_dict = report_job_data["pubs_by_author_dict"]
+    project_authors = report_job_data["authors_by_project_dict"][project]
+    if author is not None:
+        project_authors = {author:project_authors[author]}
+    
+    report_inputs = ["project_report", project, author, report_attributes, filename, template, author_first, author_last, 
+                     config_dict["project_descriptions"][project], 
+                     project_authors, 
+                     {project_author:config_dict["Authors"].get(project_author) for project_author in project_authors}]
+    pub_ids = {pub_id for project_author in project_authors if project_author in pubs_by_author_dict for pub_id in pubs_by_author_dict[project_author]}
+    
+    return create_report_hash(report_job_data["publication_dict"], pub_ids, report_inputs, report_job_data["report_context"])
+
+
+
+## The data shared by every report job in a report worker process, set by _init_report_worker.
+_report_job_data = {}
+
+def _init_report_worker(report_job_data):
+    """Keep the data shared by every report job in this worker process.
+    
+    Args:
+        report_job_data (dict): the data shared by every report job, see _run_report_jobs.
+    """
+    
+    global _report_job_data
+    _report_job_data = report_job_data
+
+
+
+def _run_report_job(job):
+    """Run a report job in a report worker process.
+    
+    Args:
+        job (tuple): (function, args) to call as function(report_job_data, *args).
+        
+    Returns:
+        (tuple): what the job's function returned.
+    """
+    
+    function, args = job
+    return function(_report_job_data, *args)
+
+
+
+def _run_report_jobs(jobs, report_job_data, report_workers=1, filenames=None):
+    """Run report jobs one after another or on a process pool.
+    
+    The read-only data every job needs is given to each worker process once when 
+    it starts, which is free when processes are forked, instead of with each job. 
+    Processes are only forked on Linux, other platforms use their default start method.
+    
+    Jobs that save their report to the same filename as another job are not ran 
+    on the pool. They are ran one after another in this process after the pool 
+    is done, so the last one is what is saved, the same as running every job in this process.
+    
+    Args:
+        jobs (list): (function, args) tuples, each is called as function(report_job_data, *args).
+        report_job_data (dict): {"publication_dict":dict, "config_dict":dict, "authors_by_project_dict":dict, 
+                                 "pubs_by_author_dict":dict, "report_context":dict|None}, 
+                                 collaborator report jobs also have "collaborators_by_author_dict":dict
+        report_workers (int): the number of processes to run jobs on, 1 runs them in this process.
+        filenames (list|None): the filename each job saves its report as, in the same order as jobs.
+        
+    Returns:
+        (list): what each job returned, in the same order as jobs.
+    """
+    
+    if report_workers <= 1 or len(jobs) <= 1:
+        return [function(report_job_data, *args) for function, args in jobs]
+    
+    filename_counts = collections.Counter(filenames) if filenames else {}
+    serial_indexes = [i for i, filename in enumerate(filenames) if filename_counts[filename] > 1] if filenames else []
+    serial_index_set = set(serial_indexes)
+    pool_indexes = [i for i in range(len(jobs)) if i not in serial_index_set]
+    
+    mp_context = multiprocessing.get_context("fork") if sys.platform.startswith("linux") else None
+    
+    results = [None] * len(jobs)
+    if pool_indexes:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(report_workers, len(pool_indexes)), 
+                                                    mp_context=mp_context, 
+                                                    initializer=_init_report_worker, 
+                                                    initargs=(report_job_data,)) as executor:
+            for i, result in zip(pool_indexes, executor.map(_run_report_job, [jobs[i] for i in pool_indexes])):
+                results[i] = result
+    
+    for i in serial_indexes:
+        function, args = jobs[i]
+        results[i] = function(report_job_data, *args)
+    
+    return results
+
+
+
+def create_project_report(publication_dict, config_dict, authors_by_project_dict, project_name, template_string=DEFAULT_PROJECT_TEMPLATE, author_first = "", author_last = "", report_context=None):
     """Create the project report for the project.
     
     The details of creating project reports are outlined in the documentation.
@@ -188,14 +608,15 @@ def create_project_report(publication_dict, config_dict, authors_by_project_dict
         template_string (str): Template used to create the project report.
         author_first (str): First name of the author. If not "" the report is assumed to be for 1 author.
         author_last (str): Last name of the author.
+        report_context (dict|None): the context created by create_report_context, one is created if None.
     
     Returns:
         template_string (str): The template_string with the appropriate tags replaced with relevant information.        
     """
     
-    project_authors = build_author_loop(publication_dict, config_dict, authors_by_project_dict, project_name, template_string)
+    project_authors = build_author_loop(publication_dict, config_dict, authors_by_project_dict, project_name, template_string, report_context)
     
-    template_string = re.sub(r"(?s)<author_loop>.*</author_loop>", project_authors, template_string)
+    template_string = emails_and_reports_helpers._replace_loop_block(template_string, "author_loop", project_authors)
     if author_first:
         template_string = template_string.replace("<author_first>", author_first)
         template_string = template_string.replace("<author_last>", author_last)
@@ -205,7 +626,7 @@ def create_project_report(publication_dict, config_dict, authors_by_project_dict
 
 
 
-def create_summary_report(publication_dict, config_dict, authors_by_project_dict, template_string=DEFAULT_SUMMARY_TEMPLATE):
+def create_summary_report(publication_dict, config_dict, authors_by_project_dict, template_string=DEFAULT_SUMMARY_TEMPLATE, report_context=None):
     """Create the summary report for the run.
     
     The details of creating summary reports are outlined in the documentation.
@@ -217,32 +638,36 @@ def create_summary_report(publication_dict, config_dict, authors_by_project_dict
         config_dict (dict): keys and values match the project tracking configuration JSON file.
         authors_by_project_dict (dict): keys are project names from the config file and values are pulled from config_dict["Authors"].
         template_string (str): Template used to create the project report.
+        report_context (dict|None): the context created by create_report_context, one is created if None.
     
     Returns:
         report_string (str): The report built by replacing the appropriate tags in template_string with relevant information.
     """
     
-    project_template = helper_functions.regex_group_return(helper_functions.regex_match_return(r"(?s).*<project_loop>(.*)</project_loop>.*", template_string), 0)
+    if report_context is None:
+        report_context = create_report_context(publication_dict, authors_by_project_dict)
+    
+    project_template = _get_loop_templates(report_context, template_string)["project_loop"]
     
-    report_string = ""
+    projects = []
     for project_name in config_dict["project_descriptions"]:
         project_template_copy = project_template
         
-        project_authors = build_author_loop(publication_dict, config_dict, authors_by_project_dict, project_name, template_string)
+        project_authors = build_author_loop(publication_dict, config_dict, authors_by_project_dict, project_name, template_string, report_context)
         
-        project_template_copy = re.sub(r"(?s)<author_loop>.*</author_loop>", project_authors, project_template_copy)
+        project_template_copy = emails_and_reports_helpers._replace_loop_block(project_template_copy, "author_loop", project_authors)
         project_template_copy = project_template_copy.replace("<project_name>", project_name)
         
-        report_string += project_template_copy
+        projects.append(project_template_copy)
     
-    report_string = re.sub(r"(?s)<project_loop>.*</project_loop>", report_string, template_string)
+    report_string = emails_and_reports_helpers._replace_loop_block(template_string, "project_loop", "".join(projects))
         
     return report_string
 
 
 
 
-def build_author_loop(publication_dict, config_dict, authors_by_project_dict, project_name, template_string):
+def build_author_loop(publication_dict, config_dict, authors_by_project_dict, project_name, template_string, report_context=None):
     """Replace tags in template_string with the appropriate information.
     
     Args:
@@ -251,50 +676,64 @@ def build_author_loop(publication_dict, config_dict, authors_by_project_dict, pr
         authors_by_project_dict (dict): keys are project names from the config file and values are pulled from config_dict["Authors"].
         project_name (str): The name of the project.
         template_string (str): Template used to create the project report.
+        report_context (dict|None): the context created by create_report_context, one is created if None.
         
     Returns:
         project_authors (str): The string built by looping over the authors in authors_by_project_dict and using the template_string to build a report.
     """
     
-    pubs_by_author_dict = create_pubs_by_author_dict(publication_dict)
-    
-    author_template = helper_functions.regex_group_return(helper_functions.regex_match_return(r"(?s).*<author_loop>(.*)</author_loop>.*", template_string), 0)
-    pub_template = helper_functions.regex_group_return(helper_functions.regex_match_return(r"(?s).*<pub_loop>(.*)</pub_loop>.*", template_string), 0)
-    pub_author_template = helper_functions.regex_group_return(helper_functions.regex_match_return(r"(?s).*<pub_author_loop>(.*)</pub_author_loop>.*", template_string), 0)
-    reference_template = helper_functions.regex_group_return(helper_functions.regex_match_return(r"(?s).*<reference_loop>(.*)</reference_loop>.*", template_string), 0)
-    
-    project_authors = ""
+    if report_context is None:
+        report_context = create_report_context(publication_dict, authors_by_project_dict)
+    pubs_by_author_dict = report_context["pubs_by_author_dict"]
+    
+    loop_templates = _get_loop_templates(report_context, template_string)
+    author_template = loop_templates["author_loop"]
+    pub_template = loop_templates["pub_loop"]
+    pub_author_template = loop_templates["pub_author_loop"]
+    reference_template = loop_templates["reference_loop"]
+    
+    ## The pub and author templates have other loops spliced into them before their keywords are replaced, 
+    ## so they are split after splicing rather than compiled once.
+    ## Author keywords are only replaced after the pubs are spliced into the author 
+    ## template, so a rendered pub_loop only depends on the template and the pub and 
+    ## can be reused for every author and project the pub is under.
+    pub_fragments = report_context["pub_fragments"]
+    project_authors = []
     for author in authors_by_project_dict[project_name]:
         if not author in pubs_by_author_dict:
             continue
         author_template_copy = author_template
         
-        authors_pubs = ""
+        authors_pubs = []
         for pub in pubs_by_author_dict[author]:
-            pub_template_copy = pub_template
-            
-            pub_template_copy = emails_and_reports_helpers._replace_pub_author_and_reference_loops(publication_dict, 
-                                                                                                   pub, 
-                                                                                                   pub_template_copy, 
-                                                                                                   pub_author_template, 
-                                                                                                   reference_template)
+            if (template_string, pub) not in pub_fragments:
+                pub_template_copy = pub_template
+                
+                pub_template_copy = emails_and_reports_helpers._replace_pub_author_and_reference_loops(publication_dict, 
+                                                                                                       pub, 
+                                                                                                       pub_template_copy, 
+                                                                                                       pub_author_template, 
+                                                                                                       reference_template)
+                
+                pub_template_copy = emails_and_reports_helpers._render_template_string(emails_and_reports_helpers._split_template_string(pub_template_copy), 
+                                                                                       publication_dict, 
+                                                                                       config_dict, 
+                                                                                       pub=pub, 
+                                                                                       pub_keyword_replacements=report_context["pub_keyword_replacements"])
+                pub_fragments[(template_string, pub)] = pub_template_copy
             
-            pub_template_copy = emails_and_reports_helpers._replace_keywords({"1":pub_template_copy}, 
-                                                                             publication_dict, 
-                                                                             config_dict, 
-                                                                             pub=pub)["1"]                    
-            authors_pubs += pub_template_copy
-        
-        author_template_copy = re.sub(r"(?s)<pub_loop>.*</pub_loop>", authors_pubs, author_template_copy)
-        author_template_copy = emails_and_reports_helpers._replace_keywords({"1":author_template_copy}, publication_dict, config_dict, author=author)["1"]
+            authors_pubs.append(pub_fragments[(template_string, pub)])
+        
+        author_template_copy = emails_and_reports_helpers._replace_loop_block(author_template_copy, "pub_loop", "".join(authors_pubs))
+        author_template_copy = emails_and_reports_helpers._render_template_string(emails_and_reports_helpers._split_template_string(author_template_copy), publication_dict, config_dict, author=author)
             
-        project_authors += author_template_copy
+        project_authors.append(author_template_copy)
         
-    return project_authors
+    return "".join(project_authors)
 
 
 
-def create_tabular_collaborator_report(publication_dict, config_dict, author, pubs, filename, file_format, save_dir_name):
+def create_tabular_collaborator_report(publication_dict, config_dict, author, pubs, filename, file_format, save_dir_name, collaborators=None):
     """Create a table for a collaborator report and save as either csv or xlsx.
     
     Args:
@@ -305,6 +744,7 @@ def create_tabular_collaborator_report(publication_dict, config_dict, author, pu
         filename (str): filename to save the publication under.
         file_format (str): csv or xlsx, determines what format to save in.
         save_dir_name (str): directory to save the report in.
+        collaborators (list|None): the author's unique collaborators from create_collaborators_by_author_dict, found from pubs if None.
         
     Returns:
         report (str): The text of the report, empty string, or path to the saved xlsx file.
@@ -338,26 +778,15 @@ def create_tabular_collaborator_report(publication_dict, config_dict, author, pu
         sort = default_sort
         column_order = default_order
     
-    authors_already_added = []
+    compiled_columns = emails_and_reports_helpers.compile_template(columns)
     
-    collaborators = []
-    for pub in pubs:
-        for pub_author in publication_dict[pub]["authors"]:
-            
-            if ("author_id" in pub_author and pub_author["author_id"] == author) or pub_author in authors_already_added:
-                continue
-            
-            temp_dict = {}
-            for column_name, value in columns.items():
-                for keyword, pub_author_key in pub_authors_keyword_map.items():
-                    value = value.replace(keyword, str(pub_author[pub_author_key]) if pub_author_key in pub_author else "None")
-                temp_dict[column_name] = value
-                
-            collaborators.append(temp_dict)
-            authors_already_added.append(pub_author)
+    if collaborators is None:
+        collaborators = create_collaborators_by_author_dict(publication_dict, {author:pubs})[author]
+    
+    rows = (emails_and_reports_helpers._render_template(compiled_columns, publication_dict, {}, pub_author=pub_author) for pub_author in collaborators)
     
     
-    report, filename = emails_and_reports_helpers._save_rows_to_file(collaborators, 
+    report, filename = emails_and_reports_helpers._save_rows_to_file(rows, 
                                                                      filename, 
                                                                      sort, 
                                                                      column_order, 
@@ -370,7 +799,7 @@ def create_tabular_collaborator_report(publication_dict, config_dict, author, pu
 
 
 
-def create_collaborator_report(publication_dict, template, author, pubs, filename, save_dir_name):
+def create_collaborator_report(publication_dict, template, author, pubs, filename, save_dir_name, collaborators=None):
     """Create a collaborator report from a formatted string.
     
     Loop over all of the author's publications and create a 
@@ -381,33 +810,22 @@ def create_collaborator_report(publication_dict, template, author, pubs, filenam
         pubs (dict): Keys are publications for the author and values are the grants associated with that pub.
         filename (str): filename to save the publication under.
         save_dir_name (str): directory to save the report in.
+        collaborators (list|None): the author's unique collaborators from create_collaborators_by_author_dict, found from pubs if None.
         
     Returns:
         report (str): The text of the report or an empty string.
     """
     
-    authors_already_added = []
+    if collaborators is None:
+        collaborators = create_collaborators_by_author_dict(publication_dict, {author:pubs})[author]
     
-    pub_author_template = helper_functions.regex_group_return(helper_functions.regex_match_return(r"(?s).*<pub_author_loop>(.*)</pub_author_loop>.*", template), 0)
+    pub_author_template = helper_functions.regex_group_return(helper_functions.regex_match_return(helper_functions.REGEXES["pub_author_loop"], template), 0)
+    compiled_pub_author_template = emails_and_reports_helpers.compile_template_string(pub_author_template)
     
-    report = ""
-    for pub in pubs:
-        for pub_author in publication_dict[pub]["authors"]:
-            
-            if ("author_id" in pub_author and pub_author["author_id"] == author) or pub_author in authors_already_added:
-                continue
-            
-            pub_author_template_copy = pub_author_template
-            
-            for keyword, pub_author_key in pub_authors_keyword_map.items():
-                pub_author_template_copy = pub_author_template_copy.replace(keyword, str(pub_author[pub_author_key]) if pub_author_key in pub_author else "None")
-                
-            report += pub_author_template_copy
-            
-            authors_already_added.append(pub_author)
-            
+    report = "".join([emails_and_reports_helpers._render_template_string(compiled_pub_author_template, publication_dict, {}, pub_author=pub_author) 
+                      for pub_author in collaborators])
     if report:
-        report = re.sub(r"(?s)<pub_author_loop>.*</pub_author_loop>", report, template)
+        report = emails_and_reports_helpers._replace_loop_block(template, "pub_author_loop", report)
         fileio.save_string_to_file(save_dir_name, filename, report)
     
     return report
@@ -416,27 +834,41 @@ def create_collaborator_report(publication_dict, template, author, pubs, filenam
 
 
 
-def create_collaborators_reports_and_emails(publication_dict, config_dict, save_dir_name):
+def create_collaborators_reports_and_emails(publication_dict, config_dict, save_dir_name, report_context=None, report_workers=1, 
+                                            report_manifest=None, previous_report_manifest=None):
     """Create a report of collaborators for authors in publication_dict.
     
     For each author in publication_dict with an author_id create a csv file with 
-    the other authors on their publicaitons.
+    the other authors on their publicaitons. If report_workers is more than 1, the 
+    reports are created on a process pool, but the emails are still in the same 
+    order as creating them one at a time. If report_manifest is given, each report 
+    is added to it, and reports with the same inputs as in previous_report_manifest 
+    are copied from the previous run instead of being created again, and aren't emailed.
     
     Args:
         publication_dict (dict): keys and values match the publications JSON file.
         config_dict (dict): keys and values match the project tracking configuration JSON file.
         save_dir_name (str): directory to save the reports in.
+        report_context (dict|None): the context created by create_report_context, if None pubs_by_author_dict is built from publication_dict.
+        report_workers (int): the number of processes to create reports with.
+        report_manifest (dict|None): {"reports":{}} to add the reports to, see reuse_previous_report.
+        previous_report_manifest (dict|None): the manifest from fileio.read_previous_report_manifest.
         
     Returns:
         email_messages (dict): keys and values match the email JSON file.
     """
 
-    pubs_by_author_dict = create_pubs_by_author_dict(publication_dict)
+    pubs_by_author_dict = report_context["pubs_by_author_dict"] if report_context else create_pubs_by_author_dict(publication_dict)
     
     # dict for email messages.
     email_messages = {"creation_date" : str(datetime.datetime.now())[0:16]}
     email_messages["emails"] = []
     
+    ## Each job creates and saves 1 report, and its email is None or the email with the attachment filled in after the job is ran.
+    jobs = []
+    filenames = []
+    emails = []
+    report_authors = {}
     for author, pubs in pubs_by_author_dict.items():
         
         ## Skip if the author isn't in the config dict or if the author doesn't have a collaborator report.
@@ -447,14 +879,13 @@ def create_collaborators_reports_and_emails(publication_dict, config_dict, save_
         
         
         if "template" in config_dict["Authors"][author]["collaborator_report"]:
-            template = config_dict["Authors"][author]["collaborator_report"]["template"]
             
             if "filename" in config_dict["Authors"][author]["collaborator_report"]:
                 filename = config_dict["Authors"][author]["collaborator_report"]["filename"]
             else:
                 filename = author + "_collaborators.txt"
-                
-            report = create_collaborator_report(publication_dict, template, author, pubs, filename, save_dir_name)
+            
+            file_format = None
         
         else:
         
@@ -470,47 +901,100 @@ def create_collaborators_reports_and_emails(publication_dict, config_dict, save_
                     filename = author + "_collaborators.csv"
                 else:
                     filename = author + "_collaborators.xlsx"
-                    
-            report, filename = create_tabular_collaborator_report(publication_dict, config_dict, author, pubs, filename, file_format, save_dir_name)
-            
         
-        if report:
-            if "from_email" in config_dict["Authors"][author]["collaborator_report"]:
-                if "to_email" in config_dict["Authors"][author]["collaborator_report"]:
-                    to_email = config_dict["Authors"][author]["collaborator_report"]["to_email"]
-                else:
-                    to_email = config_dict["Authors"][author]["email"] if "email" in config_dict["Authors"][author] else ""
-                
-                if to_email:
-                    email_messages["emails"].append({"body":config_dict["Authors"][author]["collaborator_report"]["email_body"],
-                                                     "subject":config_dict["Authors"][author]["collaborator_report"]["email_subject"],
-                                                     "from":config_dict["Authors"][author]["collaborator_report"]["from_email"],
-                                                     "to":to_email,
-                                                     "cc":",".join([email for email in config_dict["Authors"][author]["collaborator_report"]["cc_email"]]) if "cc_email" in config_dict["Authors"][author]["collaborator_report"] else "",
-                                                     "attachment": report,
-                                                     "attachment_filename": filename,
-                                                     "author":author})
+        if report_manifest is not None:
+            report_inputs = ["collaborator_report", author, filename, file_format, config_dict["Authors"][author]]
+            if reuse_previous_report(filename, create_report_hash(publication_dict, pubs, report_inputs, report_context), save_dir_name, report_manifest, previous_report_manifest):
+                continue
+        
+        jobs.append((_create_collaborator_report_job, (author, filename, file_format, save_dir_name)))
+        filenames.append(filename)
+        report_authors[author] = pubs
+        
+        email = None
+        if "from_email" in config_dict["Authors"][author]["collaborator_report"]:
+            if "to_email" in config_dict["Authors"][author]["collaborator_report"]:
+                to_email = config_dict["Authors"][author]["collaborator_report"]["to_email"]
+            else:
+                to_email = config_dict["Authors"][author]["email"] if "email" in config_dict["Authors"][author] else ""
+            
+            if to_email:
+                email = {"body":config_dict["Authors"][author]["collaborator_report"]["email_body"],
+                         "subject":config_dict["Authors"][author]["collaborator_report"]["email_subject"],
+                         "from":config_dict["Authors"][author]["collaborator_report"]["from_email"],
+                         "to":to_email,
+                         "cc":",".join([email for email in config_dict["Authors"][author]["collaborator_report"]["cc_email"]]) if "cc_email" in config_dict["Authors"][author]["collaborator_report"] else "",
+                         "attachment":None,
+                         "attachment_filename":None,
+                         "author":author}
+        emails.append(email)
+    
+    ## The collaborators of every author with a report are found before any report is made.
+    report_job_data = {"publication_dict":publication_dict, 
+                       "config_dict":config_dict, 
+                       "authors_by_project_dict":None, 
+                       "pubs_by_author_dict":pubs_by_author_dict, 
+                       "collaborators_by_author_dict":create_collaborators_by_author_dict(publication_dict, report_authors), 
+                       "report_context":report_context}
+    
+    for email, configured_filename, (report, filename) in zip(emails, filenames, _run_report_jobs(jobs, report_job_data, report_workers, filenames)):
+        record_saved_report(configured_filename, filename, save_dir_name, report_manifest)
+        if report and email is not None:
+            email["attachment"] = report
+            email["attachment_filename"] = filename
+            email_messages["emails"].append(email)
         
     return email_messages
+
+
+
+def _create_collaborator_report_job(report_job_data, author, filename, file_format, save_dir_name):
+    """Create and save 1 collaborator report for create_collaborators_reports_and_emails.
+    
+    Args:
+        report_job_data (dict): the data shared by every report job, see _run_report_jobs.
+        author (str): the key to the author in config_dict["Authors"].
+        filename (str): filename to save the report as.
+        file_format (str|None): csv or xlsx for tabular reports, None if the report is built from the author's template.
+        save_dir_name (str): directory to save the report in.
+        
+    Returns:
+        report (str): The text of the report, empty string, or path to the saved xlsx file.
+        filename (str): Filename of the report. Made have had an .xlsx added to the end.
+    """
+    
+    publication_dict = report_job_data["publication_dict"]
+    config_dict = report_job_data["config_dict"]
+    pubs = report_job_data["pubs_by_author_dict"][author]
+    collaborators = report_job_data["collaborators_by_author_dict"][author]
+    
+    if file_format is None:
+        template = config_dict["Authors"][author]["collaborator_report"]["template"]
+        return create_collaborator_report(publication_dict, template, author, pubs, filename, save_dir_name, collaborators), filename
+    
+    return create_tabular_collaborator_report(publication_dict, config_dict, author, pubs, filename, file_format, save_dir_name, collaborators)
         
 
 
 
-def create_tabular_summary_report(publication_dict, config_dict, authors_by_project_dict, save_dir_name):
-    """Create a pandas DataFrame and save it as Excel or CSV.
+def create_tabular_summary_report(publication_dict, config_dict, authors_by_project_dict, save_dir_name, report_context=None):
+    """Build the report rows and save them as Excel or CSV.
     
     Args:
         publication_dict (dict): keys and values match the publications JSON file.
         config_dict (dict): keys and values match the project tracking configuration JSON file.
         authors_by_project_dict (dict): keys are project names from the config file and values are pulled from config_dict["Authors"].
         save_dir_name (str): directory to save the report in.
+        report_context (dict|None): the context created by create_report_context, one is created if None.
         
     Returns:
         report (str): Either the text of the report if csv or a relative filepath to where the Excel file is saved.
         filename (str): Filename of the report. Made have had an .xlsx added to the end.
     """
     
-    pubs_by_author_dict = create_pubs_by_author_dict(publication_dict)
+    if report_context is None:
+        report_context = create_report_context(publication_dict, authors_by_project_dict)
+    pubs_by_author_dict = report_context["pubs_by_author_dict"]
         
     row_template = copy.deepcopy(config_dict["summary_report"]["columns"])
     
@@ -540,9 +1024,8 @@ def create_tabular_summary_report(publication_dict, config_dict, authors_by_proj
         filename = "summary_report.csv" if file_format == "csv" else "summary_report.xlsx"
     
     
-    rows = []
-    for project_name, project_attributes in config_dict["project_descriptions"].items():
-        rows += _build_report_rows(publication_dict, config_dict, authors_by_project_dict, pubs_by_author_dict, row_template, project_name)
+    rows = itertools.chain.from_iterable(_iter_report_rows(publication_dict, config_dict, authors_by_project_dict, pubs_by_author_dict, row_template, project_name, report_context)
+                                         for project_name in config_dict["project_descriptions"])
                 
     report, filename = emails_and_reports_helpers._save_rows_to_file(rows, 
                                                                      filename, 
@@ -556,8 +1039,8 @@ def create_tabular_summary_report(publication_dict, config_dict, authors_by_proj
 
 
 
-def create_tabular_project_report(publication_dict, config_dict, authors_by_project_dict, pubs_by_author_dict, project_name, report_attributes, save_dir_name, filename):
-    """Create a pandas DataFrame and save it as Excel or CSV.
+def create_tabular_project_report(publication_dict, config_dict, authors_by_project_dict, pubs_by_author_dict, project_name, report_attributes, save_dir_name, filename, report_context=None):
+    """Build the report rows and save them as Excel or CSV.
     
     Args:
         publication_dict (dict): keys and values match the publications JSON file.
@@ -568,6 +1051,7 @@ def create_tabular_project_report(publication_dict, config_dict, authors_by_proj
         report_attributes (dict): Dictionary of the report attributes. Could come from project_descriptions or an author.
         save_dir_name (str): directory to save the report in.
         filename (str): Filename of the report.
+        report_context (dict|None): the context created by create_report_context, only used to reuse publication keyword replacements.
         
     Returns:
         report (str): Either the text of the report if csv or a relative filepath to where the Excel file is saved.
@@ -585,7 +1069,7 @@ def create_tabular_project_report(publication_dict, config_dict, authors_by_proj
     file_format = report_attributes["file_format"] if "file_format" in report_attributes else "csv"    
                         
     
-    rows = _build_report_rows(publication_dict, config_dict, authors_by_project_dict, pubs_by_author_dict, row_template, project_name)
+    rows = _iter_report_rows(publication_dict, config_dict, authors_by_project_dict, pubs_by_author_dict, row_template, project_name, report_context)
     
     report, filename = emails_and_reports_helpers._save_rows_to_file(rows, 
                                                                      filename, 
@@ -599,7 +1083,7 @@ def create_tabular_project_report(publication_dict, config_dict, authors_by_proj
                                 
 
 
-def _build_report_rows(publication_dict, config_dict, authors_by_project_dict, pubs_by_author_dict, row_template, project_name):
+def _build_report_rows(publication_dict, config_dict, authors_by_project_dict, pubs_by_author_dict, row_template, project_name, report_context=None):
     """Build the rows for a tabular report.
     
     Args:
@@ -609,11 +1093,36 @@ def _build_report_rows(publication_dict, config_dict, authors_by_project_dict, p
         pubs_by_author_dict (dict): dictionary where the keys are authors and the values are a dictionary of pub_ids with thier associated grants.
         row_template (list[dict]): list of dictionaries to base each row on, values are replaced based on input data.
         project_name (str): name of the project.
+        report_context (dict|None): the context created by create_report_context, only used to reuse publication keyword replacements.
     
     Returns:
         rows (list[dict]): list of dictionaries based on row_template with values replaced.
     """
     
+    return list(_iter_report_rows(publication_dict, config_dict, authors_by_project_dict, pubs_by_author_dict, row_template, project_name, report_context))
+
+
+
+def _iter_report_rows(publication_dict, config_dict, authors_by_project_dict, pubs_by_author_dict, row_template, project_name, report_context=None):
+    """Yield the rows for a tabular report as they are built.
+    
+    Args:
+        publication_dict (dict): keys and values match the publications JSON file.
+        config_dict (dict): keys and values match the project tracking configuration JSON file.
+        authors_by_project_dict (dict): keys are project names from the config file and values are pulled from config_dict["Authors"].
+        pubs_by_author_dict (dict): dictionary where the keys are authors and the values are a dictionary of pub_ids with thier associated grants.
+        row_template (list[dict]): list of dictionaries to base each row on, values are replaced based on input data.
+        project_name (str): name of the project.
+        report_context (dict|None): the context created by create_report_context, only used to reuse publication keyword replacements.
+    
+    Yields:
+        row (dict): row_template with values replaced for the next row.
+    """
+    
+    pub_keyword_replacements = report_context["pub_keyword_replacements"] if report_context else None
+    
+    compiled_row_template = emails_and_reports_helpers.compile_template(row_template)
+    
     row_string = "".join(row_template.values())
     
     has_pub_keywords = True if any([pub_keyword in row_string for pub_keyword in pub_keywords]) else False
@@ -626,7 +1135,6 @@ def _build_report_rows(publication_dict, config_dict, authors_by_project_dict, p
     if any([reference_keyword in row_string for reference_keyword in references_keyword_map.keys()]):
         has_reference_keywords = True
     
-    rows = []
     for author, author_attributes in authors_by_project_dict[project_name].items():
         if not author in pubs_by_author_dict:
             continue
@@ -634,25 +1142,24 @@ def _build_report_rows(publication_dict, config_dict, authors_by_project_dict, p
         if has_reference_keywords or has_pub_author_keywords or has_pub_keywords:
             for pub in pubs_by_author_dict[author]:
                 
-                rows += emails_and_reports_helpers._build_pub_author_and_reference_rows(publication_dict, 
-                                                                                        config_dict, 
-                                                                                        has_pub_author_keywords, 
-                                                                                        has_reference_keywords,
-                                                                                        row_template, 
-                                                                                        project_name, 
-                                                                                        author, 
-                                                                                        pub, 
-                                                                                        None, 
-                                                                                        None)
+                yield from emails_and_reports_helpers._iter_pub_author_and_reference_rows(publication_dict, 
+                                                                                          config_dict, 
+                                                                                          has_pub_author_keywords, 
+                                                                                          has_reference_keywords,
+                                                                                          compiled_row_template, 
+                                                                                          project_name, 
+                                                                                          author, 
+                                                                                          pub, 
+                                                                                          None, 
+                                                                                          None, 
+                                                                                          pub_keyword_replacements)
                                     
         else:
-            rows.append(emails_and_reports_helpers._replace_keywords(row_template, 
-                                                                     publication_dict, 
-                                                                     config_dict, 
-                                                                     project_name, 
-                                                                     author))
-    
-    return rows
+            yield emails_and_reports_helpers._render_template(compiled_row_template, 
+                                                              publication_dict, 
+                                                              config_dict, 
+                                                              project_name, 
+                                                              author)
 
 
 
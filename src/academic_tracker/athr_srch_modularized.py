@@ -6,7 +6,6 @@ Author Search Modularized
 Modularized pieces of author_search.
 """
 import sys
-import re
 import datetime
 import os
 
@@ -154,14 +153,21 @@ def build_publication_dict(config_dict, prev_pubs, no_ORCID, no_GoogleScholar, n
 
 
 
-def save_and_send_reports_and_emails(authors_by_project_dict, publication_dict, config_dict, test):
+def save_and_send_reports_and_emails(authors_by_project_dict, publication_dict, config_dict, test, report_workers=1, incremental_reports=False):
     """Build the summary report and project reports and email them.
     
+    A manifest with a hash of the inputs to each report is saved with the reports. 
+    If incremental_reports is True, reports whose inputs are the same as in the 
+    manifest of the previous run are copied from that run's directory instead of 
+    being built again, and they are not emailed again.
+    
     Args:
         authors_by_project_dict (dict): Keys are project names and values are a dictionary of authors and their attributes.
         publication_dict (dict): The dictionary matching the publication JSON schema.
         config_dict (dict): Matches the Configuration file JSON schema.
         test (bool): If True save_dir_name is tracker-test instead of tracker- and emails are not sent.
+        report_workers (int): the number of processes to create project and collaborator reports with.
+        incremental_reports (bool): If True only build and email reports whose inputs changed since the previous run.
         
     Returns:
         save_dir_name (str): Name of the directory where the emails and reports were saved.
@@ -169,43 +175,69 @@ def save_and_send_reports_and_emails(authors_by_project_dict, publication_dict,
     
     ## Build the save directory name.
     if test:
-        save_dir_name = "tracker-test-" + re.sub(r"\-| |\:", "", str(datetime.datetime.now())[2:16])
+        save_dir_name = "tracker-test-" + helper_functions.REGEXES["timestamp_separators"].sub("", str(datetime.datetime.now())[2:16])
     else:
-        save_dir_name = "tracker-" + re.sub(r"\-| |\:", "", str(datetime.datetime.now())[2:16])
+        save_dir_name = "tracker-" + helper_functions.REGEXES["timestamp_separators"].sub("", str(datetime.datetime.now())[2:16])
     os.mkdir(save_dir_name)
         
     
-    email_messages = athr_srch_emails_and_reports.create_project_reports_and_emails(authors_by_project_dict, publication_dict, config_dict, save_dir_name)
-    email_messages["emails"] = email_messages["emails"] + athr_srch_emails_and_reports.create_collaborators_reports_and_emails(publication_dict, config_dict, save_dir_name)["emails"]
+    ## Everything the reports share is built once for all of them.
+    report_context = athr_srch_emails_and_reports.create_report_context(publication_dict, authors_by_project_dict)
+    
+    report_manifest = {"reports":{}}
+    previous_report_manifest = fileio.read_previous_report_manifest(save_dir_name) if incremental_reports else None
+    
+    email_messages = athr_srch_emails_and_reports.create_project_reports_and_emails(authors_by_project_dict, publication_dict, config_dict, save_dir_name, report_context, report_workers, 
+                                                                                     report_manifest, previous_report_manifest)
+    email_messages["emails"] = email_messages["emails"] + athr_srch_emails_and_reports.create_collaborators_reports_and_emails(publication_dict, config_dict, save_dir_name, report_context, report_workers, 
+                                                                                                                               report_manifest, previous_report_manifest)["emails"]
             
     if "summary_report" in config_dict:
         
         if "columns" in config_dict["summary_report"]:
-            summary_report, summary_filename = athr_srch_emails_and_reports.create_tabular_summary_report(publication_dict, config_dict, authors_by_project_dict, save_dir_name)
+            file_format = config_dict["summary_report"]["file_format"] if "file_format" in config_dict["summary_report"] else "csv"
+            default_filename = "summary_report.csv" if file_format == "csv" else "summary_report.xlsx"
+            template = None
         
         else:
             if "template" in config_dict["summary_report"]:
                 template = config_dict["summary_report"]["template"]
             else:
                 template = athr_srch_emails_and_reports.DEFAULT_SUMMARY_TEMPLATE
-                
-            if "filename" in config_dict["summary_report"]:
-                summary_filename = config_dict["summary_report"]["filename"]
-            else:
-                summary_filename = "summary_report.txt"
+            default_filename = "summary_report.txt"
             
-            summary_report = athr_srch_emails_and_reports.create_summary_report(publication_dict, config_dict, authors_by_project_dict, template)
-            fileio.save_string_to_file(save_dir_name, summary_filename, summary_report)
-        
-        if "from_email" in config_dict["summary_report"]:
-            email_messages["emails"].append({"to":",".join([email for email in config_dict["summary_report"]["to_email"]]),
-                                             "from":config_dict["summary_report"]["from_email"],
-                                             "cc":",".join([email for email in config_dict["summary_report"]["cc_email"]]) if "cc_email" in config_dict["summary_report"] else "",
-                                             "subject":config_dict["summary_report"]["email_subject"],
-                                             "body":config_dict["summary_report"]["email_body"],
-                                             "attachment":summary_report,
-                                             "attachment_filename": summary_filename})
+        if "filename" in config_dict["summary_report"]:
+            summary_filename = config_dict["summary_report"]["filename"]
+        else:
+            summary_filename = default_filename
+        
+        ## The summary report is fed by every project, every author, and every publication.
+        report_inputs = ["summary_report", config_dict["summary_report"], template, config_dict["project_descriptions"], config_dict["Authors"], authors_by_project_dict]
+        summary_hash = athr_srch_emails_and_reports.create_report_hash(publication_dict, publication_dict, report_inputs, report_context)
+        summary_is_reused = athr_srch_emails_and_reports.reuse_previous_report(summary_filename, summary_hash, save_dir_name, report_manifest, previous_report_manifest)
+        
+        if not summary_is_reused:
+            if template is None:
+                configured_filename = summary_filename
+                summary_report, summary_filename = athr_srch_emails_and_reports.create_tabular_summary_report(publication_dict, config_dict, authors_by_project_dict, save_dir_name, report_context)
+                athr_srch_emails_and_reports.record_saved_report(configured_filename, summary_filename, save_dir_name, report_manifest)
+        
+            else:
+                summary_report = athr_srch_emails_and_reports.create_summary_report(publication_dict, config_dict, authors_by_project_dict, template, report_context)
+                fileio.save_string_to_file(save_dir_name, summary_filename, summary_report)
+                athr_srch_emails_and_reports.record_saved_report(summary_filename, summary_filename, save_dir_name, report_manifest)
+        
+            if "from_email" in config_dict["summary_report"]:
+                email_messages["emails"].append({"to":",".join([email for email in config_dict["summary_report"]["to_email"]]),
+                                                 "from":config_dict["summary_report"]["from_email"],
+                                                 "cc":",".join([email for email in config_dict["summary_report"]["cc_email"]]) if "cc_email" in config_dict["summary_report"] else "",
+                                                 "subject":config_dict["summary_report"]["email_subject"],
+                                                 "body":config_dict["summary_report"]["email_body"],
+                                                 "attachment":summary_report,
+                                                 "attachment_filename": summary_filename})
             
+    fileio.save_report_manifest_to_file(save_dir_name, report_manifest)
+    
     if email_messages["emails"]:
         ## save email messages to file
         fileio.save_emails_to_file(email_messages, save_dir_name)
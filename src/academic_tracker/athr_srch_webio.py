@@ -27,6 +27,37 @@ DOI_URL = webio.DOI_URL
 PUBLICATION_TEMPLATE = webio.PUBLICATION_TEMPLATE
 
 
+
+def _prefilter_pub(pub_id, title, publication_year, cutoff_year, running_pubs, source, is_journal_article=True):
+    """Decide whether a queried publication needs a full pub_dict built for it.
+    
+    Only the ID, title, year, and type of the publication are used, so this can be done 
+    before the authors, references, grants, etc. are pulled out of the raw query result. 
+    Publications already in running_pubs are kept so missing information can be merged 
+    in, unless source has already been merged into them. Publications not in running_pubs 
+    are kept only if they are journal articles published in or after cutoff_year.
+    
+    Args:
+        pub_id (str): the ID of the publication (DOI, PMID, or URL).
+        title (str): the title of the publication.
+        publication_year (int|None): the year the publication was published, None if unknown.
+        cutoff_year (int): publications before this year are skipped.
+        running_pubs (dict): dictionary of publications matching the JSON schema for publications.
+        source (str): the name of the source being searched, "PubMed", "ORCID", "Google Scholar", or "Crossref".
+        is_journal_article (bool): whether the publication is a journal article.
+        
+    Returns:
+        matching_pub_id (str|None): the pub_id in running_pubs that matches the publication, None if there isn't one.
+        skip (bool): True if no pub_dict needs to be built for the publication.
+    """
+    
+    if matching_pub_id := helper_functions.get_pub_id_in_publication_dict(pub_id, title, running_pubs):
+        return matching_pub_id, source in running_pubs[matching_pub_id]["queried_sources"]
+    
+    return None, not is_journal_article or not publication_year or publication_year < cutoff_year
+
+
+
 ## TODO get with pymed and add grants and pmcid to PubMedArticle class.
 def search_PubMed_for_pubs(running_pubs, authors_json, from_email, prev_query=None):
     """Searhes PubMed for publications by each author.
@@ -69,25 +100,21 @@ def search_PubMed_for_pubs(running_pubs, authors_json, from_email, prev_query=No
                 continue
             all_pubs[author].append(pub)
             
+            ## Sometimes the publication_date can be None, pubs without one are skipped unless they are already in running_pubs.
+            publication_year = int(str(pub.publication_date)[:4]) if pub.publication_date else None
+            
+            ## Check the cheap fields first so the full pub_dict is only built for pubs that will be used.
+            matching_pub_id, skip = _prefilter_pub(helper_functions.get_PubMed_pub_id(pub), pub.title, publication_year, 
+                                                   author_attributes["cutoff_year"], running_pubs, "PubMed")
+            if skip:
+                continue
+            
             pub_id, pub_dict = helper_functions.create_pub_dict_for_saving_PubMed(pub)
             
-            if matching_pub_id := helper_functions.get_pub_id_in_publication_dict(pub_id, pub.title, running_pubs):
-                if "PubMed" in running_pubs[matching_pub_id]["queried_sources"]:
-                    continue
-                
+            if matching_pub_id:
                 helper_functions._merge_pub_dicts(running_pubs[matching_pub_id], pub_dict)
                 running_pubs[matching_pub_id]["queried_sources"].append("PubMed")
             else:
-                    
-                ## Sometimes the publication_date can be None, so just skip it.
-                if not pub.publication_date:
-                    continue
-                publication_date = int(str(pub.publication_date)[:4])
-                
-                ## if the publication date is before the cutoff year then skip.
-                if publication_date < author_attributes["cutoff_year"]:
-                    continue
-                
                 author_list = helper_functions.match_pub_authors_to_config_authors(authors_json, pub_dict["authors"])
         
                 ## If no authors were matched then go to the next publication. Note that this is not uncommon because PubMed returns publications for authors who were just colloborators.
@@ -209,6 +236,12 @@ def search_ORCID_for_pubs(running_pubs, ORCID_key, ORCID_secret, authors_json, p
             if title is None:
                 continue
             
+            matching_pub_id, skip = _prefilter_pub(pub_id, title, None if work_before_relevant_year else publication_year, 
+                                                   authors_attributes["cutoff_year"], running_pubs, "ORCID", 
+                                                   work_is_a_journal_article)
+            if skip:
+                continue
+            
             ## Pull out relevant information from ORCID.
             pub_dict = copy.deepcopy(PUBLICATION_TEMPLATE)
             if doi:
@@ -240,18 +273,11 @@ def search_ORCID_for_pubs(running_pubs, ORCID_key, ORCID_secret, authors_json, p
            
             
             ## If the publication is already in running_pubs then try to update missing information.
-            if matching_pub_id := helper_functions.get_pub_id_in_publication_dict(pub_id, title, running_pubs):
-                if "ORCID" in running_pubs[matching_pub_id]["queried_sources"]:
-                    continue
-                
+            if matching_pub_id:
                 helper_functions._merge_pub_dicts(running_pubs[matching_pub_id], pub_dict)
                 running_pubs[matching_pub_id]["queried_sources"].append("ORCID")
             
             else:
-            
-                if work_before_relevant_year or not work_is_a_journal_article or not publication_year:
-                    continue
-                    
                 pub_dict["queried_sources"] = ["ORCID"]
                 running_pubs[pub_id] = pub_dict
                 
@@ -310,8 +336,17 @@ def search_Google_Scholar_for_pubs(running_pubs, authors_json, mailto_email, pre
         for i, pub in enumerate(publications):
             all_pubs[author].append(pub)
             
-            ## Determine the pub_id
             title = pub["bib"]["title"]
+            publication_year = int(pub["bib"]["pub_year"]) if "pub_year" in pub["bib"] else None
+            
+            ## Publications out of the year range are skipped before looking for their DOI on Crossref, 
+            ## unless they match a publication another source found by title.
+            if (not publication_year or publication_year < authors_attributes["cutoff_year"]) and \
+               not helper_functions.get_pub_id_in_publication_dict("", title, running_pubs):
+                all_pubs[author][i]["doi"] = None
+                continue
+            
+            ## Determine the pub_id
             doi = webio.get_DOI_from_Crossref(title, mailto_email) if prev_query is None else pub["doi"]
             all_pubs[author][i]["doi"] = doi
             if doi:
@@ -330,9 +365,12 @@ def search_Google_Scholar_for_pubs(running_pubs, authors_json, mailto_email, pre
                 else:
                     continue
             
-            ## Build pub_dict
-            publication_year = int(pub["bib"]["pub_year"]) if "pub_year" in pub["bib"] else None
+            matching_pub_id, skip = _prefilter_pub(pub_id, title, publication_year, authors_attributes["cutoff_year"], 
+                                                   running_pubs, "Google Scholar")
+            if skip:
+                continue
             
+            ## Build pub_dict
             pub_dict = copy.deepcopy(PUBLICATION_TEMPLATE)
             if doi:
                 pub_dict["doi"] = doi
@@ -356,19 +394,11 @@ def search_Google_Scholar_for_pubs(running_pubs, authors_json, mailto_email, pre
             
             
             ## If the publication is already in running_pubs then try to update missing information.
-            if matching_pub_id := helper_functions.get_pub_id_in_publication_dict(pub_id, title, running_pubs):
-                if "Google Scholar" in running_pubs[matching_pub_id]["queried_sources"]:
-                    continue
-                
+            if matching_pub_id:
                 helper_functions._merge_pub_dicts(running_pubs[matching_pub_id], pub_dict)
                 running_pubs[matching_pub_id]["queried_sources"].append("Google Scholar")
             
             else:
-            
-                ## Check if the publication year is in range.
-                if not publication_year or publication_year < authors_attributes["cutoff_year"]:
-                    continue
-                
                 pub_dict["queried_sources"] = ["Google Scholar"]
                 running_pubs[pub_id] = pub_dict
                             
@@ -419,25 +449,25 @@ def search_Crossref_for_pubs(running_pubs, authors_json, mailto_email, prev_quer
         for work in publications:
             all_pubs[author].append(work)
             
-            pub_id, pub_dict = helper_functions.create_pub_dict_for_saving_Crossref(work, prev_query)
+            pub_id = helper_functions.get_Crossref_pub_id(work, prev_query)
             
             if pub_id is None:
                 continue
             
+            publication_date = helper_functions.get_Crossref_publication_date(work)
+            matching_pub_id, skip = _prefilter_pub(pub_id, work["title"][0], publication_date[0], authors_attributes["cutoff_year"], 
+                                                   running_pubs, "Crossref")
+            if skip:
+                continue
+            
+            pub_id, pub_dict = helper_functions.create_pub_dict_for_saving_Crossref(work, prev_query, pub_id, publication_date)
             
             ## If the publication is already in running_pubs then try to update missing information.
-            if matching_pub_id := helper_functions.get_pub_id_in_publication_dict(pub_id, pub_dict["title"], running_pubs):
-                if "Crossref" in running_pubs[matching_pub_id]["queried_sources"]:
-                    continue
-                
+            if matching_pub_id:
                 helper_functions._merge_pub_dicts(running_pubs[matching_pub_id], pub_dict)
                 running_pubs[matching_pub_id]["queried_sources"].append("Crossref")
             
             else:
-            
-                if not pub_dict["publication_date"]["year"] or pub_dict["publication_date"]["year"] < authors_attributes["cutoff_year"]:
-                    continue
-                
                 author_list = helper_functions.match_pub_authors_to_config_authors(authors_json, pub_dict["authors"])
                 ## If the author_list is empty then there were no matching authors, continue.
                 if not author_list:
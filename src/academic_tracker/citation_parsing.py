@@ -7,12 +7,66 @@ Functions for parsing citations.
 """
 
 import re
+import itertools
+import concurrent.futures
 
 import bs4
 
 from . import helper_functions
 
 
+## A known issue with these regexes is that authors with 2nd, 3rd, etc in thier name won't get picked up, but allowing numbers in causes too many false positives.      
+## The author group can't contain the character that starts what follows it, so a single whitespace character 
+## after it always matches the same as \s+ would, but doesn't make the regex retry every split of the whitespace.
+citation_style_regexes = {"MLA":re.compile(r"([^0-9!@#$%^*()[\]_+=\\|<>:;'\"{}`~/?]+)\s\"(.*)\"\s+(.*)"),
+                          "APA":re.compile(r"([^0-9!@#$%^*()[\]_+=\\|<>:;'\"{}`~/?]+)\s\(\d\d\d\d\)\.\s+([^\.]+)\.\s+(.*)"),
+                          "Chicago":re.compile(r"([^0-9!@#$%^*()[\]_+=\\|<>:;'\"{}`~/?]+)\s\"(.*)\"\s+(.*)"),
+                          "Harvard":re.compile(r"([^0-9!@#$%^*()[\]_+=\\|<>:;'\"{}`~/?]+)\s\d\d\d\d\.\s+([^\.]+)\.\s+(.*)"),
+                          "Vancouver":re.compile(r"([^0-9!@#$%^*()[\]_+=\\|<>:;'\"{}`~/?.]+)\.\s+([^\.]+)\.\s+(.*)")}
+
+## lxml is much faster than the builtin parser, but it isn't required, so only use it if it is installed.
+HTML_PARSER = "lxml" if bs4.builder.builder_registry.lookup("lxml") else "html.parser"
+
+## Only the citations need to be parsed on MyNCBI pages.
+MYNCBI_CITATION_STRAINER = bs4.SoupStrainer("div", class_ = "ncbi-docsum")
+
+## Number of lines to give each process when tokenizing in parallel.
+PARALLEL_CHUNK_SIZE = 2000
+
+## Cheap checks for the parts of the APA and Harvard regexes that have to be in a line for them to match.
+APA_year_regex = re.compile(r"\s\(\d\d\d\d\)\.\s")
+Harvard_year_regex = re.compile(r"\s\d\d\d\d\.\s")
+
+
+def _possible_citation_styles(line):
+    """Determine which citation styles could possibly match line.
+    
+    Each style's regex needs certain characters to be in the line to match, so these 
+    are checked first and the regexes are only tried for styles that pass. The styles 
+    are returned in the same order as citation_style_regexes. Chicago is never returned 
+    because its regex is the same as MLA's, so it can't match a line MLA didn't.
+    
+    Args:
+        line (str): line of text to check.
+        
+    Returns:
+        styles (list): the citation styles whose regexes could match line.
+    """
+    
+    styles = []
+    if line.count("\"") > 1:
+        styles.append("MLA")
+    
+    if line.count(".") > 1:
+        if APA_year_regex.search(line):
+            styles.append("APA")
+        if Harvard_year_regex.search(line):
+            styles.append("Harvard")
+        styles.append("Vancouver")
+    
+    return styles
+
+
 def parse_text_for_citations(text):
     """Parse text line by line and tokenize it.
     
@@ -28,12 +82,22 @@ def parse_text_for_citations(text):
         parsed_pubs (dict): the citations tokenized in a dictionary matching the tokenized citations JSON schema.  
     """
  
-## A known issue with these regexes is that authors with 2nd, 3rd, etc in thier name won't get picked up, but allowing numbers in causes too many false positives.      
-    regex_dict = {"MLA":r"([^0-9!@#$%^*()[\]_+=\\|<>:;'\"{}`~/?]+)\s+\"(.*)\"\s+(.*)",
-                  "APA":r"([^0-9!@#$%^*()[\]_+=\\|<>:;'\"{}`~/?]+)\s+\(\d\d\d\d\)\.\s+([^\.]+)\.\s+(.*)",
-                  "Chicago":r"([^0-9!@#$%^*()[\]_+=\\|<>:;'\"{}`~/?]+)\s+\"(.*)\"\s+(.*)",
-                  "Harvard":r"([^0-9!@#$%^*()[\]_+=\\|<>:;'\"{}`~/?]+)\s+\d\d\d\d\.\s+([^\.]+)\.\s+(.*)",
-                  "Vancouver":r"([^0-9!@#$%^*()[\]_+=\\|<>:;'\"{}`~/?.]+)\.\s+([^\.]+)\.\s+(.*)"}
+    return list(iter_text_citations(text.split("\n")))
+
+
+
+def iter_text_citations(lines):
+    """Tokenize lines of text one at a time and yield the citations as they are found.
+    
+    This is the streaming version of parse_text_for_citations, lines can be any 
+    iterable, such as an open file, and is only consumed as citations are requested.
+    
+    Args:
+        lines (iterable): the lines of text to parse, without newline characters.
+        
+    Yields:
+        (dict): the next citation tokenized in a dictionary matching the tokenized citations JSON schema.  
+    """
     
     tokenize_function_dict = {"MLA":tokenize_MLA_or_Chicago_authors,
                               "APA":tokenize_APA_or_Harvard_authors,
@@ -41,12 +105,9 @@ def parse_text_for_citations(text):
                               "Harvard":tokenize_APA_or_Harvard_authors,
                               "Vancouver":tokenize_Vancouver_authors}
         
-    parsed_pubs = []
-    
-    lines = text.split("\n")
-    for count, line in enumerate(lines):
-        for citation_style, regex in regex_dict.items():
-            groups = helper_functions.regex_match_return(regex, line)
+    for line in lines:
+        for citation_style in _possible_citation_styles(line):
+            groups = helper_functions.regex_match_return(citation_style_regexes[citation_style], line)
             if groups:
                 authors = groups[0].strip()
                 ## Sanity check to make sure we are looking at author names separated by commas and not a sentence with a comma in it.
@@ -60,23 +121,21 @@ def parse_text_for_citations(text):
                 
                 tokenized_authors = tokenize_function_dict[citation_style](authors)
                 
-                match = helper_functions.regex_match_return(r"(?i).*pmid:\s*(\d+).*", tail)
+                match = helper_functions.regex_match_return(helper_functions.REGEXES["pmid_in_text"], tail)
                 pmid = match[0] if match else None
                 
-                match = helper_functions.regex_match_return(r"(?i).*doi:\s*([^\s]+\w).*", tail)
+                match = helper_functions.regex_match_return(helper_functions.REGEXES["doi_in_text"], tail)
                 if match:
                     doi = match[0].lower()
                     if "doi.org" in doi:
-                        match = helper_functions.regex_match_return(r".*doi.org/(.*)", doi)
+                        match = helper_functions.regex_match_return(helper_functions.REGEXES["doi_org_suffix"], doi)
                         if match:
                             doi = match[0]
                 else:
                     doi = None
                             
-                parsed_pubs.append({"authors":tokenized_authors, "title":title, "PMID":pmid, "DOI":doi, "reference_line":line.strip(), "pub_dict_key":""})
+                yield {"authors":tokenized_authors, "title":title, "PMID":pmid, "DOI":doi, "reference_line":line.strip(), "pub_dict_key":""}
                 break
-            
-    return parsed_pubs
 
 
 
@@ -127,7 +186,7 @@ def tokenize_MLA_or_Chicago_authors(authors_string):
     ## The authors_string could have a period at the end that is not part of an initial.
     last_name = names[-1]
     last_name = last_name.split(" ")[-1]
-    if len(last_name) > 2 and not re.match(r"([a-zA-Z]\.)+", last_name) and "." in last_name:
+    if len(last_name) > 2 and not helper_functions.REGEXES["initials"].match(last_name) and "." in last_name:
         names[-1] = names[-1][:-1]
     
     authors = []
@@ -193,7 +252,7 @@ def tokenize_APA_or_Harvard_authors(authors_string):
     authors = []
     previous_token_type = ""
     for token in names_and_initials:
-        if re.match(r".*\..*", token):
+        if helper_functions.REGEXES["has_period"].match(token):
             if previous_token_type == "last_name":
                 authors[-1]["initials"] = token
             else:
@@ -212,6 +271,8 @@ def tokenize_myncbi_citations(html):
     """Tokenize the citations on a MyNCBI HTML page.
     
     Note that authors and title can be missing or empty from the webpage.
+    Only the citation divs are parsed out of the page, and the spans in each 
+    citation are gathered in a single pass over it.
     
     Args:
         html (str): the html of the MyNCBI page.
@@ -220,15 +281,26 @@ def tokenize_myncbi_citations(html):
         parsed_pubs (dict): the citations tokenized in a dictionary matching the tokenized citations JSON schema. 
     """
     
-    soup = bs4.BeautifulSoup(html, "html.parser")
+    soup = bs4.BeautifulSoup(html, HTML_PARSER, parse_only = MYNCBI_CITATION_STRAINER)
     
     parsed_pubs = []
     
     citations = soup.find_all("div", class_ = "ncbi-docsum")
     for i, citation in enumerate(citations):
         
-        authors_str = citation.find("span", class_ = "authors")
-        authors_str = authors_str.text if authors_str else list(citation.children)[1].text
+        ## Keep the first span for each class, the same one find() would return.
+        spans = {}
+        for span in citation.find_all("span"):
+            for class_name in span.get("class", []):
+                spans.setdefault(class_name, span)
+        children = None
+        
+        authors_str = spans.get("authors")
+        if authors_str:
+            authors_str = authors_str.text
+        else:
+            children = list(citation.children)
+            authors_str = children[1].text
         
         authors_str = authors_str.strip()
         if authors_str and authors_str[-1] == ".":
@@ -245,27 +317,28 @@ def tokenize_myncbi_citations(html):
         ## If there is not a span with the class title then the title should be a 
         ## hyperlink that is the 3rd child. 
         ## If the reference is a book then the "title" will likely be the book title, and "chaptertitle" will be the actual reference.
-        chapter_title = citation.find("span", class_ = "chaptertitle")
+        chapter_title = spans.get("chaptertitle")
         if chapter_title:
             title = chapter_title.text.strip()
         else:
-            title = citation.find("span", class_ = "title")
+            title = spans.get("title")
             if title:
                 title = title.text.strip()
             else:
-                children = list(citation.children)
+                if children is None:
+                    children = list(citation.children)
                 title = "" if children[2].name == "span" else children[2].text.strip()
             
-        doi = citation.find("span", class_ = "doi")
+        doi = spans.get("doi")
         if doi:
-            match = helper_functions.regex_match_return(r"(?i).*doi:\s*([^\s]+\w).*", doi.text)
+            match = helper_functions.regex_match_return(helper_functions.REGEXES["doi_in_text"], doi.text)
             doi = match[0].lower() if match else ""
         else:
             doi = ""
             
-        pmid = citation.find("span", class_ = "pmid")
+        pmid = spans.get("pmid")
         if pmid:
-            match = helper_functions.regex_match_return(r"(?i).*pmid:\s*(\d+).*", pmid.text)
+            match = helper_functions.regex_match_return(helper_functions.REGEXES["pmid_in_text"], pmid.text)
             pmid = match[0] if match else ""
         else:
             pmid = ""
@@ -287,13 +360,28 @@ def parse_MEDLINE_format(text_string):
         parsed_pubs (dict): the citations tokenized in a dictionary matching the tokenized citations JSON schema. 
     """
     
-    parsed_pubs = []
+    return list(iter_MEDLINE_citations(text_string.split("\n")))
+
+
+
+def iter_MEDLINE_citations(lines):
+    """Tokenize lines of a MEDLINE formatted document and yield each citation as its record ends.
+    
+    This is the streaming version of parse_MEDLINE_format, lines can be any iterable, 
+    such as an open file, and is only consumed as citations are requested.
+    
+    Args:
+        lines (iterable): the lines of the MEDLINE document, without newline characters.
+        
+    Yields:
+        (dict): the next citation tokenized in a dictionary matching the tokenized citations JSON schema. 
+    """
+    
     pmid = ""
     doi = ""
     title = ""
     found_title = False
     authors = []
-    lines = text_string.split("\n")
     for line in lines:
         if line:
             field = line[0:4]
@@ -328,15 +416,83 @@ def parse_MEDLINE_format(text_string):
                 
         else:
             if pmid or doi or title or authors:
-                parsed_pubs.append({"authors":authors, "title":title, "PMID":pmid, "DOI":doi, "reference_line":"", "pub_dict_key":""})
+                yield {"authors":authors, "title":title, "PMID":pmid, "DOI":doi, "reference_line":"", "pub_dict_key":""}
             pmid = ""
             doi = ""
             title = ""
             found_title = False
             authors = []
-            
-    return parsed_pubs
 
 
 
 
+def _split_lines_into_chunks(lines, chunk_size, MEDLINE_reference):
+    """Group lines into chunks that can be tokenized independently of each other.
+    
+    Text citations are 1 per line, so any line can end a chunk. MEDLINE records 
+    are separated by blank lines, so a chunk is only ended after a blank line once 
+    it has at least chunk_size lines.
+    
+    Args:
+        lines (iterable): the lines of the document, without newline characters.
+        chunk_size (int): the minimum number of lines to put in each chunk, the last chunk can be smaller.
+        MEDLINE_reference (bool): True if lines are in MEDLINE format.
+        
+    Yields:
+        chunk (list): the next chunk of lines.
+    """
+    
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size and (not MEDLINE_reference or not line):
+            yield chunk
+            chunk = []
+    
+    if chunk:
+        yield chunk
+
+
+
+def _parse_chunk(lines, MEDLINE_reference):
+    """Tokenize a chunk of lines, used by parse_lines_in_parallel.
+    
+    Args:
+        lines (list): the lines of the chunk, without newline characters.
+        MEDLINE_reference (bool): True if lines are in MEDLINE format.
+        
+    Returns:
+        (list): the citations tokenized in dictionaries matching the tokenized citations JSON schema.
+    """
+    
+    if MEDLINE_reference:
+        return list(iter_MEDLINE_citations(lines))
+    return list(iter_text_citations(lines))
+
+
+
+def parse_lines_in_parallel(lines, MEDLINE_reference, workers, chunk_size=PARALLEL_CHUNK_SIZE):
+    """Tokenize lines on a process pool.
+    
+    lines is split into chunks at boundaries that don't split a citation, each 
+    chunk is tokenized in its own process, and the results are put back together 
+    in the original order, so the result is the same as tokenizing serially.
+    
+    Args:
+        lines (iterable): the lines of the document, without newline characters.
+        MEDLINE_reference (bool): True if lines are in MEDLINE format.
+        workers (int): the number of processes to use.
+        chunk_size (int): the minimum number of lines to give each process at a time.
+        
+    Returns:
+        parsed_pubs (list): the citations tokenized in dictionaries matching the tokenized citations JSON schema.
+    """
+    
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        chunk_results = executor.map(_parse_chunk, 
+                                     _split_lines_into_chunks(lines, chunk_size, MEDLINE_reference), 
+                                     itertools.repeat(MEDLINE_reference))
+        parsed_pubs = [citation for chunk_result in chunk_results for citation in chunk_result]
+    
+    return parsed_pubs
+
@@ -8,12 +8,18 @@ Functions to create emails and reports that are in common for both author_search
 
 import copy
 import os
-import re
+import csv
+import heapq
+import pickle
+import operator
+import tempfile
+import functools
+import itertools
 
-import pandas
+import openpyxl
 
 from . import ref_srch_emails_and_reports
-from . import fileio
+from . import helper_functions
 
 
 simple_publication_keywords_map = {"<abstract>":"abstract",
@@ -63,6 +69,263 @@ tokenized_keywords_map = {"<tok_title>":"title",
 
 
 
+## Every keyword _replace_keywords knows about. Anything else between angle brackets is left alone.
+report_keywords = frozenset(["<project_name>", "<tok_authors>", "<ref_line>", "<is_in_comparison_file>"] +
+                            pub_keywords +
+                            list(authors_keywords_map.keys()) +
+                            list(pub_authors_keyword_map.keys()) +
+                            list(references_keyword_map.keys()) +
+                            list(tokenized_keywords_map.keys()))
+
+## Publication keywords only depend on the publication, so they can be reused for every report the publication is in.
+pub_keywords_set = frozenset(pub_keywords)
+
+TEMPLATE_CACHE_SIZE = 256
+
+## Number of tabular report rows to sort in memory before sorted runs are saved to temporary files and merged.
+TABULAR_SORT_BUFFER_ROWS = 100000
+
+## Same sheet name DataFrame.to_excel used, so existing workbooks read the same.
+XLSX_SHEET_NAME = "Sheet1"
+
+
+
+def _split_template_string(template_string):
+    """Split template_string into literal text and keyword slots.
+    
+    Args:
+        template_string (str): the string to split.
+        
+    Returns:
+        parts (tuple): alternating literal strings and keywords, it always starts and ends with a literal, so keywords are at the odd indexes.
+    """
+    
+    parts = []
+    literal_start = 0
+    for match in helper_functions.REGEXES["report_keyword"].finditer(template_string):
+        if match.group() in report_keywords:
+            parts.append(template_string[literal_start:match.start()])
+            parts.append(match.group())
+            literal_start = match.end()
+    parts.append(template_string[literal_start:])
+    
+    return tuple(parts)
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template_string(template_string):
+    """Split template_string into literal text and keyword slots and keep it in a bounded cache.
+    
+    Args:
+        template_string (str): the string to compile.
+        
+    Returns:
+        (tuple): the compiled string, see _split_template_string.
+    """
+    
+    return _split_template_string(template_string)
+
+
+def compile_template(template):
+    """Compile each value in template so it can be rendered many times with _render_template.
+    
+    Args:
+        template (dict): keys are column names and values are what the elements of the column should be.
+        
+    Returns:
+        (dict): keys are the same as template and values are the compiled strings.
+    """
+    
+    return {key:compile_template_string(value) for key, value in template.items()}
+
+
+
+def _extract_loop_templates(template_string):
+    """Pull what is between the tags of each loop out of template_string.
+    
+    Args:
+        template_string (str): the report template.
+        
+    Returns:
+        loop_templates (dict): keys are the tags in helper_functions.REPORT_LOOP_TAGS and values are what is between them, an empty string if the loop isn't in template_string.
+    """
+    
+    return {loop_tag:helper_functions.regex_group_return(helper_functions.regex_match_return(helper_functions.REGEXES[loop_tag], template_string), 0) 
+            for loop_tag in helper_functions.REPORT_LOOP_TAGS}
+
+
+
+def _get_keyword_replacement(keyword, publication_dict, config_dict, 
+                             project_name, author, pub, 
+                             pub_author, reference, 
+                             tokenized_citation, is_citation_in_prev_pubs):
+    """Return the string to replace keyword with, or None if keyword should be left as is.
+    
+    Args match _replace_keywords.
+    
+    Returns:
+        (str|None): the replacement for keyword.
+    """
+    
+    if keyword == "<project_name>":
+        return project_name if project_name else None
+    
+    if keyword in authors_keywords_map:
+        if not author:
+            return None
+        auth_key = authors_keywords_map[keyword]
+        return str(config_dict["Authors"][author][auth_key]) if auth_key in config_dict["Authors"][author] else "None"
+    
+    if keyword in pub_authors_keyword_map:
+        if not pub_author:
+            return None
+        pub_author_key = pub_authors_keyword_map[keyword]
+        return str(pub_author[pub_author_key]) if pub_author_key in pub_author else "None"
+    
+    if keyword in references_keyword_map:
+        return str(reference[references_keyword_map[keyword]]) if reference else None
+    
+    if keyword in tokenized_keywords_map:
+        if not tokenized_citation:
+            return None
+        replacement = str(tokenized_citation[tokenized_keywords_map[keyword]])
+        return replacement if replacement else "None"
+    
+    if keyword == "<tok_authors>":
+        return ref_srch_emails_and_reports.convert_tokenized_authors_to_str(tokenized_citation["authors"]) if tokenized_citation else None
+    
+    if keyword == "<ref_line>":
+        if not tokenized_citation:
+            return None
+        if tokenized_citation["reference_line"]:
+            return " ".join([line.strip() for line in tokenized_citation["reference_line"].split("\n")])
+        return "N/A"
+    
+    if keyword == "<is_in_comparison_file>":
+        if not tokenized_citation:
+            return None
+        return str(is_citation_in_prev_pubs) if type(is_citation_in_prev_pubs) == bool else "N/A"
+    
+    ## Everything left is a publication keyword.
+    if not pub:
+        return None
+    
+    if keyword in simple_publication_keywords_map:
+        return str(publication_dict[pub][simple_publication_keywords_map[keyword]])
+    
+    if keyword in publication_date_keywords_map:
+        return str(publication_dict[pub]["publication_date"][publication_date_keywords_map[keyword]])
+    
+    if keyword == "<grants>":
+        return ", ".join(publication_dict[pub]["grants"]) if publication_dict[pub]["grants"] else "None Found"
+    
+    if keyword == "<queried_sources>":
+        return ", ".join(publication_dict[pub]["queried_sources"])
+    
+    ## The author keywords are not replaced if the publication has no authors.
+    if not publication_dict[pub]["authors"]:
+        return None
+    
+    if keyword == "<first_author>" or keyword == "<last_author>":
+        author_attributes = publication_dict[pub]["authors"][0 if keyword == "<first_author>" else -1]
+        if "collectivename" in author_attributes:
+            return author_attributes["collectivename"]
+        return str(author_attributes["lastname"]) + ", " + str(author_attributes["firstname"])
+    
+    authors = []
+    for author_attributes in publication_dict[pub]["authors"]:
+        if "collectivename" in author_attributes:
+            authors.append(author_attributes["collectivename"])
+        else:
+            authors.append(str(author_attributes["firstname"]) + " " + str(author_attributes["lastname"]))
+    return ", ".join(authors)
+
+
+
+def _render_template(compiled_template, publication_dict, config_dict, 
+                     project_name="", author="", pub="", 
+                     pub_author=None, reference=None, 
+                     tokenized_citation=None, is_citation_in_prev_pubs=None, 
+                     pub_keyword_replacements=None):
+    """Render a template compiled with compile_template in a single pass.
+    
+    Only the keywords actually in the template are computed, and each one only once. 
+    Replacing keywords one after another means a replacement that contains a keyword 
+    can get that keyword replaced as well, so if any replacement has angle brackets 
+    in it the keywords are replaced the old way to give the exact same result.
+    
+    If pub_keyword_replacements is given, publication keyword replacements are 
+    looked up in it and added to it, so they are only computed once per publication 
+    no matter how many reports the publication is in.
+    
+    Args:
+        compiled_template (dict): the template compiled with compile_template.
+        publication_dict (dict): keys and values match the publications JSON file.
+        config_dict (dict): keys and values match the project tracking configuration JSON file.
+        project_name (str): the name of the project to replace.
+        author (str): the key to the author in config_dict["Authors"].
+        pub (str): the key to the pub in publication_dict.
+        pub_author (dict|None): an author in pub. None means no author.
+        reference (dict|None): a reference for pub. None means no reference.
+        tokenized_citation (dict): a tokenized citation from the reference for the publication.
+        is_citation_in_prev_pubs (bool or None): whether this publication is in the previous publications or not. If None then it isn't applicable.
+        pub_keyword_replacements (dict|None): keys are pub ids and values are dicts of publication keywords and their replacements for that pub.
+        
+    Returns:
+        rendered_template (dict): keys are the same as compiled_template and values are the strings with keywords replaced.
+    """
+    
+    replacements = {}
+    rendered_template = {}
+    for key, parts in compiled_template.items():
+        pieces = list(parts)
+        for i in range(1, len(parts), 2):
+            keyword = parts[i]
+            if keyword not in replacements:
+                if pub_keyword_replacements is not None and pub and keyword in pub_keywords_set:
+                    pub_replacements = pub_keyword_replacements.setdefault(pub, {})
+                    if keyword not in pub_replacements:
+                        pub_replacements[keyword] = _get_keyword_replacement(keyword, publication_dict, config_dict, 
+                                                                             project_name, author, pub, 
+                                                                             pub_author, reference, 
+                                                                             tokenized_citation, is_citation_in_prev_pubs)
+                    replacement = pub_replacements[keyword]
+                else:
+                    replacement = _get_keyword_replacement(keyword, publication_dict, config_dict, 
+                                                           project_name, author, pub, 
+                                                           pub_author, reference, 
+                                                           tokenized_citation, is_citation_in_prev_pubs)
+                if replacement is not None and ("<" in replacement or ">" in replacement):
+                    return _replace_keywords_in_order({key:"".join(parts) for key, parts in compiled_template.items()}, 
+                                                      publication_dict, config_dict, 
+                                                      project_name, author, pub, 
+                                                      pub_author, reference, 
+                                                      tokenized_citation, is_citation_in_prev_pubs)
+                replacements[keyword] = replacement
+            if replacements[keyword] is not None:
+                pieces[i] = replacements[keyword]
+        rendered_template[key] = "".join(pieces)
+    
+    return rendered_template
+
+
+def _render_template_string(compiled_string, publication_dict, config_dict, **kwargs):
+    """Render a single string compiled with compile_template_string or _split_template_string.
+    
+    Args:
+        compiled_string (tuple): the compiled string.
+        publication_dict (dict): keys and values match the publications JSON file.
+        config_dict (dict): keys and values match the project tracking configuration JSON file.
+        kwargs (dict): the rest of the keyword arguments to _render_template.
+        
+    Returns:
+        (str): the string with keywords replaced.
+    """
+    
+    return _render_template({"1":compiled_string}, publication_dict, config_dict, **kwargs)["1"]
+
+
+
 def _replace_keywords(template, publication_dict, config_dict, 
                      project_name="", author="", pub="", 
                      pub_author=None, reference=None, 
@@ -76,7 +339,41 @@ def _replace_keywords(template, publication_dict, config_dict,
     of that dictionary from that key.
     
     This was merged to handle both reference search and author search. Previously there 
-    were 2 replace_keywords functions, one for each search type.
+    were 2 replace_keywords functions, one for each search type. The template is 
+    compiled and rendered with _render_template, report builders that render the 
+    same template many times should compile it once and call that directly.
+    
+    Args:
+        template (dict): keys are column names and values are what the elements of the column should be.
+        publication_dict (dict): keys and values match the publications JSON file.
+        config_dict (dict): keys and values match the project tracking configuration JSON file.
+        project_name (str): the name of the project to replace.
+        author (str): the key to the author in config_dict["Authors"].
+        pub (str): the key to the pub in publication_dict.
+        pub_author (dict|None): an author in pub. None means no author.
+        reference (dict|None): a reference for pub. None means no reference.
+        tokenized_citation (dict): a tokenized citation from the reference for the publication.
+        is_citation_in_prev_pubs (bool or None): whether this publication is in the previous publications or not. If None then it isn't applicable.
+        
+    Returns:
+        (dict): template with the keywords replaced in its values.
+    """
+    
+    return _render_template(compile_template(template), publication_dict, config_dict, 
+                            project_name, author, pub, 
+                            pub_author, reference, 
+                            tokenized_citation, is_citation_in_prev_pubs)
+
+
+
+def _replace_keywords_in_order(template, publication_dict, config_dict, 
+                               project_name="", author="", pub="", 
+                               pub_author=None, reference=None, 
+                               tokenized_citation=None, is_citation_in_prev_pubs=None):
+    """Replace keywords in the values of the template dictionary one keyword at a time.
+    
+    This is how keywords were always replaced, and is still used by _render_template 
+    when a replacement could itself be changed by a later replacement.
     
     Args:
         template (dict): keys are column names and values are what the elements of the column should be.
@@ -193,6 +490,53 @@ def _replace_keywords(template, publication_dict, config_dict,
 
 
 
+def _replace_loop_block(string_to_modify, loop_tag, replacement):
+    """Replace everything from the first <loop_tag> to the last </loop_tag> in string_to_modify with replacement.
+    
+    This matches what the loop "_block" patterns in helper_functions.REGEXES match, 
+    but the loop is spliced out with slicing, so the string is only copied once and 
+    backslashes in replacement are inserted as they are instead of being treated as 
+    escapes like re.sub would.
+    
+    Args:
+        string_to_modify (str): the string with the loop in it.
+        loop_tag (str): one of the tags in helper_functions.REPORT_LOOP_TAGS.
+        replacement (str): the string to put in place of the loop.
+        
+    Returns:
+        (str): string_to_modify with the loop replaced, or unchanged if the loop isn't in it.
+    """
+    
+    if (loop_block := _find_loop_block(string_to_modify, loop_tag)) is None:
+        return string_to_modify
+    
+    start, stop = loop_block
+    return string_to_modify[:start] + replacement + string_to_modify[stop:]
+
+
+
+def _find_loop_block(string_to_search, loop_tag):
+    """Find the span from the first <loop_tag> to the last </loop_tag> in string_to_search.
+    
+    Args:
+        string_to_search (str): the string to look for the loop in.
+        loop_tag (str): one of the tags in helper_functions.REPORT_LOOP_TAGS.
+        
+    Returns:
+        (tuple|None): (start, stop) indexes of the loop including its tags, or None if the loop isn't in string_to_search.
+    """
+    
+    open_tag = "<" + loop_tag + ">"
+    close_tag = "</" + loop_tag + ">"
+    start = string_to_search.find(open_tag)
+    end = string_to_search.rfind(close_tag)
+    if start == -1 or end < start + len(open_tag):
+        return None
+    
+    return start, end + len(close_tag)
+
+
+
 def _replace_pub_author_and_reference_loops(publication_dict, pub, string_to_modify, pub_author_template, reference_template):
     """Replace the pub_author and reference loops in string_to_modify with appropriate pub data.
     
@@ -207,91 +551,189 @@ def _replace_pub_author_and_reference_loops(publication_dict, pub, string_to_mod
         string_to_modify (str): the input string_to_modify with pub_author and reference loops replaced.
     """
     
-    pub_authors = ""
+    compiled_pub_author_template = compile_template_string(pub_author_template)
+    pub_authors = []
     for pub_author in publication_dict[pub]["authors"]:
-        pub_author_template_copy = _replace_keywords({"1":pub_author_template}, publication_dict, {}, pub_author=pub_author)["1"]
-        pub_authors += pub_author_template_copy
+        pub_authors.append(_render_template_string(compiled_pub_author_template, publication_dict, {}, pub_author=pub_author))
         
-    string_to_modify = re.sub(r"(?s)<pub_author_loop>.*</pub_author_loop>", pub_authors, string_to_modify)
+    string_to_modify = _replace_loop_block(string_to_modify, "pub_author_loop", "".join(pub_authors))
     
-    references = ""
+    compiled_reference_template = compile_template_string(reference_template)
+    references = []
     for reference in publication_dict[pub]["references"]:
-        reference_template_copy = _replace_keywords({"1":reference_template}, publication_dict, {}, reference=reference)["1"]
-        references += reference_template_copy
+        references.append(_render_template_string(compiled_reference_template, publication_dict, {}, reference=reference))
     
+    references = "".join(references)
     if not references:
         references = "None"
-    string_to_modify = re.sub(r"(?s)<reference_loop>.*</reference_loop>", references, string_to_modify)
+    string_to_modify = _replace_loop_block(string_to_modify, "reference_loop", references)
     
     return string_to_modify
 
 
 
 def _save_rows_to_file(rows, filename, sort, column_order, file_format, separator, save_dir_name):
-    """Turn a list of dicts into a DataFrame and save it to file.
+    """Dedupe, sort, and save rows to a CSV or Excel file.
+    
+    Rows are deduplicated as they are produced and written row by row, with the csv module 
+    for CSV files and an openpyxl write-only workbook for Excel files, so rows can be a 
+    generator and never have to be held in a DataFrame.
     
     Args:
-        rows (list[dict]): list of dictionaries to save.
-        filename (str): filename to save the DataFrame as, '.csv' or '.xlsx' will be added as needed.
-        sort (list[str]): list of column names to sort the DataFrame by, passes into DataFrame.sort_values().
-        column_order (list[str]): list of column names to reorder the DataFrame columns.
+        rows (iterable[dict]): dictionaries to save, all with the same keys in the same order.
+        filename (str): filename to save the rows as, '.csv' or '.xlsx' will be added as needed.
+        sort (list[str]): list of column names to sort the rows by, ties keep the order the rows were produced in.
+        column_order (list[str]): list of column names in the order they should be saved.
         file_format (str): either 'csv' or 'xlsx' to save in CSV or Excel format, respectively.
         separator (str): the separator to use if file_format is 'csv'.
         save_dir_name (str): the directory name to save the file in.
     
     Returns:
-        report (str): if file_format is 'csv', then the DataFrame in CSV form, else the path to the Excel file.
-        filename (str): the filename the DataFrame was ultimately saved under.
+        report (str): if file_format is 'csv', then the rows in CSV form, else the path to the Excel file.
+        filename (str): the filename the rows were ultimately saved under.
     """
     
-    report = ""            
-    if rows:
-        df = pandas.DataFrame(rows)
-        if sort:
-            df = df.sort_values(by=sort)
-        df = df.drop_duplicates()
-        df = df[column_order]
+    report = ""
+    rows = iter(rows)
+    if (first_row := next(rows, None)) is None:
+        return report, filename
+    
+    columns = list(first_row.keys())
+    row_values = _iter_unique_row_values(itertools.chain([first_row], rows))
+    if sort:
+        row_values = _sort_row_values(row_values, [columns.index(column) for column in sort])
+    column_indexes = [columns.index(column) for column in column_order]
+    
+    if file_format == "csv":
+        save_path = os.path.join(os.getcwd(), save_dir_name, filename)
+        with open(save_path, "w", encoding="utf-8", newline="") as outFile:
+            writer = csv.writer(outFile, delimiter=separator, lineterminator="\n")
+            writer.writerow(column_order)
+            writer.writerows([values[index] for index in column_indexes] for values in row_values)
         
-        if file_format == "csv":
-            report = df.to_csv(index=False, sep=separator, lineterminator="\n")
-            fileio.save_string_to_file(save_dir_name, filename, report)
-        else:
-            ## If the file extension isn't .xlsx then there will be an error, so force it.
-            extension = os.path.splitext(filename)[1][1:].lower()
-            if not extension == "xlsx":
-                filename += ".xlsx"
-            
-            report = os.path.join(save_dir_name, filename)
-            df.to_excel(report, index=False)
+        with open(save_path, "r", encoding="utf-8", newline="") as inFile:
+            report = inFile.read()
+    else:
+        ## If the file extension isn't .xlsx then there will be an error, so force it.
+        extension = os.path.splitext(filename)[1][1:].lower()
+        if not extension == "xlsx":
+            filename += ".xlsx"
+        
+        ## Write-only workbooks stream each row out as it is appended instead of keeping every cell in memory.
+        report = os.path.join(save_dir_name, filename)
+        workbook = openpyxl.Workbook(write_only=True)
+        worksheet = workbook.create_sheet(XLSX_SHEET_NAME)
+        worksheet.append(column_order)
+        for values in row_values:
+            worksheet.append([values[index] for index in column_indexes])
+        workbook.save(report)
     
     return report, filename
 
 
 
-def _build_pub_author_and_reference_rows(publication_dict, config_dict, 
-                                         has_pub_author_keywords, has_reference_keywords,
-                                         row_template, 
-                                         project_name="", author="", pub="", 
-                                         tokenized_citation=None, is_citation_in_prev_pubs=None):
-    """Build rows for each pub_author and reference.
+def _iter_unique_row_values(rows):
+    """Yield the values of each row as a tuple, skipping rows that are the same as an earlier row.
+    
+    Args:
+        rows (iterable[dict]): dictionaries to dedupe, all with the same keys in the same order.
+    
+    Yields:
+        values (tuple): the values of the next unique row.
+    """
+    
+    seen_rows = set()
+    for row in rows:
+        values = tuple(row.values())
+        if values not in seen_rows:
+            seen_rows.add(values)
+            yield values
+
+
+
+def _sort_row_values(row_values, sort_indexes):
+    """Stable sort row_values by the values at sort_indexes.
+    
+    Rows are sorted in memory until there are more than TABULAR_SORT_BUFFER_ROWS of them, 
+    then each full buffer is sorted and saved to a temporary file, and the sorted runs 
+    are merged together as they are read back in.
+    
+    Args:
+        row_values (iterable[tuple]): the values of each row.
+        sort_indexes (list[int]): indexes of the values to sort by, in order of precedence.
+    
+    Yields:
+        values (tuple): the values of the next row in sorted order.
+    """
+    
+    key = operator.itemgetter(*sort_indexes)
+    runs = []
+    try:
+        buffer = []
+        for values in row_values:
+            buffer.append(values)
+            if len(buffer) >= TABULAR_SORT_BUFFER_ROWS:
+                buffer.sort(key=key)
+                run = tempfile.TemporaryFile()
+                for sorted_values in buffer:
+                    pickle.dump(sorted_values, run, protocol=pickle.HIGHEST_PROTOCOL)
+                run.seek(0)
+                runs.append(run)
+                buffer = []
+        buffer.sort(key=key)
+        
+        ## heapq.merge takes from the earliest iterable on ties, and the runs are in the order 
+        ## they were produced with the buffer last, so the merge is stable.
+        yield from heapq.merge(*[_iter_sorted_run(run) for run in runs], buffer, key=key)
+    finally:
+        for run in runs:
+            run.close()
+
+
+
+def _iter_sorted_run(run):
+    """Yield the row values pickled to run by _sort_row_values.
+    
+    Args:
+        run (file): temporary file of pickled row values, positioned at the start.
+    
+    Yields:
+        values (tuple): the values of the next row in the run.
+    """
+    
+    while True:
+        try:
+            yield pickle.load(run)
+        except EOFError:
+            return
+
+
+
+def _iter_pub_author_and_reference_rows(publication_dict, config_dict, 
+                                        has_pub_author_keywords, has_reference_keywords,
+                                        row_template, 
+                                        project_name="", author="", pub="", 
+                                        tokenized_citation=None, is_citation_in_prev_pubs=None, 
+                                        pub_keyword_replacements=None):
+    """Yield rows for each pub_author and reference.
     
     Args:
         publication_dict (dict): keys and values match the publications JSON file.
         config_dict (dict): keys and values match the project tracking configuration JSON file.
         has_pub_author_keywords (bool): if True, then row_template has keywords to replace that are attributes to publication authors.
         has_reference_keywords (bool): if True, then row_template has keywords to replace that are attributes to publication references.
-        row_template (dict): keys are column names and values are what the elements of the column should be.
+        row_template (dict): keys are column names and values are what the elements of the column should be, compiled with compile_template.
         project_name (str): the name of the project to replace.
         author (str): the key to the author in config_dict["Authors"].
         pub (str): the key to the pub in publication_dict.
         tokenized_citation (dict|None): a tokenized citation from the reference for the publication.
         is_citation_in_prev_pubs (bool|None): whether this publication is in the previous publications or not. If None then it isn't applicable.
+        pub_keyword_replacements (dict|None): cache of publication keyword replacements passed on to _render_template.
     
-    Returns:
-        rows (list): list of dictionaries meant to eventually be turned into a pandas DataFrame.
+    Yields:
+        row (dict): row_template with the keywords replaced for the next pub_author and/or reference.
     """
     
-    rows = []
     ## If references or authors is an empty list then you get unexpected behavior where pubs just won't show up, 
     ## so look for it before hand and just give it a null dictionary if it is empty.
     if not (references := publication_dict[pub]["references"]):
@@ -316,53 +758,55 @@ def _build_pub_author_and_reference_rows(publication_dict, config_dict,
     if has_pub_author_keywords and has_reference_keywords:
         for pub_author in pub_authors:
             for reference in references:
-                rows.append(_replace_keywords(row_template, 
-                                              publication_dict, 
-                                              config_dict, 
-                                              project_name, 
-                                              author,
-                                              pub, 
-                                              pub_author, 
-                                              reference,
-                                              tokenized_citation,
-                                              is_citation_in_prev_pubs))
+                yield _render_template(row_template, 
+                                       publication_dict, 
+                                       config_dict, 
+                                       project_name, 
+                                       author,
+                                       pub, 
+                                       pub_author, 
+                                       reference,
+                                       tokenized_citation,
+                                       is_citation_in_prev_pubs,
+                                       pub_keyword_replacements=pub_keyword_replacements)
     
     elif has_pub_author_keywords:
         for pub_author in pub_authors:
-            rows.append(_replace_keywords(row_template, 
-                                          publication_dict, 
-                                          config_dict, 
-                                          project_name, 
-                                          author, 
-                                          pub, 
-                                          pub_author,
-                                          None,
-                                          tokenized_citation,
-                                          is_citation_in_prev_pubs))
+            yield _render_template(row_template, 
+                                   publication_dict, 
+                                   config_dict, 
+                                   project_name, 
+                                   author, 
+                                   pub, 
+                                   pub_author,
+                                   None,
+                                   tokenized_citation,
+                                   is_citation_in_prev_pubs,
+                                   pub_keyword_replacements=pub_keyword_replacements)
     
     elif has_reference_keywords:
         for reference in references:
-            rows.append(_replace_keywords(row_template, 
-                                          publication_dict, 
-                                          config_dict, 
-                                          project_name, 
-                                          author, 
-                                          pub, 
-                                          None, 
-                                          reference,
-                                          tokenized_citation,
-                                          is_citation_in_prev_pubs))
+            yield _render_template(row_template, 
+                                   publication_dict, 
+                                   config_dict, 
+                                   project_name, 
+                                   author, 
+                                   pub, 
+                                   None, 
+                                   reference,
+                                   tokenized_citation,
+                                   is_citation_in_prev_pubs,
+                                   pub_keyword_replacements=pub_keyword_replacements)
             
     else:
-        rows.append(_replace_keywords(row_template, 
-                                      publication_dict, 
-                                      config_dict, 
-                                      project_name, 
-                                      author, 
-                                      pub,
-                                      None,
-                                      None,
-                                      tokenized_citation,
-                                      is_citation_in_prev_pubs))
-    
-    return rows
+        yield _render_template(row_template, 
+                               publication_dict, 
+                               config_dict, 
+                               project_name, 
+                               author, 
+                               pub,
+                               None,
+                               None,
+                               tokenized_citation,
+                               is_citation_in_prev_pubs,
+                               pub_keyword_replacements=pub_keyword_replacements)
@@ -6,17 +6,39 @@ This module contains the functions that read and write files.
 """
 
 
-import re
 import os
 import sys
 import json
+import zipfile
+import mmap
+import re
+import xml.etree.ElementTree
 
 import docx
-import pandas
 
 from . import helper_functions
 
 
+PUBLICATION_INDEX_FILENAME = "publications_index.json"
+REPORT_MANIFEST_FILENAME = "reports_manifest.json"
+REPORT_MANIFEST_VERSION = 1
+TOKENIZATION_CACHE_EXTENSION = ".json"
+
+## Matches the lines of a MEDLINE file that citation_parsing.iter_MEDLINE_citations uses. 
+## These are blank lines, PMID, AU, LID, and AID lines, and TI lines along with 
+## the continuation, PMID, and TI lines after them and the line that ends the title. 
+## Other lines don't change the tokenized citations.
+MEDLINE_TOKENIZED_LINE_PATTERN = rb"((?:PMID|AU  |LID |AID )[^\n]*|TI  [^\n]*(?:\n(?:    |PMID|TI  )[^\n]*)*(?:\n[^\n]*)?|(?=\n|\Z))"
+MEDLINE_TOKENIZED_FIRST_LINE_REGEX = re.compile(MEDLINE_TOKENIZED_LINE_PATTERN)
+MEDLINE_TOKENIZED_LINES_REGEX = re.compile(rb"\n" + MEDLINE_TOKENIZED_LINE_PATTERN)
+
+## Location of the main document part inside a docx zip and the WordprocessingML tags needed to read its text.
+DOCX_DOCUMENT_PART = "word/document.xml"
+WORDPROCESSINGML_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+DOCX_BODY_TAG = WORDPROCESSINGML_NAMESPACE + "body"
+DOCX_PARAGRAPH_TAG = WORDPROCESSINGML_NAMESPACE + "p"
+DOCX_TEXT_TAG = WORDPROCESSINGML_NAMESPACE + "t"
+
 
 def load_json(filepath):
     """Adds error checking around loading a json file.
@@ -45,7 +67,7 @@ def load_json(filepath):
 
 
 
-def read_previous_publications(filepath):
+def read_previous_publications(filepath, include_index=False):
     """Read in the previous publication json file.
     
     If the prev_pub option was given by the user then that filepath is used to read in the file
@@ -54,27 +76,36 @@ def read_previous_publications(filepath):
     directory and if it has a publications.json file then read in that file. 
     If no previous publications are found then an empty dict is returned for prev_pubs.
     
+    If include_index is True, then the publication index saved next to the 
+    publications file is also read in and returned. If there is no index, or 
+    it is out of date with the publications, then None is returned for it.
+    
     Args:
         filepath (str or None): path to the publications JSON to read in.
+        include_index (bool): if True, also return the publication index for prev_pubs.
         
     Returns:
         has_previous_pubs (bool): True means that a previous publications file was found
         prev_pubs (dict): dict where keys are publication ids and values are a dict of publication attributes
+        prev_pubs_index (dict|None): only returned if include_index is True, the index read from file, see helper_functions.build_publication_index.
     """
     
     has_previous_pubs = False
+    prev_pubs_index = None
     if filepath:
         
         if filepath.lower() == "ignore":
-            return False, {}
+            return (False, {}, None) if include_index else (False, {})
         
         prev_pubs = load_json(filepath)
         has_previous_pubs = True
+        if include_index:
+            prev_pubs_index = load_publication_index(filepath)
                             
     else:
         dir_contents = os.listdir()
         ## find all directories matching the tracker directory structure and convert the timestamps to ints to find the largest one.
-        tracker_dirs = [int(re.match(r"tracker-(\d{10})", folder).group(1)) for folder in dir_contents if re.match(r"tracker-(\d{10})", folder)]
+        tracker_dirs = [int(helper_functions.REGEXES["tracker_dir"].match(folder).group(1)) for folder in dir_contents if helper_functions.REGEXES["tracker_dir"].match(folder)]
         if len(tracker_dirs) > 0:
             tracker_dirs.sort(reverse=True)
             for latest_dir in tracker_dirs:
@@ -82,18 +113,176 @@ def read_previous_publications(filepath):
                 if os.path.exists(prev_publication_filepath):
                     prev_pubs = load_json(prev_publication_filepath)
                     has_previous_pubs = True
+                    if include_index:
+                        prev_pubs_index = load_publication_index(prev_publication_filepath)
                     break
     
-    if has_previous_pubs:                
-                    
-        return has_previous_pubs, prev_pubs
+    if not has_previous_pubs:
+        prev_pubs = {}
     
-    else:
-        return has_previous_pubs, {}
+    if include_index:
+        return has_previous_pubs, prev_pubs, prev_pubs_index
     
+    return has_previous_pubs, prev_pubs
+
+
+
+def load_publication_index(publications_filepath):
+    """Read in the publication index saved next to a publications JSON file.
     
+    The index is looked for in the same directory as publications_filepath with 
+    the name PUBLICATION_INDEX_FILENAME. The size and modification time of the 
+    publications file saved in the index are compared to the file's current ones, 
+    and if they don't agree the index is considered out of date and not used.
     
+    Args:
+        publications_filepath (str): path to the publications JSON the index was saved with.
+        
+    Returns:
+        (dict|None): the publication index, or None if it doesn't exist or is out of date.
+    """
+    
+    index_filepath = os.path.join(os.path.dirname(publications_filepath), PUBLICATION_INDEX_FILENAME)
+    if not os.path.exists(index_filepath):
+        return None
+    
+    try:
+        with open(index_filepath, "r") as f:
+            pub_index = json.loads(f.read())
+    except (OSError, ValueError):
+        helper_functions.vprint("Warning: Could not read the publication index at " + index_filepath + ". It will be rebuilt.", verbosity=1)
+        return None
     
+    if not isinstance(pub_index, dict) or \
+       pub_index.get("publications_file") != _get_file_stamp(publications_filepath):
+        helper_functions.vprint("Warning: The publication index at " + index_filepath + " does not match its publications. It will be rebuilt.", verbosity=1)
+        return None
+    
+    return pub_index
+
+
+
+def _get_file_stamp(filepath):
+    """Return the size and modification time of filepath to tell whether it changed.
+    
+    Args:
+        filepath (str): path to the file.
+        
+    Returns:
+        (dict|None): {"size":int, "mtime_ns":int}, or None if the file doesn't exist.
+    """
+    
+    try:
+        file_stat = os.stat(filepath)
+    except OSError:
+        return None
+    return {"size":file_stat.st_size, "mtime_ns":file_stat.st_mtime_ns}
+
+
+
+def read_previous_report_manifest(save_dir_name):
+    """Read in the report manifest saved by the latest run before save_dir_name.
+    
+    Look for directories in the current working directory named like save_dir_name, 
+    "tracker-" or "tracker-test-" followed by a timestamp, and read the manifest 
+    from the newest one that has REPORT_MANIFEST_FILENAME in it. Manifests that 
+    can't be read or are from a different REPORT_MANIFEST_VERSION are skipped.
+    
+    Args:
+        save_dir_name (str): name of the directory the current run is saving reports in.
+        
+    Returns:
+        (dict|None): {"version":int, "reports":{filename:{"hash":str|None, "filename":str|None}}, "save_dir_name":str}, 
+                     save_dir_name is the directory the manifest was read from, or None if there is no previous manifest.
+    """
+    
+    prefix = save_dir_name.rstrip("0123456789")
+    tracker_dir_regex = re.compile(re.escape(prefix) + r"(\d{10})")
+    tracker_dirs = sorted([folder for folder in os.listdir() if tracker_dir_regex.fullmatch(folder) and folder != save_dir_name], reverse=True)
+    for tracker_dir in tracker_dirs:
+        manifest_filepath = os.path.join(tracker_dir, REPORT_MANIFEST_FILENAME)
+        if not os.path.exists(manifest_filepath):
+            continue
+        
+        try:
+            with open(manifest_filepath, "r") as f:
+                manifest = json.loads(f.read())
+        except (OSError, ValueError):
+            helper_functions.vprint("Warning: Could not read the report manifest at " + manifest_filepath + ". It will not be used.", verbosity=1)
+            continue
+        
+        if not isinstance(manifest, dict) or manifest.get("version") != REPORT_MANIFEST_VERSION or \
+           not isinstance(manifest.get("reports"), dict):
+            helper_functions.vprint("Warning: The report manifest at " + manifest_filepath + " is not a version this package can use. It will not be used.", verbosity=1)
+            continue
+        
+        manifest["save_dir_name"] = tracker_dir
+        return manifest
+    
+    return None
+    
+    
+    
+    
+
+def load_tokenization_cache(cache_dir, cache_key):
+    """Read in the tokenized citations cached in cache_dir under cache_key.
+    
+    Args:
+        cache_dir (str): path to the directory the tokenization cache is kept in.
+        cache_key (str): key identifying the reference and parser options, see ref_srch_webio.create_reference_cache_key.
+        
+    Returns:
+        (dict|None): {"tokenized_citations":[...], "duplicate_citations":[[...], ...]}, or None if there is no usable cache entry.
+    """
+    
+    cache_filepath = os.path.join(cache_dir, cache_key + TOKENIZATION_CACHE_EXTENSION)
+    if not os.path.exists(cache_filepath):
+        return None
+    
+    try:
+        with open(cache_filepath, "r", encoding = "utf-8") as f:
+            cache_entry = json.loads(f.read())
+    except (OSError, ValueError):
+        helper_functions.vprint("Warning: Could not read the tokenization cache at " + cache_filepath + ". The reference will be tokenized again.", verbosity=1)
+        return None
+    
+    if not isinstance(cache_entry, dict) or \
+       not isinstance(cache_entry.get("tokenized_citations"), list) or \
+       not isinstance(cache_entry.get("duplicate_citations"), list):
+        helper_functions.vprint("Warning: The tokenization cache at " + cache_filepath + " is malformed. The reference will be tokenized again.", verbosity=1)
+        return None
+    
+    return cache_entry
+
+
+
+def save_tokenization_cache(cache_dir, cache_key, tokenized_citations, duplicate_citations):
+    """Save tokenized citations and their duplicate sets in cache_dir under cache_key.
+    
+    The entry is written to a temporary file first and then moved into place, 
+    so an interrupted run can't leave a partial entry behind. Failing to write 
+    the cache only prints a warning.
+    
+    Args:
+        cache_dir (str): path to the directory the tokenization cache is kept in, created if it doesn't exist.
+        cache_key (str): key identifying the reference and parser options, see ref_srch_webio.create_reference_cache_key.
+        tokenized_citations (list): list of dicts. Matches the tokenized citations JSON schema.
+        duplicate_citations (list): list of lists of indexes into tokenized_citations that are duplicates of each other.
+    """
+    
+    cache_filepath = os.path.join(cache_dir, cache_key + TOKENIZATION_CACHE_EXTENSION)
+    temp_filepath = cache_filepath + "." + str(os.getpid()) + ".tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(temp_filepath, "w", encoding = "utf-8") as outFile:
+            print(json.dumps({"tokenized_citations":tokenized_citations, "duplicate_citations":duplicate_citations}), file=outFile)
+        os.replace(temp_filepath, cache_filepath)
+    except OSError as e:
+        helper_functions.vprint("Warning: Could not save the tokenization cache at " + cache_filepath + ".", verbosity=1)
+        helper_functions.vprint(e, verbosity=1)
+
+
 
 def save_emails_to_file(email_messages, save_dir_name):
     """Save email_messages to "emails.json" in save_dir_name in the current working directory.
@@ -128,6 +317,43 @@ def save_publications_to_file(save_dir_name, publication_dict, prev_pubs):
     with open(publications_save_path, 'w') as outFile:
         print(json.dumps(prev_pubs, indent=2, sort_keys=True), file=outFile)
 
+
+
+def save_publication_index_to_file(save_dir_name, publication_dict):
+    """Build a publication index for publication_dict and save it in save_dir_name in the current working directory.
+    
+    The index is saved as PUBLICATION_INDEX_FILENAME and is meant to sit next to 
+    the publications.json file publication_dict was saved as, so later runs that 
+    compare against those publications don't have to rebuild it. The size and 
+    modification time of publications.json are saved with the index so 
+    load_publication_index can tell if the file changed after the index was saved.
+    
+    Args:
+        save_dir_name (str): directory name to append to the current working directory to save the index in.
+        publication_dict (dict): dictionary with publication ids as the keys to the dict.
+    """
+    
+    pub_index = helper_functions.build_publication_index(publication_dict)
+    pub_index["publications_file"] = _get_file_stamp(os.path.join(os.getcwd(), save_dir_name, "publications.json"))
+    save_json_to_file(save_dir_name, PUBLICATION_INDEX_FILENAME, pub_index, sort_keys=False)
+
+
+
+
+def save_report_manifest_to_file(save_dir_name, report_manifest):
+    """Save the report manifest in save_dir_name in the current working directory.
+    
+    The manifest is saved as REPORT_MANIFEST_FILENAME so the next run can find 
+    which of its reports have the same inputs, see read_previous_report_manifest.
+    
+    Args:
+        save_dir_name (str): directory name to append to the current working directory to save the manifest in.
+        report_manifest (dict): {"reports":{filename:{"hash":str|None, "filename":str|None}}}, keys are the filenames reports were configured with.
+    """
+    
+    manifest = {"version":REPORT_MANIFEST_VERSION, "reports":report_manifest["reports"]}
+    save_json_to_file(save_dir_name, REPORT_MANIFEST_FILENAME, manifest, sort_keys=False)
+
         
         
 
@@ -144,16 +370,7 @@ def read_text_from_docx(doc_path):
         Exception: If file opening has a problem will raise an exception.
     """
     
-    ## https://stackoverflow.com/questions/25228106/how-to-extract-text-from-an-existing-docx-file-using-python-docx
-    if os.path.exists(doc_path):
-        try:
-            document = docx.Document(doc_path)
-            return u"\n".join([u"".join([r.text for r in paragraph._element.xpath(".//w:t")]) for paragraph in document.paragraphs])
-        except Exception as e:
-            raise e
-    else:
-        helper_functions.vprint("No such file: " + doc_path)
-        sys.exit()
+    return u"\n".join(iter_lines_from_docx(doc_path))
 
 
 
@@ -183,6 +400,172 @@ def read_text_from_txt(doc_path):
         sys.exit()
     
 
+def iter_lines_from_docx(doc_path):
+    """Open docx file at doc_path and yield its contents one line at a time.
+    
+    The lines are the same as read_text_from_docx(doc_path).split("\\n").
+    
+    Args:
+        doc_path (str): path to docx file.
+        
+    Yields:
+        (str): the next line of the docx file without the newline character.
+    
+    Raises:
+        Exception: If file opening has a problem will raise an exception.
+    """
+    
+    if os.path.exists(doc_path):
+        is_empty = True
+        for paragraph_text in _iter_paragraph_text_from_docx(doc_path):
+            is_empty = False
+            yield from paragraph_text.split("\n")
+        if is_empty:
+            yield ""
+    else:
+        helper_functions.vprint("No such file: " + doc_path)
+        sys.exit()
+
+
+
+def _iter_paragraph_text_from_docx(doc_path):
+    """Yield the text of each paragraph in the body of the docx file at doc_path.
+    
+    The document part is streamed straight out of the docx zip, so the whole 
+    document is never held in memory. Files without the usual document part 
+    are read with python-docx instead.
+    
+    Args:
+        doc_path (str): path to docx file.
+        
+    Yields:
+        (str): the text of the next paragraph, which is all of its w:t elements concatenated.
+    """
+    
+    if zipfile.is_zipfile(doc_path):
+        with zipfile.ZipFile(doc_path) as docx_zip:
+            if DOCX_DOCUMENT_PART in docx_zip.namelist():
+                with docx_zip.open(DOCX_DOCUMENT_PART) as document_xml:
+                    yield from _iter_paragraph_text_from_document_xml(document_xml)
+                return
+    
+    ## https://stackoverflow.com/questions/25228106/how-to-extract-text-from-an-existing-docx-file-using-python-docx
+    document = docx.Document(doc_path)
+    for paragraph in document.paragraphs:
+        yield u"".join([r.text for r in paragraph._element.xpath(".//w:t")])
+
+
+
+def _iter_paragraph_text_from_document_xml(document_xml):
+    """Yield the text of each paragraph that is a direct child of the body in a docx document part.
+    
+    These are the same paragraphs as python-docx's Document.paragraphs. Each 
+    element of the body is cleared once it has been read.
+    
+    Args:
+        document_xml (file): file object of the word/document.xml part of a docx file.
+        
+    Yields:
+        (str): the text of the next paragraph, which is all of its w:t elements concatenated.
+    """
+    
+    depth = 0
+    body = None
+    in_paragraph = False
+    paragraph_texts = []
+    for event, element in xml.etree.ElementTree.iterparse(document_xml, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 2 and element.tag == DOCX_BODY_TAG:
+                body = element
+            elif depth == 3 and body is not None and element.tag == DOCX_PARAGRAPH_TAG:
+                in_paragraph = True
+            continue
+        
+        depth -= 1
+        if in_paragraph and element.tag == DOCX_TEXT_TAG:
+            paragraph_texts.append(element.text if element.text else "")
+        elif depth == 2 and body is not None:
+            if in_paragraph:
+                yield u"".join(paragraph_texts)
+                paragraph_texts = []
+                in_paragraph = False
+            body.clear()
+
+
+
+def iter_lines_from_txt(doc_path):
+    """Open txt or csv file at doc_path and yield its contents one line at a time.
+    
+    The file is read incrementally, but the lines are the same as 
+    read_text_from_txt(doc_path).split("\\n").
+    
+    Args:
+        doc_path (str): path to txt or csv file.
+        
+    Yields:
+        (str): the next line of the txt or csv file without the newline character.
+    
+    Raises:
+        Exception: If file opening has a problem will raise an exception.
+    """
+    
+    if os.path.exists(doc_path):
+        with open(doc_path, encoding = "utf-8") as document:
+            line = "\n"
+            for line in document:
+                yield line[:-1] if line.endswith("\n") else line
+            ## Splitting a string that ends in a newline gives an empty string at the end.
+            if line.endswith("\n"):
+                yield ""
+    else:
+        helper_functions.vprint("No such file: " + doc_path)
+        sys.exit()
+
+
+
+def iter_MEDLINE_lines_from_txt(doc_path):
+    """Memory map the MEDLINE formatted txt file at doc_path and yield the lines needed to tokenize it.
+    
+    The file is scanned in place with MEDLINE_TOKENIZED_LINES_REGEX, so it is 
+    never read into memory as a whole and only the lines that 
+    citation_parsing.iter_MEDLINE_citations uses are decoded. Tokenizing these 
+    lines gives the same citations as tokenizing iter_lines_from_txt(doc_path). 
+    The regex only knows about \\n line endings, so files with a \\r in them 
+    fall back to iter_lines_from_txt.
+    
+    Args:
+        doc_path (str): path to MEDLINE formatted txt file.
+        
+    Yields:
+        (str): the next needed line of the file without the newline character.
+    """
+    
+    if not os.path.exists(doc_path):
+        helper_functions.vprint("No such file: " + doc_path)
+        sys.exit()
+    
+    ## An empty file can't be memory mapped.
+    if os.path.getsize(doc_path) == 0:
+        yield ""
+        return
+    
+    with open(doc_path, "rb") as document, mmap.mmap(document.fileno(), 0, access=mmap.ACCESS_READ) as mapped_document:
+        if mapped_document.find(b"\r") != -1:
+            yield from iter_lines_from_txt(doc_path)
+            return
+        
+        ## The regex matches from the newline before each line, so the first line has to be matched on its own.
+        position = 0
+        if first_match := MEDLINE_TOKENIZED_FIRST_LINE_REGEX.match(mapped_document):
+            yield from first_match.group(1).decode("utf-8").split("\n")
+            position = first_match.end()
+        
+        for match in MEDLINE_TOKENIZED_LINES_REGEX.finditer(mapped_document, position):
+            yield from match.group(1).decode("utf-8").split("\n")
+
+
+
 def read_csv(doc_path):
     """Read csv into a pandas dataframe.
     
@@ -197,6 +580,8 @@ def read_csv(doc_path):
     """
     
     if os.path.exists(doc_path):
+        import pandas
+        
         try:
             df = pandas.read_csv(doc_path)
         except Exception as e:
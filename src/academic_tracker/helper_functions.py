@@ -8,6 +8,9 @@ This module contains helper functions, such as printing, and regex searching.
 
 import re
 import copy
+import json
+import hashlib
+import functools
 import collections.abc
 import xml.etree.ElementTree as ET
 
@@ -20,6 +23,34 @@ DOI_URL = webio.DOI_URL
 PUBLICATION_TEMPLATE = webio.PUBLICATION_TEMPLATE
 
 
+## Registry of the regular expressions used repeatedly throughout the package, compiled once at import.
+## Patterns that have to be built at run time should go through compile_regex instead.
+REGEXES = {"doi_in_text":re.compile(r"(?i).*doi:\s*([^\s]+\w).*"),
+           "pmid_in_text":re.compile(r"(?i).*pmid:\s*(\d+).*"),
+           "doi_org_suffix":re.compile(r".*doi.org/(.*)"),
+           "doi_url":re.compile(r"https?://doi.org/(.*)"),
+           "ORCID":re.compile(r"(\d{4}-\d{4}-\d{4}-\d{3}[0,1,2,3,4,5,6,7,8,9,X])"),
+           "alt_ORCID":re.compile(r"(\d{4}\d{4}\d{4}\d{3}[0,1,2,3,4,5,6,7,8,9,X])"),
+           "tracker_dir":re.compile(r"tracker-(\d{10})"),
+           "timestamp_separators":re.compile(r"\-| |\:"),
+           "http":re.compile(r"http.*"),
+           "myncbi_url":re.compile(r".*ncbi.nlm.nih.gov/myncbi.*"),
+           "has_period":re.compile(r".*\..*"),
+           "initials":re.compile(r"([a-zA-Z]\.)+"),
+           "report_keyword":re.compile(r"<[^<>]*>")}
+
+REPORT_LOOP_TAGS = ["project_loop", "author_loop", "pub_loop", "pub_author_loop", "reference_loop"]
+
+## Each report loop gets a pattern to pull out what is inside of the loop tags, 
+## and a "_block" pattern to replace the whole loop including its tags.
+for _loop_tag in REPORT_LOOP_TAGS:
+    REGEXES[_loop_tag] = re.compile(r"(?s).*<" + _loop_tag + r">(.*)</" + _loop_tag + r">.*")
+    REGEXES[_loop_tag + "_block"] = re.compile(r"(?s)<" + _loop_tag + r">.*</" + _loop_tag + r">")
+del _loop_tag
+
+REGEX_CACHE_SIZE = 1024
+
+
 def vprint(*args, verbosity=0):
     """Print depending on the state of VERBOSE, SILENT, and verbosity.
     
@@ -123,6 +154,40 @@ def adjust_author_attributes(authors_by_project_dict, config_dict):
 
 
     
+@functools.lru_cache(maxsize=REGEX_CACHE_SIZE)
+def _compile_regex_string(regex):
+    """Compile regex and keep it in a bounded cache.
+    
+    Args:
+        regex (str): A string with a regular expression to compile.
+        
+    Returns:
+        (re.Pattern): the compiled regex.
+    """
+    
+    return re.compile(regex)
+
+
+def compile_regex(regex):
+    """Return regex compiled.
+    
+    Already compiled patterns are returned as is. Strings are compiled through 
+    a bounded cache, so patterns built at run time are only compiled once no 
+    matter how many different patterns the re module has seen since.
+    
+    Args:
+        regex (str|re.Pattern): A regular expression as a string or already compiled.
+        
+    Returns:
+        (re.Pattern): the compiled regex.
+    """
+    
+    if isinstance(regex, re.Pattern):
+        return regex
+    return _compile_regex_string(regex)
+
+
+
 def regex_match_return(regex, string_to_match):
     """Return the groups matched in the regex if the regex matches.
     
@@ -130,14 +195,14 @@ def regex_match_return(regex, string_to_match):
     the match.groups() is returned, otherwise an empty tuple is returned.
     
     Args:
-        regex (str): A string with a regular expression to be delivered to re.match().
+        regex (str|re.Pattern): A regular expression to be delivered to re.match(), either a string or compiled.
         string_to_match (str): The string to match with the regex.
         
     Returns:
         (tuple): either the tuple of the matched groups in the regex or an empty tuple if a match wasn't found.
     """
     
-    match = re.match(regex, string_to_match)
+    match = compile_regex(regex).match(string_to_match)
     return match.groups() if match else ()
 
 
@@ -166,27 +231,31 @@ def regex_search_return(regex, string_to_search):
     the match.groups() is returned, otherwise an empty tuple is returned.
     
     Args:
-        regex (str): A string with a regular expression to be delivered to re.search().
+        regex (str|re.Pattern): A regular expression to be delivered to re.search(), either a string or compiled.
         string_to_search (str): The string to match with the regex.
     
     Returns:
         (tuple): either the tuple of the matched groups in the regex or an empty tuple if a match wasn't found.
     """
     
-    match = re.search(regex, string_to_search)
+    match = compile_regex(regex).search(string_to_search)
     return match.groups() if match else ()
 
 
 def _generate_first_name_match_regex(name):
     """Generate a regular expression to match the given first name.
     
+    The name is escaped, so any characters in it are matched literally, and 
+    the compiled regex comes from the bounded cache in compile_regex.
+    
     Args:
         name (str): first name to generate regex for.
     
     Returns:
-        (str) regular expression to use with re.match().
+        (re.Pattern) compiled regular expression to use with match().
     """
-    return ".* " + name + "|" + name + " .*|" + name
+    name = re.escape(name)
+    return compile_regex(".* " + name + "|" + name + " .*|" + name)
 
 
 def do_strings_fuzzy_match(string1, string2, match_ratio=90):
@@ -339,50 +408,39 @@ def match_pub_authors_to_citation_authors(citation_authors, author_list):
     Returns:
         (bool): True if an author was matched, False otherwise.
     """
+    if not author_list:
+        return False
+    
+    ## Normalize the citation authors once so each pub author can be checked against them in constant time.
+    citation_ORCIDs = set()
+    citation_last_names = set()
+    citation_collective_names = []
+    for author_attributes in citation_authors:
+        if "ORCID" in author_attributes:
+            citation_ORCIDs.add(author_attributes["ORCID"])
+        
+        if "collective_name" in author_attributes:
+            if author_attributes["collective_name"] is not None:
+                citation_collective_names.append(author_attributes["collective_name"])
+        elif "last" in author_attributes:
+            citation_last_names.add(author_attributes["last"].replace(".","").lower())
+    
     for author_items in author_list:
-        is_collective_author = False
-        has_collective_name = False
-        if "collectivename" in author_items:
-            is_collective_author = True
-            if author_items["collectivename"] is not None:
-                has_collective_name = True
-                author_items_collective_name = author_items["collectivename"]
+        ## Try to match on ORCID.
+        if author_items["ORCID"] and author_items["ORCID"] in citation_ORCIDs:
+            return True
         
-        else:
-            can_name_match = True
-            if author_items["lastname"] is None:
-                can_name_match = False
-            else:
-                author_items_last_name = author_items["lastname"].replace(".","").lower()
-                                    
-        for author_attributes in citation_authors:
-            ## Try to match on ORCID.
-            if author_items["ORCID"] and "ORCID" in author_attributes and author_items["ORCID"] == author_attributes["ORCID"]:
-                return True
-            
-            citation_is_collective_author = False
-            citation_has_collective_name = False
-            if "collective_name" in author_attributes:
-                citation_is_collective_author = True
-                if author_attributes["collective_name"] is not None:
-                    citation_has_collective_name = True
-                    citation_author_collective_name = author_attributes["collective_name"]
-            
-            ## If it is a collective author then match on collectivename, else match on first and last.
-            if is_collective_author:
-                if not has_collective_name or \
-                   not citation_is_collective_author or \
-                   not citation_has_collective_name:
-                    continue
-                
-                if do_strings_fuzzy_match(citation_author_collective_name, author_items_collective_name):
-                       return True
-            
-            elif not citation_is_collective_author:
-                citation_author_last_name = author_attributes["last"].replace(".","").lower()
+        ## If it is a collective author then match on collectivename, else match on last name.
+        if "collectivename" in author_items:
+            if author_items["collectivename"] is None:
+                continue
             
-                if can_name_match and citation_author_last_name == author_items_last_name:
+            for citation_author_collective_name in citation_collective_names:
+                if do_strings_fuzzy_match(citation_author_collective_name, author_items["collectivename"]):
                     return True
+        
+        elif author_items["lastname"] is not None and author_items["lastname"].replace(".","").lower() in citation_last_names:
+            return True
                 
     return False
 
@@ -465,7 +523,7 @@ def match_pub_authors_to_config_authors(authors_json, author_list):
                 ## The first name is matched with an additional .* to try and allow for the addition of initials, but this could cause bad matches. 
                 ## For example the name Hu will match Hubert. Counting on the last name to reduce errors.
                 ## Note that the PubMed query will return publications where the author is just a collaborater, so not finding a match in the authors isn't uncommon.
-                if can_name_match and re.match(_generate_first_name_match_regex(author_json_first_name), author_items_first_name) and \
+                if can_name_match and _generate_first_name_match_regex(author_json_first_name).match(author_items_first_name) and \
                    author_json_last_name == author_items_last_name:
                     ## affiliations in author_attributes are sets of strings so see if any are in the author_items string.
                     if any([affiliation.lower() in author_items_affiliation for affiliation in author_attributes["affiliations"]]):
@@ -579,7 +637,7 @@ def match_authors_in_prev_pub(prev_author_list, new_author_list):
                 prev_firstname_adjusted = prev_author_attributes["firstname"].replace(".","").lower()
                 prev_lastname_adjusted = prev_author_attributes["lastname"].replace(".","").lower()
                 
-                if re.match(_generate_first_name_match_regex(new_firstname_adjusted), prev_firstname_adjusted) and \
+                if _generate_first_name_match_regex(new_firstname_adjusted).match(prev_firstname_adjusted) and \
                    new_lastname_adjusted == prev_lastname_adjusted:
                         new_author_matched = True
                         if (author_id := new_author_attributes.get("author_id")) and not prev_author_attributes.get("author_id"):
@@ -692,10 +750,10 @@ def _compute_common_phrase_percent(prev_citation, new_citation, characters_to_re
         ((int, int)|None): if either citation is None or empty after character removal and stripping, then return None, else the percentage of common to uncommon phrase length for each citation.
     """
     if prev_citation and new_citation:
-        citation_strip_regex = "|".join([f"\\{char}" for char in characters_to_remove])
+        citation_strip_regex = compile_regex("|".join([re.escape(char) for char in characters_to_remove]))
         # citation_strip_regex = r"\.|,|;|\(|\)|\[|\]|\{|\}"
-        stripped_prev_citation = re.sub(citation_strip_regex, "", prev_citation.lower())
-        stripped_new_citation = re.sub(citation_strip_regex, "", new_citation.lower())
+        stripped_prev_citation = citation_strip_regex.sub("", prev_citation.lower())
+        stripped_new_citation = citation_strip_regex.sub("", new_citation.lower())
         
         common_subphrases = find_common_subphrases(stripped_prev_citation, stripped_new_citation, min_len)
         
@@ -845,21 +903,43 @@ def create_pub_dict_for_saving_PubMed(pub, include_xml=False):
 
 
 
-def create_pub_dict_for_saving_Crossref(work, prev_query):
-    """Create the standard pub_dict from a Crossref query work dict.
+def get_PubMed_pub_id(pub):
+    """Get the ID of a pymed.PubMedArticle without building the whole pub_dict.
+    
+    The ID is the same one create_pub_dict_for_saving_PubMed returns, but only the 
+    article IDs in the XML are read, so it is cheap to call on every queried publication.
+    
+    Args:
+        pub (pymed.PubMedArticle): publication to get the ID for.
+        
+    Returns:
+        (str|None): the ID of the publication (DOI or PMID).
+    """
+    
+    if (doi := pub.xml.find("PubmedData/ArticleIdList/ArticleId[@IdType='doi']")) is not None:
+        return DOI_URL + doi.text.lower()
+    
+    if (pmid := pub.xml.find("PubmedData/ArticleIdList/ArticleId[@IdType='pubmed']")) is not None:
+        return pmid.text
+    
+    return None
+
+
+
+def get_Crossref_pub_id(work, prev_query):
+    """Get the ID of a Crossref query work dict without building the whole pub_dict.
     
     Args:
         work (dict): the dictionary for a publication returned in a Crossref query.
         prev_query (dict|None): a dictionary containing publications from a previous query, used for message printing.
     
     Returns:
-        pub_id (str|None): the ID of the publication (DOI, PMID, or URL). If None, an ID couldn't be determined.
-        pub_dict (dict|None): the standard pub_dict with values filled in from the Crossref publication. If None, an ID couldn't be determined.
+        pub_id (str|None): the ID of the publication (DOI or URL). If None, an ID couldn't be determined.
     """
     if "title" in work:
         title = work["title"][0]
     else:
-        return None, None
+        return None
     
     ## Look for DOI
     doi = work["DOI"].lower() if "DOI" in work else None
@@ -882,45 +962,25 @@ def create_pub_dict_for_saving_Crossref(work, prev_query):
     elif not prev_query:
         vprint("Warning: Could not find a DOI or external URL for a publication when searching Crossref. It will not be in the publications.", verbosity=1)
         vprint("Title: " + title, verbosity=1)
-        return None, None
+        return None
     else:
-        return None, None
+        return None
     
-    ## Determine authors and put them in unified form.
-    new_author_list = []
-    if "author" in work:
-        for cr_author_dict in work["author"]:
-            temp_dict = {}
-            
-            orcid = None
-            if "ORCID" in cr_author_dict:
-                orcid = extract_ORCID_from_string(cr_author_dict["ORCID"])
-            temp_dict["ORCID"] = orcid
-            
-            temp_dict["author_id"] = None
-            
-            ## If "name" is in dict then it is a collective author and not an individual.
-            if "name" in cr_author_dict:
-                temp_dict["collectivename"] = cr_author_dict["name"]
-            
-            else:
-                temp_dict["lastname"] = cr_author_dict.get("family")
-                temp_dict["firstname"] = cr_author_dict.get("given")
-                temp_dict["initials"] = None
-                
-                affiliations = []
-                if cr_author_dict["affiliation"]:
-                    for affiliation in cr_author_dict["affiliation"]:
-                        if aff_text := affiliation.get("name"):
-                            affiliations.append(aff_text)
-                temp_dict["affiliation"] = '\n'.join(affiliations) if affiliations else None
-            
-            ## Only add authors that have at least 1 non-null value.
-            if not all([value is None for value in temp_dict.values()]):
-                new_author_list.append(temp_dict)
+    return pub_id
+
+
+
+def get_Crossref_publication_date(work):
+    """Get the year, month, and day a Crossref query work dict was published.
     
+    Args:
+        work (dict): the dictionary for a publication returned in a Crossref query.
     
-    ## Find published date
+    Returns:
+        publication_year (int|None): the year published, None if it couldn't be found.
+        publication_month (int|None): the month published, None if it couldn't be found.
+        publication_day (int|None): the day published, None if it couldn't be found.
+    """
     date_found = False
     if "published" in work:
         date_key = "published"
@@ -956,6 +1016,70 @@ def create_pub_dict_for_saving_Crossref(work, prev_query):
         publication_month = None
         publication_day = None
     
+    return publication_year, publication_month, publication_day
+
+
+
+def create_pub_dict_for_saving_Crossref(work, prev_query, pub_id=None, publication_date=None):
+    """Create the standard pub_dict from a Crossref query work dict.
+    
+    Args:
+        work (dict): the dictionary for a publication returned in a Crossref query.
+        prev_query (dict|None): a dictionary containing publications from a previous query, used for message printing.
+        pub_id (str|None): the ID already found for work by get_Crossref_pub_id, it is found again if None.
+        publication_date (tuple|None): the (year, month, day) already found for work by get_Crossref_publication_date, it is found again if None.
+    
+    Returns:
+        pub_id (str|None): the ID of the publication (DOI, PMID, or URL). If None, an ID couldn't be determined.
+        pub_dict (dict|None): the standard pub_dict with values filled in from the Crossref publication. If None, an ID couldn't be determined.
+    """
+    if pub_id is None:
+        pub_id = get_Crossref_pub_id(work, prev_query)
+    if pub_id is None:
+        return None, None
+    
+    title = work["title"][0]
+    doi = work["DOI"].lower() if "DOI" in work else None
+    
+    ## Determine authors and put them in unified form.
+    new_author_list = []
+    if "author" in work:
+        for cr_author_dict in work["author"]:
+            temp_dict = {}
+            
+            orcid = None
+            if "ORCID" in cr_author_dict:
+                orcid = extract_ORCID_from_string(cr_author_dict["ORCID"])
+            temp_dict["ORCID"] = orcid
+            
+            temp_dict["author_id"] = None
+            
+            ## If "name" is in dict then it is a collective author and not an individual.
+            if "name" in cr_author_dict:
+                temp_dict["collectivename"] = cr_author_dict["name"]
+            
+            else:
+                temp_dict["lastname"] = cr_author_dict.get("family")
+                temp_dict["firstname"] = cr_author_dict.get("given")
+                temp_dict["initials"] = None
+                
+                affiliations = []
+                if cr_author_dict["affiliation"]:
+                    for affiliation in cr_author_dict["affiliation"]:
+                        if aff_text := affiliation.get("name"):
+                            affiliations.append(aff_text)
+                temp_dict["affiliation"] = '\n'.join(affiliations) if affiliations else None
+            
+            ## Only add authors that have at least 1 non-null value.
+            if not all([value is None for value in temp_dict.values()]):
+                new_author_list.append(temp_dict)
+    
+    
+    ## Find published date
+    if publication_date is None:
+        publication_date = get_Crossref_publication_date(work)
+    publication_year, publication_month, publication_day = publication_date
+    
     
     ## look for grants in results
     found_grants = []
@@ -1009,8 +1133,8 @@ def create_pub_dict_for_saving_Crossref(work, prev_query):
 
 
 
-ORCID_regex = r"(\d{4}-\d{4}-\d{4}-\d{3}[0,1,2,3,4,5,6,7,8,9,X])"
-alt_ORCID_regex = r"(\d{4}\d{4}\d{4}\d{3}[0,1,2,3,4,5,6,7,8,9,X])"
+ORCID_regex = REGEXES["ORCID"]
+alt_ORCID_regex = REGEXES["alt_ORCID"]
 def extract_ORCID_from_string(string):
     """Extract an ORCID ID from a string.
     
@@ -1021,9 +1145,9 @@ def extract_ORCID_from_string(string):
         (str|None): either the extracted ID as a string or None.
     """
     
-    if re_match := re.search(ORCID_regex, string):
+    if re_match := ORCID_regex.search(string):
         return re_match.groups()[0]
-    elif re_match := re.search(alt_ORCID_regex, string):
+    elif re_match := alt_ORCID_regex.search(string):
         captured_string = re_match.groups()[0]
         new_string = captured_string[0:4] + '-' + captured_string[4:8] + '-' + captured_string[8:12] + '-' + captured_string[12:]
         return new_string
@@ -1210,33 +1334,160 @@ def find_duplicate_citations(tokenized_citations):
     
     
 
-def are_citations_in_pub_dict(tokenized_citations, pub_dict):
+def are_citations_in_pub_dict(tokenized_citations, pub_dict, pub_index=None):
     """Determine which citations in tokenized_citations are in pub_dict.
-    
-    For each citation in tokenized_citations see if it is in pub_dict. Will be 
-    True for a citation if the PMID matches, DOI matches, or the title is similar 
-    enough.
-    
+
+    For each citation in tokenized_citations see if it is in pub_dict. Will be
+    True for a citation if the PMID matches, DOI matches, or the title is similar
+    enough. The comparison is done through a publication index, so if one was
+    already built or read from file for pub_dict it can be passed in, otherwise
+    one is built.
+
     Args:
         tokenized_citation (list): list of dictionaries where each dictionary is a citation. Matches the tokenized_reference.json schema.
         pub_dict (dict): schema matches the publication.json schema.
-    
+        pub_index (dict|None): index for pub_dict created by build_publication_index. If None, then it is built from pub_dict.
+
     Returns:
         (list): list of bools, True if the citation at that index is in pub_dict, False otherwise.
     """
-    
-    pub_titles = [pub["title"] for pub in pub_dict.values() if pub["title"]]
-    pub_dois = [doi.lower() for pub in pub_dict.values() if (doi := normalize_DOI(pub["doi"]))]
-    pub_pmids = [pub["pubmed_id"] for pub in pub_dict.values() if pub["pubmed_id"]]
-    
-    return [True if citation["PMID"] in pub_pmids or ((doi := normalize_DOI(citation["DOI"])) and doi.lower()) in pub_dois or is_fuzzy_match_to_list(citation["title"], pub_titles) else False for citation in tokenized_citations]
+
+    if pub_index is None:
+        pub_index = build_publication_index(pub_dict)
+
+    return [True if find_citation_in_publication_index(citation, pub_dict, pub_index) else False for citation in tokenized_citations]
+
+
+
+def _normalize_PMID(pmid):
+    """Return pmid as a stripped string, or None if it is empty.
+
+    Args:
+        pmid (str|int|None): PMID to normalize.
+
+    Returns:
+        (str|None): the normalized PMID or None.
+    """
+    if pmid is None:
+        return None
+    pmid = str(pmid).strip()
+    return pmid if pmid else None
+
+
+def _title_length(title):
+    """Return the length of the title the same way do_strings_fuzzy_match sees it.
+
+    Args:
+        title (str): title to get the length of.
+
+    Returns:
+        (int): length of the lowercased title.
+    """
+    return len(title.lower())
+
+
+def _can_lengths_fuzzy_match(length1, length2, match_ratio=90):
+    """True if strings of the given lengths could possibly reach match_ratio.
+
+    The ratio computed by fuzzywuzzy can never be larger than 2*min(length1, length2) / (length1 + length2),
+    so any string whose length is too different cannot match and doesn't need to be compared.
+    The ratio is rounded by fuzzywuzzy, so half a point is allowed for.
+
+    Args:
+        length1 (int): length of the first string.
+        length2 (int): length of the second string.
+        match_ratio (int): the ratio (0-100) that a match must be greater than or equal to.
+
+    Returns:
+        (bool): True if the lengths don't rule out a match, False otherwise.
+    """
+    if length1 + length2 == 0:
+        return False
+    return 200 * min(length1, length2) / (length1 + length2) >= match_ratio - 0.5
+
+
+def build_publication_index(publication_dict):
+    """Build hash tables and a title blocking index for publication_dict.
+
+    The index has normalized DOIs and PMIDs mapped to the pub_id they belong to, 
+    and titles blocked by their length so only titles that could possibly be a 
+    fuzzy match need to be compared.
+
+    Args:
+        publication_dict (dict): schema matches the publication.json schema.
+
+    Returns:
+        pub_index (dict): {"DOI":{doi:pub_id}, "PMID":{pmid:pub_id}, "title_lengths":{length:[pub_id, ...]}}
+    """
+
+    pub_index = {"DOI":{},
+                 "PMID":{},
+                 "title_lengths":{}}
+    for pub_id, pub in publication_dict.items():
+        if doi := normalize_DOI(pub.get("doi")):
+            pub_index["DOI"].setdefault(doi.lower(), pub_id)
+        if pmid := _normalize_PMID(pub.get("pubmed_id")):
+            pub_index["PMID"].setdefault(pmid, pub_id)
+        if title := pub.get("title"):
+            ## Keys are strings so the index survives a round trip through JSON.
+            pub_index["title_lengths"].setdefault(str(_title_length(title)), []).append(pub_id)
+
+    return pub_index
+
+
+def publication_fingerprint(pub_id, pub):
+    """Compute a hash of everything in a publication, so reports built from it can tell when it changes.
+
+    Args:
+        pub_id (str): the key to the publication in its publication_dict.
+        pub (dict): the publication's attributes, schema matches a publication in the publication.json schema.
+
+    Returns:
+        (str): hex digest identifying pub_id and all of pub's content.
+    """
+
+    return hashlib.sha256(json.dumps([pub_id, pub], sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def find_citation_in_publication_index(citation, publication_dict, pub_index):
+    """Find the pub_id in publication_dict that matches the citation using pub_index.
+
+    A citation matches on PMID, DOI, or by having a title that fuzzy matches.
+    IDs are looked up in the hash tables of the index, and for titles only the
+    block of titles with compatible lengths are fuzzy matched.
+
+    Args:
+        citation (dict): a tokenized citation. Matches the tokenized_reference.json schema.
+        publication_dict (dict): schema matches the publication.json schema.
+        pub_index (dict): index for publication_dict created by build_publication_index.
+
+    Returns:
+        (str|None): the pub_id of the matching publication, or None if there isn't one.
+    """
+
+    if (pmid := _normalize_PMID(citation.get("PMID"))) and pmid in pub_index["PMID"]:
+        return pub_index["PMID"][pmid]
+
+    if (doi := normalize_DOI(citation.get("DOI"))) and doi.lower() in pub_index["DOI"]:
+        return pub_index["DOI"][doi.lower()]
+
+    if title := citation.get("title"):
+        title_length = _title_length(title)
+        for length, pub_ids in pub_index["title_lengths"].items():
+            if not _can_lengths_fuzzy_match(title_length, int(length)):
+                continue
+            for pub_id in pub_ids:
+                if do_strings_fuzzy_match(title, publication_dict[pub_id]["title"]):
+                    return pub_id
+
+    return None
 
 
 def normalize_DOI(doi_string):
     """
     """
     if doi_string:
-        if doi_match := regex_match_return(r'https?://doi.org/(.*)', doi_string):
+        if doi_match := regex_match_return(REGEXES["doi_url"], doi_string):
             return doi_match[0]
         return doi_string
     return None
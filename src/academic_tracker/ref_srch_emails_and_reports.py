@@ -6,13 +6,9 @@ Reference Search Emails and Reports
 Functions to create emails and reports for reference_search.
 """
 
-import re
 import copy
 import os
 
-import pandas
-
-from . import helper_functions
 from . import fileio
 from . import emails_and_reports_helpers
 
@@ -67,7 +63,24 @@ def convert_tokenized_authors_to_str(authors):
 
 
 
+def create_citation_index_by_pub_id(tokenized_citations):
+    """Create a dictionary to look up the first tokenized citation matched to each publication.
+    
+    Args:
+        tokenized_citations (list): list of dicts. Matches the JSON schema for tokenized citations.
+        
+    Returns:
+        citation_index_by_pub_id (dict): keys are the pub_dict_key of citations and values are the index of the first citation in tokenized_citations with that key.
+    """
+    
+    citation_index_by_pub_id = {}
+    for index, citation in enumerate(tokenized_citations):
+        citation_index_by_pub_id.setdefault(citation["pub_dict_key"], index)
     
+    return citation_index_by_pub_id
+
+
+
 def create_report_from_template(publication_dict, is_citation_in_prev_pubs_list, tokenized_citations, template_string = DEFAULT_SUMMARY_TEMPLATE):
     """Create project report based on template_string.
     
@@ -84,42 +97,49 @@ def create_report_from_template(publication_dict, is_citation_in_prev_pubs_list,
         report (str): text of the created report.
     """
     
-    matching_key_for_citation = [citation["pub_dict_key"] for citation in tokenized_citations]
+    citation_index_by_pub_id = create_citation_index_by_pub_id(tokenized_citations)
     
-    pub_template = helper_functions.regex_group_return(helper_functions.regex_match_return(r"(?s).*<pub_loop>(.*)</pub_loop>.*", template_string), 0)
-    pub_author_template = helper_functions.regex_group_return(helper_functions.regex_match_return(r"(?s).*<pub_author_loop>(.*)</pub_author_loop>.*", template_string), 0)
-    reference_template = helper_functions.regex_group_return(helper_functions.regex_match_return(r"(?s).*<reference_loop>(.*)</reference_loop>.*", template_string), 0)
-
+    loop_templates = emails_and_reports_helpers._extract_loop_templates(template_string)
+    pub_template = loop_templates["pub_loop"]
+    pub_author_template = loop_templates["pub_author_loop"]
+    reference_template = loop_templates["reference_loop"]
     
-    report_string = ""
+    ## Without pub_author or reference loops in it the pub template is the same for every pub, so it is only compiled once.
+    if any(emails_and_reports_helpers._find_loop_block(pub_template, loop_tag) is not None for loop_tag in ["pub_author_loop", "reference_loop"]):
+        compiled_pub_template = None
+    else:
+        compiled_pub_template = emails_and_reports_helpers.compile_template_string(pub_template)
+    
+    pubs = []
     for pub_id, pub_values in publication_dict.items():
-        pub_template_copy = pub_template
-        tok_index = matching_key_for_citation.index(pub_id)
+        tok_index = citation_index_by_pub_id[pub_id]
         tokenized_citation = tokenized_citations[tok_index]
         is_citation_in_prev_pubs = is_citation_in_prev_pubs_list[tok_index] if is_citation_in_prev_pubs_list else None
         
-        pub_template_copy = emails_and_reports_helpers._replace_pub_author_and_reference_loops(publication_dict, 
-                                                                                               pub_id, 
-                                                                                               pub_template_copy, 
-                                                                                               pub_author_template, 
-                                                                                               reference_template)
-                
-        pub_template_copy = emails_and_reports_helpers._replace_keywords({"1":pub_template_copy}, 
-                                                                         publication_dict, {}, 
-                                                                         pub=pub_id, 
-                                                                         tokenized_citation=tokenized_citation, 
-                                                                         is_citation_in_prev_pubs=is_citation_in_prev_pubs)["1"]
+        if compiled_pub_template is None:
+            pub_template_copy = emails_and_reports_helpers._replace_pub_author_and_reference_loops(publication_dict, 
+                                                                                                   pub_id, 
+                                                                                                   pub_template, 
+                                                                                                   pub_author_template, 
+                                                                                                   reference_template)
+            compiled_pub = emails_and_reports_helpers._split_template_string(pub_template_copy)
+        else:
+            compiled_pub = compiled_pub_template
                 
-        report_string += pub_template_copy
+        pubs.append(emails_and_reports_helpers._render_template_string(compiled_pub, 
+                                                                       publication_dict, {}, 
+                                                                       pub=pub_id, 
+                                                                       tokenized_citation=tokenized_citation, 
+                                                                       is_citation_in_prev_pubs=is_citation_in_prev_pubs))
         
-    report = re.sub(r"(?s)<pub_loop>.*</pub_loop>", report_string, template_string)
+    report = emails_and_reports_helpers._replace_loop_block(template_string, "pub_loop", "".join(pubs))
 
     return report
 
 
 
 def create_tabular_report(publication_dict, config_dict, is_citation_in_prev_pubs_list, tokenized_citations, save_dir_name):
-    """Create a pandas DataFrame and save it as Excel or CSV.
+    """Build the report rows and save them as Excel or CSV.
     
     Args:
         publication_dict (dict): keys and values match the publications JSON file.
@@ -135,7 +155,7 @@ def create_tabular_report(publication_dict, config_dict, is_citation_in_prev_pub
     
     row_template = copy.deepcopy(config_dict["summary_report"]["columns"])
     
-    matching_key_for_citation = [citation["pub_dict_key"] for citation in tokenized_citations]
+    citation_index_by_pub_id = create_citation_index_by_pub_id(tokenized_citations)
     
     separator = config_dict["summary_report"]["separator"] if "separator" in config_dict["summary_report"] else ","
     
@@ -154,6 +174,8 @@ def create_tabular_report(publication_dict, config_dict, is_citation_in_prev_pub
         filename = "summary_report.csv" if file_format == "csv" else "summary_report.xlsx"
     
     
+    compiled_row_template = emails_and_reports_helpers.compile_template(row_template)
+    
     row_string = "".join(row_template.values()) 
     
     has_pub_author_keywords = False
@@ -166,32 +188,10 @@ def create_tabular_report(publication_dict, config_dict, is_citation_in_prev_pub
         has_reference_keywords = True
     
     
-    rows = []
-    for pub, pub_values in publication_dict.items():
-        tok_index = matching_key_for_citation.index(pub)
-        is_citation_in_prev_pubs = is_citation_in_prev_pubs_list[tok_index] if is_citation_in_prev_pubs_list else None
-        
-        if has_reference_keywords or has_pub_author_keywords:
-            
-            rows += emails_and_reports_helpers._build_pub_author_and_reference_rows(publication_dict, 
-                                                                                    config_dict, 
-                                                                                    has_pub_author_keywords, 
-                                                                                    has_reference_keywords,
-                                                                                    row_template, 
-                                                                                    None, 
-                                                                                    None, 
-                                                                                    pub, 
-                                                                                    tokenized_citations[tok_index], 
-                                                                                    is_citation_in_prev_pubs)
-            
-        else:
-            rows.append(emails_and_reports_helpers._replace_keywords(row_template, 
-                                                                     publication_dict, 
-                                                                     None,
-                                                                     pub=pub, 
-                                                                     tokenized_citation=tokenized_citations[tok_index], 
-                                                                     is_citation_in_prev_pubs=is_citation_in_prev_pubs))
-            
+    rows = _iter_tabular_report_rows(publication_dict, config_dict, compiled_row_template, 
+                                     has_pub_author_keywords, has_reference_keywords, 
+                                     is_citation_in_prev_pubs_list, tokenized_citations, citation_index_by_pub_id)
+    
     report, filename = emails_and_reports_helpers._save_rows_to_file(rows, 
                                                                      filename, 
                                                                      sort, 
@@ -205,6 +205,52 @@ def create_tabular_report(publication_dict, config_dict, is_citation_in_prev_pub
 
 
 
+def _iter_tabular_report_rows(publication_dict, config_dict, compiled_row_template, 
+                              has_pub_author_keywords, has_reference_keywords, 
+                              is_citation_in_prev_pubs_list, tokenized_citations, citation_index_by_pub_id):
+    """Yield the rows for the tabular report as they are built.
+    
+    Args:
+        publication_dict (dict): keys and values match the publications JSON file.
+        config_dict (dict): keys and values match the project tracking configuration JSON file.
+        compiled_row_template (dict): the summary report columns compiled with compile_template.
+        has_pub_author_keywords (bool): if True, then the row template has keywords to replace that are attributes to publication authors.
+        has_reference_keywords (bool): if True, then the row template has keywords to replace that are attributes to publication references.
+        is_citation_in_prev_pubs_list (list): list of bools that indicate whether or not the citation at the same index in tokenized_citations is in the prev_pubs
+        tokenized_citations (list): list of dicts. Matches the JSON schema for tokenized citations.
+        citation_index_by_pub_id (dict): the index in tokenized_citations of the citation for each pub, from create_citation_index_by_pub_id.
+    
+    Yields:
+        row (dict): the row template with values replaced for the next row.
+    """
+    
+    for pub, pub_values in publication_dict.items():
+        tok_index = citation_index_by_pub_id[pub]
+        is_citation_in_prev_pubs = is_citation_in_prev_pubs_list[tok_index] if is_citation_in_prev_pubs_list else None
+        
+        if has_reference_keywords or has_pub_author_keywords:
+            
+            yield from emails_and_reports_helpers._iter_pub_author_and_reference_rows(publication_dict, 
+                                                                                      config_dict, 
+                                                                                      has_pub_author_keywords, 
+                                                                                      has_reference_keywords,
+                                                                                      compiled_row_template, 
+                                                                                      None, 
+                                                                                      None, 
+                                                                                      pub, 
+                                                                                      tokenized_citations[tok_index], 
+                                                                                      is_citation_in_prev_pubs)
+            
+        else:
+            yield emails_and_reports_helpers._render_template(compiled_row_template, 
+                                                              publication_dict, 
+                                                              None,
+                                                              pub=pub, 
+                                                              tokenized_citation=tokenized_citations[tok_index], 
+                                                              is_citation_in_prev_pubs=is_citation_in_prev_pubs)
+
+
+
 # def replace_keywords(template, publication_dict, pub, tokenized_citation, is_citation_in_prev_pubs, pub_author={}):
 #     """Replace keywords in the values of the template dictionary.
     
@@ -287,22 +333,22 @@ def create_tokenization_report(tokenized_citations):
         report_string (str): report text built from tokenized_citations.
     """
     
-    report_string = ""
+    report_lines = []
     for count, citation in enumerate(tokenized_citations):
         if tokenized_citations[count]["reference_line"]:
             pretty_print = tokenized_citations[count]["reference_line"].split("\n")
             pretty_print = " ".join([line.strip() for line in pretty_print])
-            report_string += "Reference Line: \n\t" + pretty_print + "\n"
+            report_lines.append("Reference Line: \n\t" + pretty_print + "\n")
         else:
-            report_string += "Reference Line: \n\tN/A\n"
+            report_lines.append("Reference Line: \n\tN/A\n")
         
-        report_string += "Tokenized Reference: \n\tAuthors: " + convert_tokenized_authors_to_str(citation["authors"])
-        report_string += "\n\tTitle: " + citation["title"] if citation["title"] else "\n\tTitle: None"
-        report_string += "\n\tPMID: " + str(citation["PMID"]) if citation["PMID"] else "\n\tPMID: None"
-        report_string += "\n\tDOI: " + citation["DOI"] if citation["DOI"] else "\n\tDOI: None"
-        report_string += "\n\n"
+        report_lines.append("Tokenized Reference: \n\tAuthors: " + convert_tokenized_authors_to_str(citation["authors"]))
+        report_lines.append("\n\tTitle: " + citation["title"] if citation["title"] else "\n\tTitle: None")
+        report_lines.append("\n\tPMID: " + str(citation["PMID"]) if citation["PMID"] else "\n\tPMID: None")
+        report_lines.append("\n\tDOI: " + citation["DOI"] if citation["DOI"] else "\n\tDOI: None")
+        report_lines.append("\n\n")
         
-    return report_string
+    return "".join(report_lines)
 
 
 
@@ -6,7 +6,6 @@ Reference Search Modularized
 Modularized pieces of reference_search.
 """
 
-import re
 import datetime
 import os
 import sys
@@ -25,7 +24,8 @@ def input_reading_and_checking(config_json_filepath,
                                MEDLINE_reference, no_Crossref, 
                                no_PubMed, 
                                prev_pub_filepath, 
-                               remove_duplicates):
+                               remove_duplicates,
+                               cache_dir=None):
     """Read in inputs from user and do error checking.
     
     Args:
@@ -36,6 +36,7 @@ def input_reading_and_checking(config_json_filepath,
         no_PubMed (bool): If True search PubMed else don't. Reduces checking on config JSON if True.
         prev_pub_filepath (str or None): filepath to the publication JSON to read in.
         remove_duplicates (bool): if True, remove duplicate entries in tokenized citations.
+        cache_dir (str|None): path to the directory to cache tokenized citations in, if None no cache is used.
         
     Returns:
         config_dict (dict): Matches the Configuration file JSON schema.
@@ -66,7 +67,7 @@ def input_reading_and_checking(config_json_filepath,
     if has_previous_pubs:
         user_input_checking.prev_pubs_file_check(prev_pubs)
         
-    tokenized_citations = ref_srch_webio.tokenize_reference_input(ref_path_or_URL, MEDLINE_reference, remove_duplicates) 
+    tokenized_citations = ref_srch_webio.tokenize_reference_input(ref_path_or_URL, MEDLINE_reference, remove_duplicates, cache_dir=cache_dir) 
     
     return config_dict, tokenized_citations, has_previous_pubs, prev_pubs
 
@@ -148,7 +149,7 @@ def build_publication_dict(config_dict, tokenized_citations, no_Crossref, no_Pub
 
 
 
-def save_and_send_reports_and_emails(config_dict, tokenized_citations, publication_dict, prev_pubs, has_previous_pubs, test):
+def save_and_send_reports_and_emails(config_dict, tokenized_citations, publication_dict, prev_pubs, has_previous_pubs, test, prev_pubs_index=None):
     """Build the summary report and email it.
     
     Args:
@@ -158,6 +159,7 @@ def save_and_send_reports_and_emails(config_dict, tokenized_citations, publicati
         prev_pubs (dict): The contents of the prev_pub file input by the user if provided.
         has_previous_pubs (bool): True if a prev_pub file was input, False otherwise.
         test (bool): If True save_dir_name is tracker-test instead of tracker- and emails are not sent.
+        prev_pubs_index (dict|None): publication index for prev_pubs read from file. If None, then it is built from prev_pubs.
         
     Returns:
         save_dir_name (str): Name of the directory where the emails and report were saved.
@@ -166,14 +168,14 @@ def save_and_send_reports_and_emails(config_dict, tokenized_citations, publicati
     ## Compare citations to prev_pubs 
     is_citation_in_prev_pubs_list = []
     if has_previous_pubs:
-        is_citation_in_prev_pubs_list = helper_functions.are_citations_in_pub_dict(tokenized_citations, prev_pubs)
+        is_citation_in_prev_pubs_list = helper_functions.are_citations_in_pub_dict(tokenized_citations, prev_pubs, prev_pubs_index)
         
     
     ## Build the save directory name.
     if test:
-        save_dir_name = "tracker-test-" + re.sub(r"\-| |\:", "", str(datetime.datetime.now())[2:16])
+        save_dir_name = "tracker-test-" + helper_functions.REGEXES["timestamp_separators"].sub("", str(datetime.datetime.now())[2:16])
     else:
-        save_dir_name = "tracker-" + re.sub(r"\-| |\:", "", str(datetime.datetime.now())[2:16])
+        save_dir_name = "tracker-" + helper_functions.REGEXES["timestamp_separators"].sub("", str(datetime.datetime.now())[2:16])
     os.mkdir(save_dir_name)
     
     
@@ -7,16 +7,19 @@ Internet interfacing for reference_search.
 """
 
 import time
+import itertools
 import copy
 import sys
 import os
-import re
+import concurrent.futures
+import hashlib
 
 import pymed
 import scholarly
 import habanero
 import bs4
 
+from . import __version__
 from . import helper_functions
 from . import citation_parsing
 from . import webio
@@ -29,6 +32,13 @@ DOI_URL = webio.DOI_URL
 
 PUBLICATION_TEMPLATE = webio.PUBLICATION_TEMPLATE
 
+## Settings for fetching the pages of a MyNCBI collection.
+MYNCBI_PAGE_WORKERS = 8
+MYNCBI_PAGE_RETRIES = 3
+MYNCBI_RETRY_BACKOFF = 1
+
+REFERENCE_HASH_CHUNK_SIZE = 1048576
+
 
 def build_pub_dict_from_PMID(PMID_list, from_email):
     """Query PubMed for each PMID and build a dictionary of the returned data.
@@ -264,12 +274,14 @@ def search_references_on_source(source, running_pubs, tokenized_citations, mailt
         api = pymed.PubMed(tool=TOOL, email=mailto_email)
         query_function = _query_PubMed
         skip_pub_function = _pub_needs_skipped_PubMed
+        match_keys_creation_function = _create_match_keys_PubMed
         pub_dict_creation_function = helper_functions.create_pub_dict_for_saving_PubMed
         pub_dict_creation_arguments = ["pub"]
     elif source == "Crossref":
         api = habanero.Crossref(ua_string = "Academic Tracker (mailto:" + mailto_email + ")")
         query_function = _query_Crossref
         skip_pub_function = _pub_needs_skipped_Crossref
+        match_keys_creation_function = _create_match_keys_Crossref
         pub_dict_creation_function = helper_functions.create_pub_dict_for_saving_Crossref
         pub_dict_creation_arguments = ["pub", "prev_query"]
     else:
@@ -295,30 +307,34 @@ def search_references_on_source(source, running_pubs, tokenized_citations, mailt
                 continue
             all_pubs[i].append(pub)
             
+            ## Only the fields needed for matching are pulled out first, the full pub_dict is 
+            ## only created for the pub that matches the citation or needs merged into running_pubs.
             locals_ref = locals()
-            pub_id, pub_dict = pub_dict_creation_function(*[locals_ref[arg] for arg in pub_dict_creation_arguments])
+            pub_creation_arguments = [locals_ref[arg] for arg in pub_dict_creation_arguments]
+            pub_id, match_keys = match_keys_creation_function(*pub_creation_arguments)
             
             if pub_id is None:
                 continue
             
             ## Match publication to the citation.
-            if pub_dict["pubmed_id"] and citation["PMID"] and pub_dict["pubmed_id"] == citation["PMID"]:
+            if match_keys["pubmed_id"] and citation["PMID"] and match_keys["pubmed_id"] == citation["PMID"]:
                 citation_matched_to_pub = True
-            elif pub_dict["doi"] and citation["DOI"] and citation["DOI"].lower() == pub_dict["doi"]:
+            elif match_keys["doi"] and citation["DOI"] and citation["DOI"].lower() == match_keys["doi"]:
                 citation_matched_to_pub = True
             else:
-                has_matching_author = helper_functions.match_pub_authors_to_citation_authors(citation["authors"], pub_dict["authors"])
-                if has_matching_author and helper_functions.do_strings_fuzzy_match(citation["title"], pub_dict["title"]):
+                has_matching_author = helper_functions.match_pub_authors_to_citation_authors(citation["authors"], match_keys["authors"])
+                if has_matching_author and helper_functions.do_strings_fuzzy_match(citation["title"], match_keys["title"]):
                     citation_matched_to_pub = True
             
                                
-            if matching_pub_id := helper_functions.get_pub_id_in_publication_dict(pub_id, pub_dict["title"], running_pubs):
+            if matching_pub_id := helper_functions.get_pub_id_in_publication_dict(pub_id, match_keys["title"], running_pubs):
                 if source in running_pubs[matching_pub_id]["queried_sources"]:
                     if not citation_matched_to_pub:
                         continue
                     matching_key_for_citation.append(matching_pub_id)
                     break
                 
+                _, pub_dict = pub_dict_creation_function(*pub_creation_arguments)
                 helper_functions._merge_pub_dicts(running_pubs[matching_pub_id], pub_dict)
                 running_pubs[matching_pub_id]["queried_sources"].append(source)
                 if citation_matched_to_pub:
@@ -328,6 +344,7 @@ def search_references_on_source(source, running_pubs, tokenized_citations, mailt
             else:
                 if not citation_matched_to_pub:
                     continue
+                _, pub_dict = pub_dict_creation_function(*pub_creation_arguments)
                 pub_dict["queried_sources"] = [source]
                 running_pubs[pub_id] = pub_dict
                 matching_key_for_citation.append(pub_id)
@@ -391,6 +408,79 @@ def _pub_needs_skipped_PubMed(pub):
     return not isinstance(pub, pymed.article.PubMedArticle)
 
 
+def _create_match_keys_PubMed(pub):
+    """Pull out only what is needed to match the queried pub from PubMed to a citation.
+    
+    The values are the same as what create_pub_dict_for_saving_PubMed would return, 
+    but the authors only have the keys used for matching and references, grants, 
+    affiliations, etc. are not pulled out at all.
+    
+    Args:
+        pub (pymed.article.PubMedArticle): publication queried from PubMed.
+        
+    Returns:
+        pub_id (str): the ID of the publication (DOI or PMID).
+        match_keys (dict): keys are "pubmed_id", "doi", "title", and "authors".
+    """
+    
+    if (pmid := pub.xml.find("PubmedData/ArticleIdList/ArticleId[@IdType='pubmed']")) is not None:
+        pmid = pmid.text
+    
+    if (doi := pub.xml.find("PubmedData/ArticleIdList/ArticleId[@IdType='doi']")) is not None:
+        doi = doi.text.lower()
+    
+    authors = []
+    for author in pub.xml.findall(".//Author"):
+        orcid = None
+        if (text := author.find("Identifier[@Source='ORCID']")) is not None:
+            orcid = helper_functions.extract_ORCID_from_string(text.text)
+        
+        collective_name = text.text if (text := author.find("CollectiveName")) is not None else None
+        if collective_name:
+            authors.append({"collectivename":collective_name, "ORCID":orcid})
+        else:
+            last_name = text.text if (text := author.find("LastName")) is not None else None
+            authors.append({"lastname":last_name, "ORCID":orcid})
+    
+    return helper_functions.get_PubMed_pub_id(pub), {"pubmed_id":pmid, "doi":doi, "title":pub.title, "authors":authors}
+
+
+
+def _create_match_keys_Crossref(pub, prev_query):
+    """Pull out only what is needed to match the queried pub from Crossref to a citation.
+    
+    The values are the same as what create_pub_dict_for_saving_Crossref would return, 
+    but the authors only have the keys used for matching and references, grants, 
+    affiliations, etc. are not pulled out at all.
+    
+    Args:
+        pub (dict): publication queried from Crossref.
+        prev_query (list|None): a list of lists containing publications from a previous query, used for message printing.
+        
+    Returns:
+        pub_id (str|None): the ID of the publication (DOI or URL). If None, an ID couldn't be determined.
+        match_keys (dict|None): keys are "pubmed_id", "doi", "title", and "authors". If None, an ID couldn't be determined.
+    """
+    
+    if (pub_id := helper_functions.get_Crossref_pub_id(pub, prev_query)) is None:
+        return None, None
+    
+    authors = []
+    for cr_author_dict in pub.get("author", []):
+        orcid = helper_functions.extract_ORCID_from_string(cr_author_dict["ORCID"]) if "ORCID" in cr_author_dict else None
+        
+        if "name" in cr_author_dict:
+            authors.append({"collectivename":cr_author_dict["name"], "ORCID":orcid})
+        else:
+            authors.append({"lastname":cr_author_dict.get("family"), "ORCID":orcid})
+    
+    return pub_id, {"pubmed_id":None, 
+                    "doi":pub["DOI"].lower() if "DOI" in pub else None, 
+                    "title":pub["title"][0], 
+                    "authors":authors}
+
+
+
 def _pub_needs_skipped_Crossref(pub):
     """Determine whether the queried pub from Crossref should be skipped or not.
     
@@ -410,8 +500,8 @@ def parse_myncbi_citations(url):
     
     Note that authors and title can be missing or empty from the webpage.
     This function assumes the url is the first page of the MyNCBI citations.
-    The first page is tokenized and then each subsequent page is visited and 
-    tokenized.
+    The first page is tokenized and then the subsequent pages are fetched 
+    concurrently, each with retries, and tokenized in page order.
     
     Args:
         url (str): the url of the MyNCBI page.
@@ -426,17 +516,22 @@ def parse_myncbi_citations(url):
         helper_functions.vprint("Error: Could not access the MYNCBI webpage. Make sure the address is correct.")
         sys.exit()
     
-    soup = bs4.BeautifulSoup(url_str, "html.parser")
+    soup = bs4.BeautifulSoup(url_str, citation_parsing.HTML_PARSER, parse_only = bs4.SoupStrainer("span", class_ = "totalPages"))
     number_of_pages = int(soup.find("span", class_ = "totalPages").text)
     
     parsed_pubs = citation_parsing.tokenize_myncbi_citations(url_str)
     
-    ## Parse the rest of the pages.
+    ## Fetch the rest of the pages concurrently, map keeps them in page order.
     new_url = url if url[-1] == "/" else url + "/"
+    page_urls = [new_url + "?page=" + str(i) for i in range(2,number_of_pages+1)]
     
-    for i in range(2,number_of_pages+1):
-        
-        url_str = webio.get_url_contents_as_str(new_url + "?page=" + str(i))
+    if page_urls:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(MYNCBI_PAGE_WORKERS, len(page_urls))) as executor:
+            page_strs = list(executor.map(_get_myncbi_page, page_urls))
+    else:
+        page_strs = []
+    
+    for i, url_str in enumerate(page_strs, start=2):
         if not url_str:
             helper_functions.vprint("Error: Could not access page " + str(i) + " of the MYNCBI webpage. Aborting run.")
             sys.exit()
@@ -448,22 +543,49 @@ def parse_myncbi_citations(url):
 
 
 
-def tokenize_reference_input(reference_input, MEDLINE_reference, remove_duplicates=True):
-    """Tokenize the citations in reference_input.
+def _get_myncbi_page(url):
+    """Get the contents of a MyNCBI page, retrying with exponential backoff if it fails.
     
-    reference_input can be a URL or filepath. MyNCBI URLs are handled special, 
-    but all other URLs are read as a text document and parsed line by line as 
-    if they were a test document. If the format of the reference is MEDLINE then 
-    set MEDLINE_reference to True and it will be parsed as such instead of line 
-    by line. Citations are expected to be 1 per line otherwise.
+    Args:
+        url (str): the url of the MyNCBI page.
+        
+    Returns:
+        (str|None): the page as a string or None if it couldn't be retrieved after MYNCBI_PAGE_RETRIES retries.
+    """
+    
+    for attempt in range(MYNCBI_PAGE_RETRIES + 1):
+        try:
+            if url_str := webio.get_url_contents_as_str(url):
+                return url_str
+        except OSError as e:
+            helper_functions.vprint(e, verbosity=1)
+            helper_functions.vprint(url, verbosity=1)
+        
+        if attempt < MYNCBI_PAGE_RETRIES:
+            time.sleep(MYNCBI_RETRY_BACKOFF * 2**attempt)
+    
+    return None
+
+
+
+def iter_reference_input(reference_input, MEDLINE_reference, workers=1):
+    """Tokenize the citations in reference_input and yield them one at a time.
+    
+    Text files are read line by line and each citation is yielded as soon as it 
+    is tokenized, so the citations at the start of a large document can be used 
+    before the rest of it is read. See tokenize_reference_input for how the 
+    different types of reference_input are handled. Duplicates are not removed.
+    
+    If workers is more than 1, documents are instead tokenized in chunks on a 
+    process pool and the citations are yielded after all of them are tokenized.
     
     Args:
         reference_input (str): URL or filepath.
         MEDLINE_reference (bool): True if reference_input is in MEDLINE format.
-        remove_duplicates (bool): if True, remove duplicate entries in tokenized citations.
+        workers (int): the number of processes to tokenize documents with.
         
-    Returns:
-        tokenized_citations (dict): the citations tokenized in a dictionary matching the tokenized citations JSON schema. 
+    Yields:
+        (dict): the next tokenized citation matching the tokenized citations JSON schema. 
     """
     
     ## Check the reference_input to see if it is json.
@@ -471,63 +593,162 @@ def tokenize_reference_input(reference_input, MEDLINE_reference, remove_duplicat
     if extension == "json":
         tokenized_citations = fileio.load_json(reference_input)
         user_input_checking.tok_reference_check(tokenized_citations)
+        yield from tokenized_citations
+        return
     
     ## Check the reference file input and see if it is a URL
-    elif re.match(r"http.*", reference_input):
-        if re.match(r".*ncbi.nlm.nih.gov/myncbi.*", reference_input):
-            tokenized_citations = parse_myncbi_citations(reference_input)
-        else:
-            document_string = webio.clean_tags_from_url(reference_input)
-            
-            if not document_string:
-                helper_functions.vprint("Nothing was read from the URL. Make sure the address is correct.")
-                sys.exit()
-            
-            tokenized_citations = citation_parsing.parse_text_for_citations(document_string)
-    else:
-        # Check the file extension and call the correct read in function.
-        if extension == "docx":
-            document_string = fileio.read_text_from_docx(reference_input)
-        elif extension == "txt":
-            document_string = fileio.read_text_from_txt(reference_input)
-        else:
-            helper_functions.vprint("Unknown file type for reference file.")
-            sys.exit()
-    
+    if helper_functions.REGEXES["http"].match(reference_input):
+        if helper_functions.REGEXES["myncbi_url"].match(reference_input):
+            yield from parse_myncbi_citations(reference_input)
+            return
+        
+        document_string = webio.clean_tags_from_url(reference_input)
+        
         if not document_string:
-            helper_functions.vprint("Nothing was read from the reference file. Make sure the file is not empty or is a supported file type.")
+            helper_functions.vprint("Nothing was read from the URL. Make sure the address is correct.")
             sys.exit()
         
-        if MEDLINE_reference:
-            tokenized_citations = citation_parsing.parse_MEDLINE_format(document_string)
+        if workers > 1:
+            yield from citation_parsing.parse_lines_in_parallel(document_string.split("\n"), False, workers)
         else:
-            tokenized_citations = citation_parsing.parse_text_for_citations(document_string)
-            
-    if not tokenized_citations:
-        helper_functions.vprint("Warning: Could not tokenize any citations in provided reference. Check setup and formatting and try again.")
+            yield from citation_parsing.iter_text_citations(document_string.split("\n"))
+        return
+    
+    # Check the file extension and call the correct read in function.
+    if extension == "docx":
+        lines = fileio.iter_lines_from_docx(reference_input)
+    elif extension == "txt" and MEDLINE_reference:
+        lines = fileio.iter_MEDLINE_lines_from_txt(reference_input)
+    elif extension == "txt":
+        lines = fileio.iter_lines_from_txt(reference_input)
+    else:
+        helper_functions.vprint("Unknown file type for reference file.")
         sys.exit()
     
-    ## Look for duplicates in citations.
-    if remove_duplicates:
-        duplicate_citations = helper_functions.find_duplicate_citations(tokenized_citations)
-        if duplicate_citations:
-            helper_functions.vprint("Warning: The following citations in the reference file or URL appear to be duplicates based on identical DOI, PMID, or similar titles. They will only appear once in any outputs.", verbosity=1)
-            helper_functions.vprint("Duplicates:", verbosity=1)
-            for index_list in duplicate_citations:
-                for index in index_list:
-                    if tokenized_citations[index]["reference_line"]:
-                        pretty_print = tokenized_citations[index]["reference_line"].split("\n")
-                        pretty_print = " ".join([line.strip() for line in pretty_print])
-                        helper_functions.vprint(pretty_print, verbosity=1)
-                    else:
-                        helper_functions.vprint(tokenized_citations[index]["title"], verbosity=1)
-                    helper_functions.vprint("", verbosity=1)
-                helper_functions.vprint("\n", verbosity=1)
-            
-            indexes_to_remove = [index for duplicate_set in duplicate_citations for index in duplicate_set[1:]]
-            
-            tokenized_citations = [citation for count, citation in enumerate(tokenized_citations) if not count in indexes_to_remove]
+    ## The document is empty if the only line in it is empty.
+    first_lines = list(itertools.islice(lines, 2))
+    if first_lines == [""]:
+        helper_functions.vprint("Nothing was read from the reference file. Make sure the file is not empty or is a supported file type.")
+        sys.exit()
+    lines = itertools.chain(first_lines, lines)
+    
+    if workers > 1:
+        yield from citation_parsing.parse_lines_in_parallel(lines, MEDLINE_reference, workers)
+    elif MEDLINE_reference:
+        yield from citation_parsing.iter_MEDLINE_citations(lines)
+    else:
+        yield from citation_parsing.iter_text_citations(lines)
+
+
+
+def create_reference_cache_key(reference_input, MEDLINE_reference, remove_duplicates):
+    """Create the key that the tokenized citations of reference_input are cached under.
+    
+    Files are identified by a hash of their contents and extension, and URLs by 
+    the URL and the ETag the server returns for it. The parser options and the 
+    version of academic_tracker are part of the key, so changing either means 
+    the reference is tokenized again. JSON inputs are already tokenized, so they 
+    aren't cached. MyNCBI URLs aren't cached either, because their citations are 
+    spread over pages that can change without the ETag of the first page changing.
+    
+    Args:
+        reference_input (str): URL or filepath.
+        MEDLINE_reference (bool): True if reference_input is in MEDLINE format.
+        remove_duplicates (bool): if True, duplicate entries are removed from the tokenized citations.
+        
+    Returns:
+        (str|None): hex digest to cache the tokenized citations under, or None if reference_input can't be cached.
+    """
+    
+    hasher = hashlib.sha256()
+    hasher.update(repr((__version__, bool(MEDLINE_reference), bool(remove_duplicates))).encode("utf-8"))
+    
+    extension = os.path.splitext(reference_input)[1][1:]
+    if helper_functions.REGEXES["myncbi_url"].match(reference_input):
+        return None
+    elif helper_functions.REGEXES["http"].match(reference_input):
+        etag = webio.get_url_etag(reference_input)
+        if not etag:
+            return None
+        hasher.update(repr((reference_input, etag)).encode("utf-8"))
+    elif extension != "json" and os.path.isfile(reference_input):
+        hasher.update(repr(extension).encode("utf-8"))
+        with open(reference_input, "rb") as document:
+            while chunk := document.read(REFERENCE_HASH_CHUNK_SIZE):
+                hasher.update(chunk)
+    else:
+        return None
+    
+    return hasher.hexdigest()
+
+
+
+def tokenize_reference_input(reference_input, MEDLINE_reference, remove_duplicates=True, workers=1, cache_dir=None):
+    """Tokenize the citations in reference_input.
+    
+    reference_input can be a URL or filepath. MyNCBI URLs are handled special, 
+    but all other URLs are read as a text document and parsed line by line as 
+    if they were a test document. If the format of the reference is MEDLINE then 
+    set MEDLINE_reference to True and it will be parsed as such instead of line 
+    by line. Citations are expected to be 1 per line otherwise.
+    
+    If cache_dir is given, the tokenized citations and their duplicate sets are 
+    cached there under create_reference_cache_key, and later calls with the same 
+    reference and options read them from the cache instead of tokenizing again.
+    
+    Args:
+        reference_input (str): URL or filepath.
+        MEDLINE_reference (bool): True if reference_input is in MEDLINE format.
+        remove_duplicates (bool): if True, remove duplicate entries in tokenized citations.
+        workers (int): the number of processes to tokenize documents with, 1 tokenizes them in this process.
+        cache_dir (str|None): path to the directory to cache tokenized citations in, if None no cache is used.
+        
+    Returns:
+        tokenized_citations (dict): the citations tokenized in a dictionary matching the tokenized citations JSON schema. 
+    """
+    
+    cache_key = create_reference_cache_key(reference_input, MEDLINE_reference, remove_duplicates) if cache_dir else None
+    cache_entry = fileio.load_tokenization_cache(cache_dir, cache_key) if cache_key else None
+    
+    if cache_entry:
+        helper_functions.vprint("Tokenization cache hit for " + reference_input + ".", verbosity=1)
+        tokenized_citations = cache_entry["tokenized_citations"]
+        duplicate_citations = cache_entry["duplicate_citations"]
+    else:
+        if cache_key:
+            helper_functions.vprint("Tokenization cache miss for " + reference_input + ".", verbosity=1)
         
+        tokenized_citations = list(iter_reference_input(reference_input, MEDLINE_reference, workers))
+                
+        if not tokenized_citations:
+            helper_functions.vprint("Warning: Could not tokenize any citations in provided reference. Check setup and formatting and try again.")
+            sys.exit()
+        
+        ## Look for duplicates in citations.
+        duplicate_citations = helper_functions.find_duplicate_citations(tokenized_citations) if remove_duplicates else []
+        
+        if cache_key:
+            fileio.save_tokenization_cache(cache_dir, cache_key, tokenized_citations, duplicate_citations)
+    
+    ## Remove duplicates from citations.
+    if duplicate_citations:
+        helper_functions.vprint("Warning: The following citations in the reference file or URL appear to be duplicates based on identical DOI, PMID, or similar titles. They will only appear once in any outputs.", verbosity=1)
+        helper_functions.vprint("Duplicates:", verbosity=1)
+        for index_list in duplicate_citations:
+            for index in index_list:
+                if tokenized_citations[index]["reference_line"]:
+                    pretty_print = tokenized_citations[index]["reference_line"].split("\n")
+                    pretty_print = " ".join([line.strip() for line in pretty_print])
+                    helper_functions.vprint(pretty_print, verbosity=1)
+                else:
+                    helper_functions.vprint(tokenized_citations[index]["title"], verbosity=1)
+                helper_functions.vprint("", verbosity=1)
+            helper_functions.vprint("\n", verbosity=1)
+        
+        indexes_to_remove = [index for duplicate_set in duplicate_citations for index in duplicate_set[1:]]
+        
+        tokenized_citations = [citation for count, citation in enumerate(tokenized_citations) if not count in indexes_to_remove]
+    
     return tokenized_citations
 
 
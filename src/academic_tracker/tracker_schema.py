@@ -17,6 +17,9 @@ cli_schema = {
  "type": "object",
  "properties": {
          "--prev_pub": {"type":["string", "null"], "minLength":1},
+         "--workers": {"type":["string", "null"], "pattern":"^[1-9][0-9]*$"},
+         "--report-workers": {"type":["string", "null"], "pattern":"^[1-9][0-9]*$"},
+         "--cache-dir": {"type":["string", "null"], "minLength":1},
          },
          
 }
@@ -14,6 +14,8 @@ import io
 import re
 import os
 import shutil
+import codecs
+import itertools
 
 import orcid
 import scholarly
@@ -21,6 +23,10 @@ import habanero
 import bs4
 import json
 import requests
+try:
+    import lxml.etree
+except ImportError:
+    lxml = None
 
 from . import helper_functions
 
@@ -28,6 +34,15 @@ from . import helper_functions
 TOOL = "Academic Tracker"
 DOI_URL = "https://doi.org/"
 
+## Settings for converting webpages to text.
+URL_READ_CHUNK_SIZE = 65536
+HTML_LINE_BREAK_REPLACEMENTS = (("<br>", "\n"), ("</div>", "</div>\n"), ("</p>", "</p>\n"))
+## BeautifulSoup leaves the strings in these tags out of .text.
+HTML_NON_TEXT_TAGS = {"rt", "rp", "style", "script", "template"}
+## BeautifulSoup collapses whitespace only strings to a single character unless they are in these tags.
+HTML_PRESERVE_WHITESPACE_TAGS = {"pre", "textarea"}
+HTML_ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
 PUBLICATION_TEMPLATE = {
         "abstract": None,
         "authors": None,
@@ -93,7 +108,7 @@ def search_ORCID_for_ids(ORCID_key, ORCID_secret, authors_json):
         search_results = api.search(author_attributes["pubmed_name_search"], access_token=search_token)
         
         for result in search_results["expanded-result"]:
-            if re.match(author_attributes["first_name"].lower() + ".*", result["given-names"].lower()) and author_attributes["last_name"].lower() == result["family-names"].lower():
+            if helper_functions.compile_regex(re.escape(author_attributes["first_name"].lower()) + ".*").match(result["given-names"].lower()) and author_attributes["last_name"].lower() == result["family-names"].lower():
                 
                 if any([affiliation.lower() in institution.lower() for institution in result["institution-name"] for affiliation in author_attributes["affiliations"]]):
                     authors_json[author]["ORCID"] = result["orcid-id"]
@@ -201,6 +216,29 @@ def get_url_contents_as_str(url):
     
     
 
+def get_url_etag(url):
+    """Query the headers of the url and return its ETag.
+    
+    Args:
+        url (str): the URL to query.
+        
+    Returns:
+        (str|None): the ETag of the website or None if it doesn't have one or an error occurred.
+    """
+    
+    try:
+        req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"}, method="HEAD")
+        with urllib.request.urlopen(req, timeout=5) as response:
+            return response.headers.get("ETag")
+                
+    except urllib.error.URLError as e:
+        helper_functions.vprint(e, verbosity=1)
+        helper_functions.vprint(url, verbosity=1)
+        
+        return None
+
+
+
 def clean_tags_from_url(url):
     """Remove tags from webpage.
     
@@ -214,20 +252,170 @@ def clean_tags_from_url(url):
         clean_url (str): webpage contents cleaned of tags.    
     """
     
-    url_str = get_url_contents_as_str(url)
-    if not url_str:
+    return convert_html_to_text(_iter_url_contents(url))
+
+
+
+def _iter_url_contents(url):
+    """Query the url and yield it's contents as strings as they are read.
+    
+    Args:
+        url (str): the URL to query.
+        
+    Yields:
+        (str): the next decoded piece of the website. Nothing is yielded if an error occurred.
+    """
+    
+    try:
+        req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+        response = urllib.request.urlopen(req, timeout=5)
+    except urllib.error.HTTPError as e:
+        helper_functions.vprint(e, verbosity=1)
+        helper_functions.vprint(url, verbosity=1)
+        return
+    
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with response:
+        while chunk := response.read(URL_READ_CHUNK_SIZE):
+            yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+
+def convert_html_to_text(html_chunks):
+    """Convert HTML to the text a user would see in a browser in a single pass.
+    
+    All of the python libraries return the html with newlines in seemingly 
+    arbitrary locations, so they are removed and line breaks are added for 
+    <br>, </div>, and </p> tags. The HTML is then fed to an incremental lxml 
+    parser a chunk at a time and only the text is kept, so the whole document 
+    is never held in memory. The text is the same as BeautifulSoup's .text 
+    for the document. Without lxml the document is joined and parsed by 
+    BeautifulSoup with html.parser.
+    
+    Args:
+        html_chunks (iterable): str pieces of the HTML document in order.
+        
+    Returns:
+        (str|None): the text of the document or None if html_chunks had no content.
+    """
+    
+    html_chunks = iter(html_chunks)
+    first_chunk = next((html_chunk for html_chunk in html_chunks if html_chunk), None)
+    if first_chunk is None:
         return None
     
-    ## All of the python libraries return the html with newlines in seemingly 
-    ## arbitrary locations, so remove them and add in some for tags that make sense.
-    clean_url = url_str.replace("\n", "")
-    clean_url = clean_url.replace("<br>", "\n")
-    clean_url = clean_url.replace("</div>", "</div>\n")
-    clean_url = clean_url.replace("</p>", "</p>\n")
-    clean_url = bs4.BeautifulSoup(clean_url, "lxml").text
-#    clean_url = lxml.html.fromstring(url_str).text_content()
+    html_segments = _iter_html_with_line_breaks(itertools.chain([first_chunk], html_chunks))
+    
+    if lxml is None:
+        return bs4.BeautifulSoup("".join(html_segments), "html.parser").text
+    
+    ## The parser needs to be fed something before it can be closed, even if it is empty.
+    parser = lxml.etree.HTMLParser(target=_HTMLTextTarget(), recover=True)
+    parser.feed("")
+    for html_segment in html_segments:
+        parser.feed(html_segment)
+    
+    return parser.close()
+
+
+
+def _iter_html_with_line_breaks(html_chunks):
+    """Remove newlines from HTML chunks and add them back in after the tags in HTML_LINE_BREAK_REPLACEMENTS.
+    
+    A chunk can end partway through a tag, so anything after the last "<" 
+    near the end of a chunk is held back until the next one. A leading byte 
+    order mark is dropped.
     
-    return clean_url
+    Args:
+        html_chunks (iterable): str pieces of the HTML document in order.
+        
+    Yields:
+        (str): the next piece of the HTML with its line breaks replaced. Empty pieces are not yielded.
+    """
+    
+    longest_tag_length = max(len(tag) for tag, replacement in HTML_LINE_BREAK_REPLACEMENTS)
+    held_back = ""
+    is_first_segment = True
+    for html_chunk in itertools.chain(html_chunks, [None]):
+        if html_chunk is None:
+            html_segment = held_back
+            held_back = ""
+        else:
+            html_segment = held_back + html_chunk.replace("\n", "")
+            split_index = html_segment.rfind("<", max(0, len(html_segment) - longest_tag_length + 1))
+            if split_index != -1:
+                html_segment, held_back = html_segment[:split_index], html_segment[split_index:]
+            else:
+                held_back = ""
+        
+        if is_first_segment and html_segment:
+            html_segment = html_segment[1:] if html_segment[0] == "\ufeff" else html_segment
+            is_first_segment = False
+        
+        for tag, replacement in HTML_LINE_BREAK_REPLACEMENTS:
+            html_segment = html_segment.replace(tag, replacement)
+        if html_segment:
+            yield html_segment
+
+
+
+class _HTMLTextTarget:
+    """lxml parser target that keeps the text of an HTML document the same way BeautifulSoup's .text does.
+    
+    Consecutive data between tags, comments, and processing instructions is 
+    one string. Strings in HTML_NON_TEXT_TAGS are dropped and strings that are 
+    all whitespace are collapsed to a newline or space outside of HTML_PRESERVE_WHITESPACE_TAGS.
+    """
+    
+    def __init__(self):
+        self.text_pieces = []
+        self.current_data = []
+        self.non_text_depth = 0
+        self.preserve_whitespace_depth = 0
+    
+    def _end_data(self):
+        if not self.current_data:
+            return
+        
+        data = "".join(self.current_data)
+        self.current_data = []
+        if self.non_text_depth:
+            return
+        
+        if not self.preserve_whitespace_depth and not data.strip(HTML_ASCII_SPACES):
+            data = "\n" if "\n" in data else " "
+        self.text_pieces.append(data)
+    
+    def start(self, tag, attrib):
+        self._end_data()
+        if tag in HTML_NON_TEXT_TAGS:
+            self.non_text_depth += 1
+        if tag in HTML_PRESERVE_WHITESPACE_TAGS:
+            self.preserve_whitespace_depth += 1
+    
+    def end(self, tag):
+        self._end_data()
+        if tag in HTML_NON_TEXT_TAGS:
+            self.non_text_depth -= 1
+        if tag in HTML_PRESERVE_WHITESPACE_TAGS:
+            self.preserve_whitespace_depth -= 1
+    
+    def data(self, data):
+        self.current_data.append(data)
+    
+    def comment(self, text):
+        self._end_data()
+    
+    def pi(self, target, data):
+        self._end_data()
+    
+    def doctype(self, name, pubid, system):
+        self._end_data()
+    
+    def close(self):
+        self._end_data()
+        return "".join(self.text_pieces)
 
 
 
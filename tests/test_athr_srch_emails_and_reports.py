@@ -9,10 +9,11 @@ import pytest
 import shutil
 import pandas
 
-from academic_tracker.athr_srch_emails_and_reports import create_pubs_by_author_dict, create_project_reports_and_emails, create_project_report
+from academic_tracker.athr_srch_emails_and_reports import create_pubs_by_author_dict, create_project_reports_and_emails, create_project_report, DEFAULT_SUMMARY_TEMPLATE
 from academic_tracker.athr_srch_emails_and_reports import create_summary_report, build_author_loop, create_collaborators_reports_and_emails
 from academic_tracker.athr_srch_emails_and_reports import create_tabular_collaborator_report, create_collaborator_report, create_tabular_summary_report
-from academic_tracker.athr_srch_emails_and_reports import create_tabular_project_report, _build_report_rows
+from academic_tracker.athr_srch_emails_and_reports import create_tabular_project_report, _build_report_rows, create_report_context
+from academic_tracker.athr_srch_emails_and_reports import create_collaborators_by_author_dict, create_report_hash
 from academic_tracker.fileio import load_json, read_text_from_txt
 
 
@@ -46,6 +47,58 @@ def test_create_pubs_by_author_dict(publication_dict):
 
 
 
+def test_create_collaborators_by_author_dict(publication_dict):
+    publication_dict["https://doi.org/10.1038/s41597-023-02277-x"]["authors"][1]["author_id"] = "Travis Thompson"
+    ## Repeat an author on another publication and give them a list value to test that duplicates are only added once.
+    pub_ids = list(publication_dict)
+    repeated_author = publication_dict[pub_ids[0]]["authors"][-1]
+    repeated_author["affiliation"] = ["University of Kentucky", "Markey Cancer Center"]
+    publication_dict[pub_ids[1]]["authors"].append(repeated_author.copy())
+    
+    pubs_by_author_dict = create_pubs_by_author_dict(publication_dict)
+    
+    actual = create_collaborators_by_author_dict(publication_dict, pubs_by_author_dict)
+    
+    assert list(actual) == list(pubs_by_author_dict)
+    for author, pubs in pubs_by_author_dict.items():
+        expected_collaborators = []
+        for pub in pubs:
+            for pub_author in publication_dict[pub]["authors"]:
+                if pub_author["author_id"] != author and pub_author not in expected_collaborators:
+                    expected_collaborators.append(pub_author)
+        
+        assert actual[author] == expected_collaborators
+
+
+
+def test_create_report_hash(publication_dict):
+    pub_ids = list(publication_dict)
+    report_context = create_report_context(publication_dict, {})
+    
+    report_hash = create_report_hash(publication_dict, pub_ids[:2], ["template", {"filename":"asdf.txt"}], report_context)
+    
+    assert report_hash == create_report_hash(publication_dict, reversed(pub_ids[:2]), ["template", {"filename":"asdf.txt"}])
+    assert report_hash != create_report_hash(publication_dict, pub_ids[:2], ["template", {"filename":"qwer.txt"}])
+    assert report_hash != create_report_hash(publication_dict, pub_ids[:3], ["template", {"filename":"asdf.txt"}])
+    
+    ## Publications that don't feed the report don't change its hash.
+    publication_dict[pub_ids[2]]["title"] = "asdf"
+    assert report_hash == create_report_hash(publication_dict, pub_ids[:2], ["template", {"filename":"asdf.txt"}])
+    publication_dict[pub_ids[0]]["title"] = "asdf"
+    assert report_hash != create_report_hash(publication_dict, pub_ids[:2], ["template", {"filename":"asdf.txt"}])
+
+
+
+def test_create_report_hash_version_change(publication_dict, mocker):
+    pub_ids = list(publication_dict)
+    report_hash = create_report_hash(publication_dict, pub_ids[:2], ["template", {"filename":"asdf.txt"}])
+    
+    mocker.patch("academic_tracker.athr_srch_emails_and_reports.__version__", "asdf")
+    
+    assert report_hash != create_report_hash(publication_dict, pub_ids[:2], ["template", {"filename":"asdf.txt"}])
+
+
+
 @pytest.fixture
 def config_dict():
     return load_json(os.path.join("tests", "testing_files", "config_truncated.json"))
@@ -56,7 +109,8 @@ def authors_by_project_dict():
     return load_json(os.path.join("tests", "testing_files", "authors_by_project_dict_truncated.json"))
 
 
-def test_create_project_reports_and_emails(publication_dict, config_dict, authors_by_project_dict):
+@pytest.mark.parametrize("report_workers", [1, 2])
+def test_create_project_reports_and_emails(publication_dict, config_dict, authors_by_project_dict, report_workers):
     
     ## Add Travis to a publication so we can test that multiple authors are sent emails.
     publication_dict["https://doi.org/10.1038/s41597-023-02277-x"]["authors"][1]["author_id"] = "Travis Thompson"
@@ -64,7 +118,7 @@ def test_create_project_reports_and_emails(publication_dict, config_dict, author
     expected_emails = load_json(os.path.join("tests", "testing_files", "athr_project_emails.json"))
     del expected_emails["creation_date"]
     
-    actual_emails = create_project_reports_and_emails(authors_by_project_dict, publication_dict, config_dict, TESTING_DIR)
+    actual_emails = create_project_reports_and_emails(authors_by_project_dict, publication_dict, config_dict, TESTING_DIR, None, report_workers)
     # with open(os.path.join("tests", "testing_files", "athr_project_emails_new.json"),'w') as jsonFile:
     #     jsonFile.write(json.dumps(actual_emails, indent=2, sort_keys=True))
     del actual_emails["creation_date"]
@@ -77,6 +131,26 @@ def test_create_project_reports_and_emails(publication_dict, config_dict, author
     assert actual_num_of_project_reports == expected_num_of_project_reports
     
     
+def test_create_project_reports_and_emails_same_filename(publication_dict, config_dict, authors_by_project_dict):
+    """Reports saved to the same filename should end up as the last one, even on a process pool."""
+    
+    publication_dict["https://doi.org/10.1038/s41597-023-02277-x"]["authors"][1]["author_id"] = "Travis Thompson"
+    config_dict["project_descriptions"] = {"Core A Administrative Core":config_dict["project_descriptions"]["Core A Administrative Core"]}
+    for author_attributes in authors_by_project_dict["Core A Administrative Core"].values():
+        author_attributes["project_report"]["filename"] = "same_name.txt"
+    
+    serial_emails = create_project_reports_and_emails(authors_by_project_dict, publication_dict, config_dict, TESTING_DIR, None, 1)
+    serial_report = read_text_from_txt(os.path.join(TESTING_DIR, "same_name.txt"))
+    os.remove(os.path.join(TESTING_DIR, "same_name.txt"))
+    
+    pool_emails = create_project_reports_and_emails(authors_by_project_dict, publication_dict, config_dict, TESTING_DIR, None, 2)
+    
+    assert os.listdir(TESTING_DIR) == ["same_name.txt"]
+    assert read_text_from_txt(os.path.join(TESTING_DIR, "same_name.txt")) == serial_report
+    assert serial_emails["emails"] == pool_emails["emails"]
+    assert serial_report == serial_emails["emails"][-1]["attachment"]
+
+
 @pytest.fixture
 def config_dict_tabular():
     return load_json(os.path.join("tests", "testing_files", "config_tabular.json"))
@@ -151,6 +225,42 @@ def test_create_summary_report(publication_dict, config_dict, authors_by_project
 
 
 
+def test_create_summary_report_shared_context(publication_dict, config_dict, authors_by_project_dict):
+    publication_dict["https://doi.org/10.1038/s41597-023-02277-x"]["authors"][1]["author_id"] = "Travis Thompson"
+    
+    expected_text = read_text_from_txt(os.path.join("tests", "testing_files", "athr_srch_summary_report.txt"))
+    
+    report_context = create_report_context(publication_dict, authors_by_project_dict)
+    
+    assert report_context["pubs_by_author_dict"] == create_pubs_by_author_dict(publication_dict)
+    
+    ## The second report reuses the loop templates and publication keywords from the first.
+    assert create_summary_report(publication_dict, config_dict, authors_by_project_dict, report_context=report_context) == expected_text
+    assert list(report_context["loop_templates"].keys()) == [DEFAULT_SUMMARY_TEMPLATE]
+    assert report_context["pub_keyword_replacements"]
+    assert create_summary_report(publication_dict, config_dict, authors_by_project_dict, report_context=report_context) == expected_text
+
+
+def test_build_author_loop_reuses_pub_fragments(publication_dict, config_dict, authors_by_project_dict):
+    publication_dict["https://doi.org/10.1038/s41597-023-02277-x"]["authors"][1]["author_id"] = "Travis Thompson"
+    
+    template_string = read_text_from_txt(os.path.join("tests", "testing_files", "athr_srch_build_loop_template_string.txt"))
+    
+    report_context = create_report_context(publication_dict, authors_by_project_dict)
+    
+    expected_text = build_author_loop(publication_dict, config_dict, authors_by_project_dict, "No from_email", template_string)
+    actual_text = build_author_loop(publication_dict, config_dict, authors_by_project_dict, "No from_email", template_string, report_context)
+    
+    assert expected_text == actual_text
+    assert set(report_context["pub_fragments"]) == {(template_string, pub_id) for pub_id in publication_dict}
+    
+    ## Cached fragments are used instead of rendering the pub again.
+    report_context["pub_fragments"][(template_string, "https://doi.org/10.1038/s41597-023-02277-x")] = "cached fragment"
+    
+    assert "cached fragment" in build_author_loop(publication_dict, config_dict, authors_by_project_dict, "No from_email", template_string, report_context)
+
+
+
 def test_build_author_loop(publication_dict, config_dict, authors_by_project_dict):
     
     template_string = read_text_from_txt(os.path.join("tests", "testing_files", "athr_srch_build_loop_template_string.txt"))
@@ -209,7 +319,8 @@ def test_create_collaborators_reports_and_emails_tabular(publication_dict, confi
     
 
 
-def test_create_collaborators_reports_and_emails(publication_dict, config_dict):
+@pytest.mark.parametrize("report_workers", [1, 2])
+def test_create_collaborators_reports_and_emails(publication_dict, config_dict, report_workers):
     ## Add Travis, Sweta, and Kelly to a publication so we can test that multiple authors get reported.
     publication_dict["https://doi.org/10.1038/s41597-023-02277-x"]["authors"][1]["author_id"] = "Travis Thompson"
     publication_dict["https://doi.org/10.1038/s41597-023-02277-x"]["authors"][0]["author_id"] = "Sweta Ojha"
@@ -245,7 +356,7 @@ def test_create_collaborators_reports_and_emails(publication_dict, config_dict):
     del expected_emails["creation_date"]
     del expected_emails["emails"][3]["attachment"]
     
-    actual_emails = create_collaborators_reports_and_emails(publication_dict, config_dict, TESTING_DIR)
+    actual_emails = create_collaborators_reports_and_emails(publication_dict, config_dict, TESTING_DIR, None, report_workers)
     # with open(os.path.join("tests", "testing_files", "collaborator_emails_new.json"),'w') as jsonFile:
     #     jsonFile.write(json.dumps(actual_emails, indent=2, sort_keys=True))
     del actual_emails["creation_date"]
@@ -262,6 +373,78 @@ def test_create_collaborators_reports_and_emails(publication_dict, config_dict):
     assert "name_test.csv" in dir_contents
     assert number_of_excel_files == 1
     assert actual_num_of_collaborator_reports == expected_num_of_collaborator_reports
+
+
+
+def test_create_collaborators_reports_and_emails_incremental(publication_dict, config_dict):
+    publication_dict["https://doi.org/10.1038/s41597-023-02277-x"]["authors"][1]["author_id"] = "Travis Thompson"
+    
+    config_dict["Authors"]["Travis Thompson"]["collaborator_report"] = {"template":"<pub_author_loop><pub_author_first>, <pub_author_last></pub_author_loop>",
+                                                                        "from_email":"ptth222@uky.edu",
+                                                                        "email_body":"asdf",
+                                                                        "email_subject":"asdf"}
+    
+    config_dict["Authors"]["Hunter Moseley"]["collaborator_report"] = {"from_email":"ptth222@uky.edu",
+                                                                        "to_email":"ptth222@uky.edu",
+                                                                        "email_body":"asdf",
+                                                                        "email_subject":"asdf",
+                                                                        "file_format":"xlsx"}
+    
+    report_manifest = {"reports":{}}
+    actual_emails = create_collaborators_reports_and_emails(publication_dict, config_dict, TESTING_DIR, None, 1, report_manifest)
+    
+    assert len(actual_emails["emails"]) == 2
+    assert report_manifest["reports"]["Travis Thompson_collaborators.txt"]["filename"] == "Travis Thompson_collaborators.txt"
+    assert report_manifest["reports"]["Hunter Moseley_collaborators.xlsx"]["filename"] == "Hunter Moseley_collaborators.xlsx"
+    
+    ## Only change a publication Hunter is on, so Travis's report is copied and not emailed.
+    pubs_by_author_dict = create_pubs_by_author_dict(publication_dict)
+    Hunter_only_pub = [pub_id for pub_id in pubs_by_author_dict["Hunter Moseley"] if pub_id not in pubs_by_author_dict["Travis Thompson"]][0]
+    publication_dict[Hunter_only_pub]["authors"].append({"firstname":"Asdf", "lastname":"Qwer", "author_id":None})
+    
+    previous_report_manifest = dict(report_manifest, save_dir_name=TESTING_DIR)
+    new_report_manifest = {"reports":{}}
+    new_dir = TESTING_DIR + "_incremental"
+    os.mkdir(new_dir)
+    try:
+        actual_emails = create_collaborators_reports_and_emails(publication_dict, config_dict, new_dir, None, 1, new_report_manifest, previous_report_manifest)
+        
+        assert [email["author"] for email in actual_emails["emails"]] == ["Hunter Moseley"]
+        assert sorted(os.listdir(new_dir)) == ["Hunter Moseley_collaborators.xlsx", "Travis Thompson_collaborators.txt"]
+        assert read_text_from_txt(os.path.join(new_dir, "Travis Thompson_collaborators.txt")) == read_text_from_txt(os.path.join(TESTING_DIR, "Travis Thompson_collaborators.txt"))
+        assert new_report_manifest["reports"]["Travis Thompson_collaborators.txt"] == report_manifest["reports"]["Travis Thompson_collaborators.txt"]
+        assert new_report_manifest["reports"]["Hunter Moseley_collaborators.xlsx"]["hash"] != report_manifest["reports"]["Hunter Moseley_collaborators.xlsx"]["hash"]
+    finally:
+        shutil.rmtree(new_dir)
+
+
+
+def test_create_collaborators_reports_and_emails_incremental_version_change(publication_dict, config_dict, mocker):
+    """Reports shouldn't be reused from a run with a different version of the package."""
+    
+    publication_dict["https://doi.org/10.1038/s41597-023-02277-x"]["authors"][1]["author_id"] = "Travis Thompson"
+    
+    config_dict["Authors"]["Travis Thompson"]["collaborator_report"] = {"template":"<pub_author_loop><pub_author_first>, <pub_author_last></pub_author_loop>",
+                                                                        "from_email":"ptth222@uky.edu",
+                                                                        "email_body":"asdf",
+                                                                        "email_subject":"asdf"}
+    
+    report_manifest = {"reports":{}}
+    create_collaborators_reports_and_emails(publication_dict, config_dict, TESTING_DIR, None, 1, report_manifest)
+    
+    mocker.patch("academic_tracker.athr_srch_emails_and_reports.__version__", "asdf")
+    
+    previous_report_manifest = dict(report_manifest, save_dir_name=TESTING_DIR)
+    new_report_manifest = {"reports":{}}
+    new_dir = TESTING_DIR + "_incremental"
+    os.mkdir(new_dir)
+    try:
+        actual_emails = create_collaborators_reports_and_emails(publication_dict, config_dict, new_dir, None, 1, new_report_manifest, previous_report_manifest)
+        
+        assert [email["author"] for email in actual_emails["emails"]] == ["Travis Thompson"]
+        assert new_report_manifest["reports"]["Travis Thompson_collaborators.txt"]["hash"] != report_manifest["reports"]["Travis Thompson_collaborators.txt"]["hash"]
+    finally:
+        shutil.rmtree(new_dir)
     
     
 
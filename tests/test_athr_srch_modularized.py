@@ -603,6 +603,40 @@ def test_save_and_send_reports_and_emails_manual_name(config_dict, mocker):
 
 
 
+def test_save_and_send_reports_and_emails_incremental(config_dict):
+    
+    pub_dict = load_json(os.path.join("tests", "testing_files", "publication_dict_truncated.json"))
+    authors_by_project_dict = load_json(os.path.join("tests", "testing_files", "authors_by_project_dict_truncated.json"))
+    
+    config_dict["summary_report"] = {"from_email":"ptth222@uky.edu", 
+                                     "to_email":["ptth222@uky.edu"], 
+                                     "email_body":"Body", 
+                                     "email_subject":"Subject"}
+    
+    save_dir = save_and_send_reports_and_emails(authors_by_project_dict, pub_dict, config_dict, True, 1, True)
+    
+    assert os.path.exists(os.path.join(save_dir, "reports_manifest.json"))
+    assert os.path.exists(os.path.join(save_dir, "emails.json"))
+    first_run_files = sorted(os.listdir(save_dir))
+    summary_report = read_text_from_txt(os.path.join(save_dir, "summary_report.txt"))
+    
+    ## Rename the directory as if it was from an earlier run, so the next run can be made in the same minute.
+    os.rename(save_dir, "tracker-test-0001010000")
+    save_dir = save_and_send_reports_and_emails(authors_by_project_dict, pub_dict, config_dict, True, 1, True)
+    
+    assert sorted(os.listdir(save_dir)) == [filename for filename in first_run_files if filename != "emails.json"]
+    assert read_text_from_txt(os.path.join(save_dir, "summary_report.txt")) == summary_report
+    
+    os.rename(save_dir, "tracker-test-0002010000")
+    pub_dict[list(pub_dict)[0]]["title"] = "A new title"
+    save_dir = save_and_send_reports_and_emails(authors_by_project_dict, pub_dict, config_dict, True, 1, True)
+    
+    assert "A new title" in read_text_from_txt(os.path.join(save_dir, "summary_report.txt"))
+    assert "summary_report.txt" in [email["attachment_filename"] for email in load_json(os.path.join(save_dir, "emails.json"))["emails"]]
+
+
+
+
 
 
 @pytest.fixture(autouse=True)
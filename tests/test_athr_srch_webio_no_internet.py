@@ -12,7 +12,7 @@ import pymed
 
 from fixtures import authors_dict
 from academic_tracker.athr_srch_webio import search_PubMed_for_pubs, search_ORCID_for_pubs, search_Google_Scholar_for_pubs
-from academic_tracker.athr_srch_webio import search_Crossref_for_pubs
+from academic_tracker.athr_srch_webio import search_Crossref_for_pubs, _prefilter_pub
 from academic_tracker.fileio import load_json
 
 
@@ -42,6 +42,24 @@ def original_queries():
 
 
 
+@pytest.mark.parametrize("pub_id, title, publication_year, is_journal_article, expected", [
+        
+        ("https://doi.org/10.1000/new", "A New Publication", 2021, True, (None, False)),
+        ("https://doi.org/10.1000/new", "A New Publication", 2019, True, (None, True)),
+        ("https://doi.org/10.1000/new", "A New Publication", None, True, (None, True)),
+        ("https://doi.org/10.1000/new", "A New Publication", 2021, False, (None, True)),
+        ("https://doi.org/10.1000/old", "Something Else Entirely", 2019, True, ("https://doi.org/10.1000/old", False)),
+        ("https://doi.org/10.1000/other", "An Old Publication", None, False, ("https://doi.org/10.1000/old", False)),
+        ("https://doi.org/10.1000/queried", "A Queried Publication", 2021, True, ("https://doi.org/10.1000/queried", True)),
+        ])
+
+def test_prefilter_pub(pub_id, title, publication_year, is_journal_article, expected):
+    running_pubs = {"https://doi.org/10.1000/old":{"title":"An Old Publication", "queried_sources":["ORCID"]},
+                    "https://doi.org/10.1000/queried":{"title":"A Queried Publication", "queried_sources":["PubMed"]}}
+    assert _prefilter_pub(pub_id, title, publication_year, 2020, running_pubs, "PubMed", is_journal_article) == expected
+
+
+
 ## The expected_dicts here are generated in test_athr_srch_modularized.py.
 
 def test_search_PubMed_for_pubs_first_pass(config_dict_Hunter_only, original_queries):
@@ -300,6 +318,22 @@ def test_search_Google_Scholar_for_pubs_fill_pub(config_dict_Hunter_only, origin
     assert all_queries == {'Hunter Moseley': publications}
 
 
+def test_search_Google_Scholar_for_pubs_before_cutoff_year(config_dict_Hunter_only, mocker):
+    "Test that publications before the cutoff year are skipped without looking up their DOI or filling them."
+    publications = [{"bib":{"title":"An old publication", "pub_year":1990}}]
+    
+    mocker.patch("academic_tracker.athr_srch_webio.scholarly.scholarly.search_author_id", 
+                  side_effect=[{"scholar_id": config_dict_Hunter_only["Authors"]["Hunter Moseley"]["scholar_id"], "publications":{}}])
+    mocker.patch("academic_tracker.athr_srch_webio.scholarly.scholarly.fill", 
+                  side_effect=[{"publications": publications}])
+    get_DOI_mock = mocker.patch("academic_tracker.athr_srch_webio.webio.get_DOI_from_Crossref")
+    
+    test_publication_dict, all_queries = search_Google_Scholar_for_pubs({}, config_dict_Hunter_only["Authors"], "asdf", None)
+    assert test_publication_dict == {}
+    assert all_queries["Hunter Moseley"][0]["doi"] is None
+    get_DOI_mock.assert_not_called()
+
+
 def test_search_Google_Scholar_for_pubs_no_pub_ID(config_dict_Hunter_only, original_queries, capsys, mocker):
     "Test that a message is printed when a pub ID cannot be found."
     publications = original_queries["Google Scholar"]["Hunter Moseley"][0:1]
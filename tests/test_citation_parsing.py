@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 
 import os
+import time
 
 import pytest
 
 from academic_tracker.citation_parsing import parse_text_for_citations, tokenize_Vancouver_authors, tokenize_MLA_or_Chicago_authors
 from academic_tracker.citation_parsing import tokenize_APA_or_Harvard_authors, tokenize_myncbi_citations, parse_MEDLINE_format
+from academic_tracker.citation_parsing import _possible_citation_styles, iter_text_citations, iter_MEDLINE_citations
+from academic_tracker.citation_parsing import _split_lines_into_chunks, parse_lines_in_parallel
+from academic_tracker.fileio import iter_lines_from_txt
 from academic_tracker.fileio import load_json, read_text_from_txt
 
 
@@ -23,6 +27,33 @@ def test_parse_text_for_citations():
 
 
 
+@pytest.mark.parametrize("line, styles", [
+        ("", []),
+        ("Just a sentence without a citation in it.", []),
+        ('Moseley, Hunter. "Some Title." Journal, 2020.', ["MLA", "Vancouver"]),
+        ("Moseley, H. (2020). Some title. Journal.", ["APA", "Vancouver"]),
+        ("Moseley, H. 2020. Some title. Journal.", ["Harvard", "Vancouver"]),
+        ("Moseley H. Some title. Journal. 2020.", ["Vancouver"]),
+        ])
+
+def test_possible_citation_styles(line, styles):
+    assert _possible_citation_styles(line) == styles
+
+
+
+def test_parse_text_for_citations_long_line():
+    """A long line that isn't a citation should not take long to parse."""
+    
+    assert parse_text_for_citations("word " * 2000 + " " * 3000 + '"quoted' + " x" * 2000) == []
+    
+    ## A long whitespace run used to make the author group regexes retry every split of it, 
+    ## which took close to a minute on this line.
+    start_time = time.perf_counter()
+    assert parse_text_for_citations("a" + " " * 50000 + '.x"' + '. "') == []
+    assert time.perf_counter() - start_time < 1
+
+
+
 @pytest.mark.parametrize("authors_string, authors", [
         ("last_name initials", [{"last":"last_name", "initials":"initials"}]),
         ("last_name initials et al", [{"last":"last_name", "initials":"initials"}]),
@@ -105,6 +136,18 @@ def test_tokenize_myncbi_citations():
 
 
 
+def test_tokenize_myncbi_citations_builtin_parser(mocker):
+    """The results should be the same whether lxml is installed or not."""
+    pages = load_json(os.path.join("tests", "testing_files", "myncbi_webpages.json"))
+    
+    expected_tokenized_citations = [tokenize_myncbi_citations(page) for page in pages]
+    
+    mocker.patch("academic_tracker.citation_parsing.HTML_PARSER", "html.parser")
+    
+    assert expected_tokenized_citations == [tokenize_myncbi_citations(page) for page in pages]
+
+
+
 
 def test_parse_MEDLINE_format():
     expected_tokenized_citations = load_json(os.path.join("tests", "testing_files", "tokenized_MEDLINE.json"))
@@ -115,7 +158,42 @@ def test_parse_MEDLINE_format():
 
 
 
+def test_iter_MEDLINE_citations():
+    expected_tokenized_citations = load_json(os.path.join("tests", "testing_files", "tokenized_MEDLINE.json"))
+    
+    lines = iter_lines_from_txt(os.path.join("tests", "testing_files", "medline.txt"))
+    citations = iter_MEDLINE_citations(lines)
+    
+    ## The first citation should be available before the whole file is read.
+    assert next(citations) == expected_tokenized_citations[0]
+    assert next(lines, None) is not None
+    
+    
+    
+def test_iter_text_citations():
+    
+    text = read_text_from_txt(os.path.join("tests", "testing_files", "parse_citations_test.txt"))
+    
+    assert list(iter_text_citations(iter(text.split("\n")))) == parse_text_for_citations(text)
+
+
+
+@pytest.mark.parametrize("lines, MEDLINE_reference, chunks", [
+        (["a", "b", "c"], False, [["a", "b"], ["c"]]),
+        (["a", "b", "c", "", "d", ""], True, [["a", "b", "c", ""], ["d", ""]]),
+        ([], False, []),
+        ])
+
+def test_split_lines_into_chunks(lines, MEDLINE_reference, chunks):
+    assert list(_split_lines_into_chunks(lines, 2, MEDLINE_reference)) == chunks
 
 
 
+def test_parse_lines_in_parallel():
+    
+    lines = read_text_from_txt(os.path.join("tests", "testing_files", "medline.txt")).split("\n")
+    assert parse_lines_in_parallel(lines, True, 2, chunk_size=50) == parse_MEDLINE_format("\n".join(lines))
+    
+    lines = read_text_from_txt(os.path.join("tests", "testing_files", "parse_citations_test.txt")).split("\n")
+    assert parse_lines_in_parallel(lines, False, 2, chunk_size=3) == parse_text_for_citations("\n".join(lines))
 
@@ -7,8 +7,10 @@ import json
 
 import pytest
 import shutil
+import openpyxl
 
-from academic_tracker.emails_and_reports_helpers import _replace_keywords
+from academic_tracker.emails_and_reports_helpers import _replace_keywords, compile_template, _render_template, _replace_loop_block
+from academic_tracker.emails_and_reports_helpers import _save_rows_to_file
 from academic_tracker.fileio import load_json
 
 
@@ -242,6 +244,129 @@ def test_replace_keywords_no_change(publication_dict2, config_dict2):
     assert expected_template == actual_template
 
 
+def test_compile_template():
+    template = {"Col1":"Title: <title> <not_a_keyword> <<DOI>>", "Col2":"", "Col3":"<authors>"}
+    
+    expected_compiled = {"Col1":("Title: ", "<title>", " <not_a_keyword> <", "<DOI>", ">"), "Col2":("",), "Col3":("", "<authors>", "")}
+    
+    assert compile_template(template) == expected_compiled
+
+
+def test_render_template_matches_replace_keywords(publication_dict2, config_dict2):
+    
+    template = {"Col1":"<project_name>: <title> (<publication_year>)", "Col2":"<author_last> <unknown> <pub_author_last>", "Col3":"<grants>"}
+    
+    pub_author = {"firstname":"Travis",
+                  "lastname":"Thompson"}
+    
+    expected_template = {"Col1":"Project 1: Identifying and sharing per-and polyfluoroalkyl substances hot-spot areas and exposures in drinking water. (2023)", 
+                         "Col2":"Moseley <unknown> Thompson", 
+                         "Col3":"P42 ES007380, 2020026"}
+    
+    actual_template = _render_template(compile_template(template), 
+                                       publication_dict2, 
+                                       config_dict2, 
+                                       project_name="Project 1", 
+                                       author="Hunter Moseley", 
+                                       pub="https://doi.org/10.1038/s41597-023-02277-x", 
+                                       pub_author=pub_author)
+    
+    assert expected_template == actual_template
+    
+
+def test_replace_keywords_replacement_with_keyword(publication_dict2, config_dict2):
+    """Keywords are replaced one after another, so a replacement with a keyword in it gets that keyword replaced too."""
+    
+    template = {"Col1":"<project_name>", "Col2":"<pub_author_first>"}
+    
+    expected_template = {"Col1":"Identifying and sharing per-and polyfluoroalkyl substances hot-spot areas and exposures in drinking water.", "Col2":"<title>"}
+    
+    actual_template = _replace_keywords(template, 
+                                        publication_dict2, 
+                                        config_dict2, 
+                                        project_name="<title>", 
+                                        pub="https://doi.org/10.1038/s41597-023-02277-x", 
+                                        pub_author={"firstname":"<title>"})
+    
+    assert expected_template == actual_template
+
+
+
+@pytest.mark.parametrize("string_to_modify, expected_string", [
+        ("Header <pub_loop><title></pub_loop> Footer", "Header \\1 C:\\new Footer"),
+        ("<pub_loop>1</pub_loop> and <pub_loop>2</pub_loop>", "\\1 C:\\new"),
+        ("No loop </pub_loop> here <pub_loop>", "No loop </pub_loop> here <pub_loop>"),
+        ("<pub_loop></pub_loop>", "\\1 C:\\new"),
+        ])
+def test_replace_loop_block(string_to_modify, expected_string):
+    """Backslashes in the replacement are inserted as is."""
+    assert _replace_loop_block(string_to_modify, "pub_loop", "\\1 C:\\new") == expected_string
+
+
+
+
+@pytest.fixture
+def rows():
+    return [{"Name":"b", "Title":"Second, with a comma", "Year":"2020"},
+            {"Name":"a", "Title":'Quoted "title"', "Year":"2021"},
+            {"Name":"b", "Title":"Second, with a comma", "Year":"2020"},
+            {"Name":"c", "Title":"Multi\nline", "Year":"2020"},
+            {"Name":"a", "Title":"First", "Year":"2020"}]
+
+
+def test_save_rows_to_file_csv(rows):
+    expected_report = ('Year,Name,Title\n'
+                       '2020,b,"Second, with a comma"\n'
+                       '2020,c,"Multi\nline"\n'
+                       '2020,a,First\n'
+                       '2021,a,"Quoted ""title"""\n')
+    
+    report, filename = _save_rows_to_file(iter(rows), "test_rows.csv", ["Year"], ["Year", "Name", "Title"], "csv", ",", TESTING_DIR)
+    
+    assert report == expected_report
+    assert filename == "test_rows.csv"
+    with open(os.path.join(TESTING_DIR, filename), encoding="utf-8", newline="") as f:
+        assert f.read() == expected_report
+
+
+@pytest.mark.parametrize("buffer_rows", [1, 2, 100000])
+def test_save_rows_to_file_external_sort(rows, buffer_rows, mocker):
+    """Sorting in runs saved to temporary files gives the same report as sorting in memory."""
+    mocker.patch("academic_tracker.emails_and_reports_helpers.TABULAR_SORT_BUFFER_ROWS", buffer_rows)
+    
+    expected_report = ('Name\tYear\tTitle\n'
+                       'a\t2020\tFirst\n'
+                       'a\t2021\t"Quoted ""title"""\n'
+                       'b\t2020\tSecond, with a comma\n'
+                       'c\t2020\t"Multi\nline"\n')
+    
+    report, filename = _save_rows_to_file(rows, "test_rows.csv", ["Name", "Year"], ["Name", "Year", "Title"], "csv", "\t", TESTING_DIR)
+    
+    assert report == expected_report
+
+
+def test_save_rows_to_file_xlsx(rows):
+    report, filename = _save_rows_to_file(iter(rows), "test_rows", ["Name"], ["Name", "Title"], "xlsx", ",", TESTING_DIR)
+    
+    assert filename == "test_rows.xlsx"
+    assert report == os.path.join(TESTING_DIR, "test_rows.xlsx")
+    
+    worksheet = openpyxl.load_workbook(report)["Sheet1"]
+    assert [list(row) for row in worksheet.iter_rows(values_only=True)] == [["Name", "Title"], 
+                                                                           ["a", 'Quoted "title"'], 
+                                                                           ["a", "First"], 
+                                                                           ["b", "Second, with a comma"], 
+                                                                           ["c", "Multi\nline"]]
+
+
+def test_save_rows_to_file_no_rows():
+    report, filename = _save_rows_to_file(iter([]), "test_no_rows.csv", [], ["Name"], "csv", ",", TESTING_DIR)
+    
+    assert report == ""
+    assert not os.path.exists(os.path.join(TESTING_DIR, "test_no_rows.csv"))
+
+
+
 
 
 
@@ -10,9 +10,15 @@ import shutil
 
 import pytest
 import pandas
+import docx
 
 from academic_tracker.fileio import load_json, read_previous_publications, save_publications_to_file, save_emails_to_file, read_text_from_txt 
 from academic_tracker.fileio import read_text_from_docx, read_csv, save_string_to_file, save_json_to_file
+from academic_tracker.fileio import iter_lines_from_txt, iter_lines_from_docx, iter_MEDLINE_lines_from_txt
+from academic_tracker.citation_parsing import iter_MEDLINE_citations
+from academic_tracker.fileio import save_publication_index_to_file, load_publication_index, PUBLICATION_INDEX_FILENAME
+from academic_tracker.fileio import load_tokenization_cache, save_tokenization_cache
+from academic_tracker.fileio import read_previous_report_manifest, save_report_manifest_to_file, REPORT_MANIFEST_FILENAME
 from fixtures import email_messages
 
 
@@ -85,6 +91,64 @@ def test_read_text_from_txt_no_path():
     
 
 
+def test_iter_lines_from_txt():
+    
+    path = os.path.join("tests", "testing_files", "testing_text.txt")
+    
+    assert list(iter_lines_from_txt(path)) == read_text_from_txt(path).split("\n")
+
+
+def test_iter_lines_from_txt_no_path():
+    path = os.path.join("tests", "testing_files", "asdf.asdf")
+    
+    with pytest.raises(SystemExit):
+        list(iter_lines_from_txt(path))
+
+
+
+def test_iter_MEDLINE_lines_from_txt():
+    
+    path = os.path.join("tests", "testing_files", "medline.txt")
+    
+    assert list(iter_MEDLINE_citations(iter_MEDLINE_lines_from_txt(path))) == list(iter_MEDLINE_citations(iter_lines_from_txt(path)))
+
+
+@pytest.fixture
+def MEDLINE_file():
+    os.mkdir(TESTING_DIR)
+    
+    yield os.path.join(TESTING_DIR, "medline.txt")
+    
+    shutil.rmtree(TESTING_DIR)
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_iter_MEDLINE_lines_from_txt_skips_lines(MEDLINE_file, newline):
+    lines = ["PMID- 1", "TI  - Title", "      continued", "AB  - Abstract", "      more abstract", 
+             "AU  - Smith J", "", "TI  - Title 2", "PMID- 2", "LID - 10.1/abc [doi]", ""]
+    with open(MEDLINE_file, "w", newline="") as f:
+        f.write(newline.join(lines))
+    
+    if newline == "\n":
+        ## The line after the title block is kept since it ends the title.
+        expected_lines = ["PMID- 1", "TI  - Title", "      continued", "AB  - Abstract", "AU  - Smith J", "", "TI  - Title 2", "PMID- 2", "LID - 10.1/abc [doi]", ""]
+    else:
+        expected_lines = lines
+    
+    assert list(iter_MEDLINE_lines_from_txt(MEDLINE_file)) == expected_lines
+    assert list(iter_MEDLINE_citations(iter_MEDLINE_lines_from_txt(MEDLINE_file))) == list(iter_MEDLINE_citations(iter_lines_from_txt(MEDLINE_file)))
+
+
+def test_iter_MEDLINE_lines_from_txt_no_path(capsys):
+    path = os.path.join("tests", "testing_files", "asdf.txt")
+    
+    with pytest.raises(SystemExit):
+        list(iter_MEDLINE_lines_from_txt(path))
+    captured = capsys.readouterr()
+    assert captured.out == "No such file: " + path + "\n"
+
+
+
 def test_read_text_from_docx_error():
     path = os.path.join("tests", "testing_files", "load_json_error")
     
@@ -101,6 +165,50 @@ def test_read_text_from_docx_no_error():
     assert data == 'Line 1\nLine 2'
     
     
+def test_iter_lines_from_docx():
+    
+    path = os.path.join("tests", "testing_files", "testing_docx.docx")
+    
+    assert list(iter_lines_from_docx(path)) == ["Line 1", "Line 2"]
+
+
+
+@pytest.mark.parametrize("streamed", [True, False])
+def test_iter_lines_from_docx_matches_python_docx(mocker, streamed):
+    
+    path = os.path.join("tests", "testing_files", "reference_test.docx")
+    
+    document = docx.Document(path)
+    expected_lines = u"\n".join([u"".join([r.text for r in paragraph._element.xpath(".//w:t")]) for paragraph in document.paragraphs]).split("\n")
+    
+    ## A document part that isn't in the zip forces the python-docx fallback.
+    if not streamed:
+        mocker.patch("academic_tracker.fileio.DOCX_DOCUMENT_PART", "asdf.xml")
+    
+    assert list(iter_lines_from_docx(path)) == expected_lines
+
+
+@pytest.fixture
+def table_docx():
+    os.mkdir(TESTING_DIR)
+    path = os.path.join(TESTING_DIR, "table.docx")
+    
+    document = docx.Document()
+    document.add_paragraph("Line 1")
+    document.add_table(rows=1, cols=1).cell(0,0).text = "Table"
+    document.add_paragraph("Line 2\nLine 3")
+    document.save(path)
+    
+    yield path
+    
+    shutil.rmtree(TESTING_DIR)
+
+
+def test_iter_lines_from_docx_skips_tables(table_docx):
+    
+    assert list(iter_lines_from_docx(table_docx)) == ["Line 1", "Line 2Line 3"]
+    
+    
 def test_read_text_from_docx_no_path():
     path = os.path.join("tests", "testing_files", "asdf.asdf")
     
@@ -453,6 +561,68 @@ def test_save_json_to_file_successful_save(test_save_json_dir):
 
 
 
+def test_save_publication_index_to_file_and_load():
+    
+    os.makedirs(TESTING_DIR, exist_ok=True)
+    publication_dict = {"https://doi.org/10.1000/a":{"title":"A title.", "doi":"10.1000/a", "pubmed_id":"111", "PMCID":None}}
+    save_publications_to_file(TESTING_DIR, publication_dict, {})
+    save_publication_index_to_file(TESTING_DIR, publication_dict)
+    
+    assert os.path.exists(os.path.join(TESTING_DIR, PUBLICATION_INDEX_FILENAME))
+    
+    pub_path = os.path.join(TESTING_DIR, "publications.json")
+    pub_index = load_publication_index(pub_path)
+    assert pub_index["DOI"] == {"10.1000/a":"https://doi.org/10.1000/a"}
+    assert pub_index["PMID"] == {"111":"https://doi.org/10.1000/a"}
+    
+    has_previous_pubs, prev_pubs, prev_pubs_index = read_previous_publications(pub_path, include_index=True)
+    assert has_previous_pubs and prev_pubs == publication_dict and prev_pubs_index == pub_index
+    
+    ## Changing the publications file should make the saved index stale.
+    publication_dict["222"] = {"title":"Another title.", "doi":None, "pubmed_id":"222", "PMCID":None}
+    save_publications_to_file(TESTING_DIR, publication_dict, {})
+    assert load_publication_index(pub_path) is None
+    
+    shutil.rmtree(TESTING_DIR)
+
+
+def test_load_publication_index_missing():
+    
+    assert load_publication_index(os.path.join("tests", "testing_files", "publication_dict.json")) is None
+
+
+
+@pytest.fixture
+def report_manifest_dirs():
+    dir_names = ["tracker-test-2301010000", "tracker-test-2302010000", "tracker-test-2303010000", "tracker-2304010000"]
+    for dir_name in dir_names:
+        os.mkdir(dir_name)
+    
+    yield dir_names
+    
+    for dir_name in dir_names:
+        shutil.rmtree(dir_name)
+
+
+def test_save_and_read_previous_report_manifest(report_manifest_dirs, capsys):
+    report_manifest = {"reports":{"summary_report.txt":{"hash":"asdf", "filename":"summary_report.txt"}}}
+    save_report_manifest_to_file("tracker-test-2301010000", report_manifest)
+    save_report_manifest_to_file("tracker-2304010000", {"reports":{}})
+    with open(os.path.join("tracker-test-2302010000", REPORT_MANIFEST_FILENAME), "w") as f:
+        f.write('{"version":0, "reports":{}}')
+    
+    ## The newest test directory with a usable manifest is used, tracker-2304010000 isn't a test directory.
+    previous_report_manifest = read_previous_report_manifest("tracker-test-2303010000")
+    assert previous_report_manifest["reports"] == report_manifest["reports"]
+    assert previous_report_manifest["save_dir_name"] == "tracker-test-2301010000"
+    captured = capsys.readouterr()
+    assert "tracker-test-2302010000" in captured.out
+    
+    assert read_previous_report_manifest("tracker-test-2301010000") is None
+
+
+
+
 @pytest.fixture(scope="module", autouse=True)
 def cleanup(request):
     """Cleanup a testing directory once we are finished."""
@@ -461,3 +631,31 @@ def cleanup(request):
             shutil.rmtree(TESTING_DIR)
     request.addfinalizer(remove_test_dir)
 
+
+
+@pytest.fixture
+def test_cache_dir():
+    yield TESTING_DIR
+    
+    if os.path.exists(TESTING_DIR):
+        shutil.rmtree(TESTING_DIR)
+
+
+def test_save_and_load_tokenization_cache(test_cache_dir):
+    tokenized_citations = [{"authors":[], "title":"asdf", "DOI":"", "PMID":"", "reference_line":"", "pub_dict_key":""}]
+    
+    save_tokenization_cache(test_cache_dir, "key", tokenized_citations, [[0, 1]])
+    
+    assert load_tokenization_cache(test_cache_dir, "key") == {"tokenized_citations":tokenized_citations, "duplicate_citations":[[0, 1]]}
+    assert load_tokenization_cache(test_cache_dir, "other_key") == None
+    assert os.listdir(test_cache_dir) == ["key.json"]
+
+
+def test_load_tokenization_cache_malformed(test_cache_dir, capsys):
+    os.mkdir(test_cache_dir)
+    with open(os.path.join(test_cache_dir, "key.json"), "w") as f:
+        f.write('{"tokenized_citations":[]}')
+    
+    assert load_tokenization_cache(test_cache_dir, "key") == None
+    captured = capsys.readouterr()
+    assert "malformed" in captured.out
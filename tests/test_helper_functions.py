@@ -12,10 +12,11 @@ import xml.etree.ElementTree as ET
 
 from academic_tracker.fileio import load_json
 from academic_tracker import __main__
-from academic_tracker.helper_functions import vprint, regex_match_return, regex_group_return, regex_search_return
+from academic_tracker.helper_functions import vprint, regex_match_return, regex_group_return, regex_search_return, compile_regex, REGEXES
 from academic_tracker.helper_functions import match_pub_authors_to_config_authors, match_pub_authors_to_citation_authors, match_authors_in_prev_pub
-from academic_tracker.helper_functions import create_pub_dict_for_saving_PubMed, is_fuzzy_match_to_list, fuzzy_matches_to_list, is_pub_in_publication_dict 
+from academic_tracker.helper_functions import create_pub_dict_for_saving_PubMed, get_PubMed_pub_id, get_Crossref_publication_date, is_fuzzy_match_to_list, fuzzy_matches_to_list, is_pub_in_publication_dict 
 from academic_tracker.helper_functions import create_authors_by_project_dict, adjust_author_attributes, find_duplicate_citations, are_citations_in_pub_dict
+from academic_tracker.helper_functions import build_publication_index, find_citation_in_publication_index
 from fixtures import publication_dict, pub_with_grants, pub_with_matching_author, passing_config, authors_by_project_dict
 
 
@@ -91,6 +92,23 @@ def test_regex_search_return(regex, string_to_match, return_value):
 
 
 
+def test_compile_regex():
+    
+    compiled = compile_regex(r"(?i).*doi:\s*([^\s]+\w).*")
+    assert compiled is compile_regex(r"(?i).*doi:\s*([^\s]+\w).*")
+    assert compile_regex(REGEXES["doi_in_text"]) is REGEXES["doi_in_text"]
+    assert regex_match_return(REGEXES["doi_in_text"], "doi: asdf") == ("asdf",)
+
+
+
+def test_REGEXES_loop_tags():
+    
+    template = "start<pub_loop>\n<title>\n</pub_loop>end"
+    assert regex_match_return(REGEXES["pub_loop"], template) == ("\n<title>\n",)
+    assert REGEXES["pub_loop_block"].sub("middle", template) == "startmiddleend"
+
+
+
 @pytest.fixture
 def authors_json_file():
     return {
@@ -251,6 +269,27 @@ def test_match_authors_in_pub_PubMed_ORCID():
     assert match_pub_authors_to_citation_authors(citation_authors, publication_authors) == True
 
 
+
+@pytest.mark.parametrize("publication_authors, expected", [
+        
+        ([{"lastname": "M.itchell", "ORCID": None}], True),
+        ([{"lastname": None, "ORCID": None}, {"lastname": "FLIGHT", "ORCID": None}], True),
+        ([{"lastname": "Some Name", "ORCID": None}], False),
+        ([{"collectivename": "Mitchell", "ORCID": None}], False),
+        ([{"collectivename": "some names", "ORCID": None}], True),
+        ([{"collectivename": None, "ORCID": "qwer"}], True),
+        ([], False),
+        ])
+
+def test_match_authors_in_pub_citation_sets(publication_authors, expected):
+    
+    citation_authors = [{"initials": "J", "last": "Mitchell"},
+                        {"collective_name": "some name"},
+                        {"initials": "R", "last": "Flight", "ORCID": "qwer"}]
+    
+    assert match_pub_authors_to_citation_authors(citation_authors, publication_authors) == expected
+
+
 @pytest.fixture
 def pub_no_PMCID():
     xml_path = os.path.join("tests", "testing_files", "no_author.xml")
@@ -289,6 +328,27 @@ def test_modify_pub_dict_for_saving_with_PMCID(pub_with_PMCID):
 
 
 
+def test_get_PubMed_pub_id(pub_no_PMCID, pub_with_PMCID, modified_PubMed_XML):
+    for pub in [pub_no_PMCID, pub_with_PMCID, modified_PubMed_XML]:
+        pub_id, _ = create_pub_dict_for_saving_PubMed(pub)
+        assert get_PubMed_pub_id(pub) == pub_id
+
+
+
+@pytest.mark.parametrize("work, date", [
+        
+        ({"published":{"date-parts":[[2021, 3, 4]]}}, (2021, 3, 4)),
+        ({"published-online":{"date-parts":[[2021, 3]]}}, (2021, 3, None)),
+        ({"published-print":{"date-parts":[[2021]]}}, (2021, None, None)),
+        ({"published":{"date-parts":[[]]}}, (None, None, None)),
+        ({}, (None, None, None)),
+        ])
+
+def test_get_Crossref_publication_date(work, date):
+    assert get_Crossref_publication_date(work) == date
+
+
+
 @pytest.fixture
 def modified_PubMed_XML():
     xml_path = os.path.join("tests", "testing_files", "modified_PubMed_XML.xml")
@@ -464,6 +524,32 @@ def test_are_citations_in_pub_dict(publication_json):
     is_citation_in_pubs = are_citations_in_pub_dict(tokenized_citations, publication_json)
     
     assert is_citation_in_pubs == is_citation_in_pubs_check
+
+
+def test_are_citations_in_pub_dict_with_index(publication_json):
+    
+    tokenized_citations = [{"PMID":35313030, "DOI":"", "title":""},
+                            {"PMID":"", "DOI":"https://doi.org/10.1038/S41467-023-35784-X", "title":""},
+                            {"PMID":"", "DOI":"", "title":"kegg_pull: a software package for the RESTful access and pulling from the Kyoto Encyclopedia of Gene and Genomes"},
+                            {"PMID":"1234", "DOI":"", "title":"kegg_pull"}]
+    
+    is_citation_in_pubs_check = [True, True, True, False]
+    
+    pub_index = json.loads(json.dumps(build_publication_index(publication_json)))
+    is_citation_in_pubs = are_citations_in_pub_dict(tokenized_citations, publication_json, pub_index)
+    
+    assert is_citation_in_pubs == is_citation_in_pubs_check
+
+
+def test_find_citation_in_publication_index():
     
+    publication_dict = {"https://doi.org/10.1000/a":{"title":"A title about metabolomics.", "doi":"10.1000/a", "pubmed_id":"111", "PMCID":"PMC1"},
+                        "222":{"title":"Another title about something else entirely.", "doi":None, "pubmed_id":"222", "PMCID":None},
+                        "no_title":{"title":None, "doi":None, "pubmed_id":None, "PMCID":None}}
     
+    pub_index = build_publication_index(publication_dict)
     
+    assert find_citation_in_publication_index({"PMID":"222", "DOI":None, "title":None}, publication_dict, pub_index) == "222"
+    assert find_citation_in_publication_index({"PMID":"", "DOI":"10.1000/A", "title":None}, publication_dict, pub_index) == "https://doi.org/10.1000/a"
+    assert find_citation_in_publication_index({"PMID":"", "DOI":"", "title":"another title about something else entirely"}, publication_dict, pub_index) == "222"
+    assert find_citation_in_publication_index({"PMID":"", "DOI":"", "title":"A title"}, publication_dict, pub_index) is None
@@ -9,7 +9,7 @@ import shutil
 import pandas
 
 from academic_tracker.ref_srch_emails_and_reports import convert_tokenized_authors_to_str, create_report_from_template, create_tokenization_report
-from academic_tracker.ref_srch_emails_and_reports import create_tabular_report
+from academic_tracker.ref_srch_emails_and_reports import create_tabular_report, create_citation_index_by_pub_id
 from academic_tracker.fileio import load_json, read_text_from_txt
 
 
@@ -81,6 +81,31 @@ def test_create_report_from_template_no_comparison(publication_dict, tokenized_c
     assert expected_text == actual_text
     
     
+def test_create_citation_index_by_pub_id():
+    tokenized_citations = [{"pub_dict_key":"pub1"}, {"pub_dict_key":None}, {"pub_dict_key":"pub2"}, {"pub_dict_key":"pub1"}]
+    
+    assert create_citation_index_by_pub_id(tokenized_citations) == {"pub1":0, None:1, "pub2":2}
+
+
+def test_create_report_from_template_pub_author_loop(publication_dict, tokenized_citations):
+    
+    pub_id = tokenized_citations[0]["pub_dict_key"]
+    
+    actual_text = create_report_from_template({pub_id:publication_dict[pub_id]}, [], tokenized_citations, "<pub_loop><title>:<pub_author_loop> <pub_author_last></pub_author_loop>\n</pub_loop>")
+    
+    assert actual_text == publication_dict[pub_id]["title"] + ":" + "".join(" " + author["lastname"] for author in publication_dict[pub_id]["authors"]) + "\n"
+    
+    
+def test_create_report_from_template_backslashes(publication_dict, tokenized_citations):
+    
+    pub_id = tokenized_citations[0]["pub_dict_key"]
+    publication_dict[pub_id]["title"] = "The \\alpha and \\1 of it"
+    
+    actual_text = create_report_from_template({pub_id:publication_dict[pub_id]}, [], tokenized_citations, "Start\n<pub_loop><title>\n</pub_loop>End")
+    
+    assert actual_text == "Start\nThe \\alpha and \\1 of it\nEnd"
+    
+    
 def test_create_report_from_template_no_reference(publication_dict, tokenized_citations):
     
     expected_text = read_text_from_txt(os.path.join("tests", "testing_files", "ref_srch_report_test2.txt"))
@@ -2,6 +2,7 @@
 
 import os
 import json
+import shutil
 
 import pytest
 import pymed
@@ -10,7 +11,10 @@ import requests
 import xml.etree.ElementTree as ET
 
 from academic_tracker.ref_srch_webio import build_pub_dict_from_PMID, search_references_on_source
-from academic_tracker.ref_srch_webio import parse_myncbi_citations, tokenize_reference_input
+from academic_tracker.ref_srch_webio import parse_myncbi_citations, tokenize_reference_input, iter_reference_input
+from academic_tracker.ref_srch_webio import _create_match_keys_PubMed, _create_match_keys_Crossref
+from academic_tracker.ref_srch_webio import create_reference_cache_key
+from academic_tracker.helper_functions import create_pub_dict_for_saving_PubMed, create_pub_dict_for_saving_Crossref
 from academic_tracker.fileio import load_json, read_text_from_txt
 
 
@@ -312,16 +316,37 @@ def test_search_references_on_Crossref_duplicate_citation(original_queries):
     assert expected_citation_keys == actual_citation_keys 
 
 
+def test_create_match_keys(original_queries):
+    """Match keys should have the same values as the full pub_dict for every key used in matching."""
+    def project_authors(authors):
+        projected = []
+        for author in authors:
+            name_key = "collectivename" if "collectivename" in author else "lastname"
+            if author[name_key] is not None or author["ORCID"] is not None:
+                projected.append({name_key:author[name_key], "ORCID":author["ORCID"]})
+        return projected
+    
+    for source, match_keys_function, pub_dict_function in [("PubMed", _create_match_keys_PubMed, create_pub_dict_for_saving_PubMed), 
+                                                           ("Crossref", _create_match_keys_Crossref, create_pub_dict_for_saving_Crossref)]:
+        for pub_list in original_queries[source]:
+            for pub in pub_list:
+                arguments = [pub] if source == "PubMed" else [pub, original_queries]
+                pub_id, match_keys = match_keys_function(*arguments)
+                expected_pub_id, pub_dict = pub_dict_function(*arguments)
+                assert pub_id == expected_pub_id
+                for key in ["pubmed_id", "doi", "title"]:
+                    assert match_keys[key] == pub_dict[key]
+                assert project_authors(match_keys["authors"]) == project_authors(pub_dict["authors"])
+
+
+
 def test_parse_myncbi_citations(mocker):
-    def page_generator():
-        pages = load_json(os.path.join("tests", "testing_files", "myncbi_webpages.json"))
-        for page in pages:
-            yield page
-            
-    pages = page_generator()
+    ## Pages are fetched concurrently, so return them by URL instead of call order.
+    pages = load_json(os.path.join("tests", "testing_files", "myncbi_webpages.json"))
+    pages = {"asdf":pages[0], "asdf/?page=2":pages[1], "asdf/?page=3":pages[2]}
         
-    def mock_query(*args, **kwargs):
-        return next(pages)
+    def mock_query(url, *args, **kwargs):
+        return pages[url]
     mocker.patch("academic_tracker.ref_srch_webio.webio.get_url_contents_as_str", mock_query)
     
     expected_tokenized_citations = load_json(os.path.join("tests", "testing_files", "tokenized_citations.json"))
@@ -346,25 +371,38 @@ def test_parse_myncbi_citations_bad_web_address(mocker, capsys):
 
 
 def test_parse_myncbi_citations_bad_page(mocker, capsys):
-    def page_generator():
-        pages = load_json(os.path.join("tests", "testing_files", "myncbi_webpages.json"))
-        for i, page in enumerate(pages):
-            if i == 1:
-                yield None
-            else:
-                yield page
-            
-    pages = page_generator()
+    pages = load_json(os.path.join("tests", "testing_files", "myncbi_webpages.json"))
+    pages = {"asdf":pages[0], "asdf/?page=2":None, "asdf/?page=3":pages[2]}
         
-    def mock_query(*args, **kwargs):
-        return next(pages)
+    def mock_query(url, *args, **kwargs):
+        return pages[url]
     mocker.patch("academic_tracker.ref_srch_webio.webio.get_url_contents_as_str", mock_query)
+    mock_sleep = mocker.patch("academic_tracker.ref_srch_webio.time.sleep")
     
     with pytest.raises(SystemExit):
         parse_myncbi_citations("asdf")
     captured = capsys.readouterr()
     
     assert captured.out == "Error: Could not access page 2 of the MYNCBI webpage. Aborting run.\n"
+    assert mock_sleep.call_count == 3
+
+
+def test_parse_myncbi_citations_retry(mocker):
+    pages = load_json(os.path.join("tests", "testing_files", "myncbi_webpages.json"))
+    pages = {"asdf":[pages[0]], "asdf/?page=2":[None, pages[1]], "asdf/?page=3":[ConnectionResetError(), None, pages[2]]}
+        
+    def mock_query(url, *args, **kwargs):
+        page = pages[url].pop(0)
+        if isinstance(page, Exception):
+            raise page
+        return page
+    mocker.patch("academic_tracker.ref_srch_webio.webio.get_url_contents_as_str", mock_query)
+    mock_sleep = mocker.patch("academic_tracker.ref_srch_webio.time.sleep")
+    
+    expected_tokenized_citations = load_json(os.path.join("tests", "testing_files", "tokenized_citations.json"))
+    
+    assert expected_tokenized_citations == parse_myncbi_citations("asdf")
+    assert mock_sleep.call_count == 3
 
 
 
@@ -433,6 +471,86 @@ def test_tokenize_reference_input_txt():
 
 
 
+def test_iter_reference_input_MEDLINE():
+    
+    expected_tokenized_citations = load_json(os.path.join("tests", "testing_files", "tokenized_MEDLINE.json"))
+    
+    citations = iter_reference_input(os.path.join("tests", "testing_files", "medline.txt"), True)
+    
+    assert next(citations) == expected_tokenized_citations[0]
+    assert [expected_tokenized_citations[0]] + list(citations) == expected_tokenized_citations
+
+
+
+def test_tokenize_reference_input_workers():
+    
+    expected_tokenized_citations = load_json(os.path.join("tests", "testing_files", "tokenized_ref_test.json"))
+    
+    actual_tokenized_citations = tokenize_reference_input(os.path.join("tests", "testing_files", "reference_test.txt"), False, workers=2)
+    
+    assert expected_tokenized_citations == actual_tokenized_citations
+
+
+
+@pytest.fixture
+def cache_dir():
+    cache_dir = "test_tokenization_cache"
+    
+    yield cache_dir
+    
+    if os.path.exists(cache_dir):
+        shutil.rmtree(cache_dir)
+
+
+def test_tokenize_reference_input_cache(cache_dir, mocker, capsys):
+    
+    reference_path = os.path.join("tests", "testing_files", "reference_test.txt")
+    expected_tokenized_citations = load_json(os.path.join("tests", "testing_files", "tokenized_ref_test.json"))
+    
+    assert expected_tokenized_citations == tokenize_reference_input(reference_path, False, cache_dir=cache_dir)
+    captured = capsys.readouterr()
+    assert "Tokenization cache miss for " + reference_path + "." in captured.out
+    assert len(os.listdir(cache_dir)) == 1
+    
+    ## A cache hit should not tokenize the reference again.
+    mock_iter = mocker.patch("academic_tracker.ref_srch_webio.iter_reference_input")
+    
+    assert expected_tokenized_citations == tokenize_reference_input(reference_path, False, cache_dir=cache_dir)
+    captured = capsys.readouterr()
+    assert "Tokenization cache hit for " + reference_path + "." in captured.out
+    mock_iter.assert_not_called()
+    
+    ## Different options are a different cache entry.
+    mock_iter.return_value = iter(expected_tokenized_citations)
+    tokenize_reference_input(reference_path, False, remove_duplicates=False, cache_dir=cache_dir)
+    captured = capsys.readouterr()
+    assert "Tokenization cache miss for " + reference_path + "." in captured.out
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_create_reference_cache_key(mocker):
+    
+    reference_path = os.path.join("tests", "testing_files", "reference_test.txt")
+    key = create_reference_cache_key(reference_path, False, True)
+    
+    assert key == create_reference_cache_key(reference_path, False, True)
+    assert key != create_reference_cache_key(reference_path, True, True)
+    assert key != create_reference_cache_key(reference_path, False, False)
+    assert create_reference_cache_key(os.path.join("tests", "testing_files", "tokenized_citations.json"), False, True) == None
+    assert create_reference_cache_key(os.path.join("tests", "testing_files", "asdf.txt"), False, True) == None
+    
+    mocker.patch("academic_tracker.ref_srch_webio.webio.get_url_etag", side_effect = ['"1"', '"1"', '"2"', None])
+    url_key = create_reference_cache_key("https://example.com", False, True)
+    
+    assert url_key == create_reference_cache_key("https://example.com", False, True)
+    assert url_key != create_reference_cache_key("https://example.com", False, True)
+    assert create_reference_cache_key("https://example.com", False, True) == None
+    
+    ## MyNCBI collections have more pages than the first URL, so they are never cached.
+    assert create_reference_cache_key("https://www.ncbi.nlm.nih.gov/myncbi/1/bibliography/public/", False, True) == None
+
+
+
 def test_tokenize_reference_input_wrong_file_extension(capsys):
     
     with pytest.raises(SystemExit):
@@ -7,10 +7,12 @@ import copy
 
 import pytest
 import requests
+import bs4
+import io
 
 from fixtures import  authors_dict
 from academic_tracker.webio import search_ORCID_for_ids, search_Google_Scholar_for_ids
-from academic_tracker.webio import get_DOI_from_Crossref
+from academic_tracker.webio import get_DOI_from_Crossref, convert_html_to_text, clean_tags_from_url
 # from academic_tracker.webio import get_grants_from_Crossref
 from academic_tracker.fileio import load_json
 
@@ -168,6 +170,35 @@ def test_get_DOI_from_Crossref_DOI_not_found(mocker):
     assert get_DOI_from_Crossref("asdfasdf", "ptth222@uky.edu") == None
 
 
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1000, 10**7])
+def test_convert_html_to_text_matches_BeautifulSoup(chunk_size):
+    pages = load_json(os.path.join("tests", "testing_files", "myncbi_webpages.json"))
+    
+    for page in pages:
+        clean_page = page.replace("\n", "").replace("<br>", "\n").replace("</div>", "</div>\n").replace("</p>", "</p>\n")
+        expected_text = bs4.BeautifulSoup(clean_page, "lxml").text
+        
+        assert convert_html_to_text([page[i:i+chunk_size] for i in range(0, len(page), chunk_size)]) == expected_text
+
+
+def test_convert_html_to_text_line_breaks():
+    html_chunks = ["<html><body><div>Line\n 1</d", "iv><p>Line 2<b", "r>Line 3</p>", "<script>var a;</script><pre>  </pre><!-- c -->  </body></html>"]
+    
+    assert convert_html_to_text(html_chunks) == "Line 1\nLine 2\nLine 3\n   "
+
+
+def test_convert_html_to_text_empty():
+    assert convert_html_to_text(["", ""]) == None
+
+
+def test_clean_tags_from_url(mocker):
+    mocker.patch("academic_tracker.webio.URL_READ_CHUNK_SIZE", 3)
+    mocker.patch("academic_tracker.webio.urllib.request.urlopen", return_value = io.BytesIO("<p>Smith J. \u00e9</p><div>Title</div>".encode("utf-8")))
+    
+    assert clean_tags_from_url("https://example.com") == "Smith J. \u00e9\nTitle\n"
+
+
 ## This function is unused in the actual code.
 # def test_get_grants_from_Crossref_grants_found(mocker):
 #     def mock_query(*args, **kwargs):